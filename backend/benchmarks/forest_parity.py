@@ -0,0 +1,74 @@
+"""
+Forest Parity Benchmark
+Checks that the compiled forest matches sklearn exactly and compares their latency
+
+Usage (from the backend directory):
+    python -m benchmarks.forest_parity [--samples 20000] [--repeats 200]
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+
+from simulation.forest_compiler import CompiledForest
+from simulation.model_artifacts import load_artifacts
+
+BATCH_SIZES = [1, 8, 64, 256]
+
+
+def sample_totals(n_samples: int, seed: int = 0) -> np.ndarray:
+    """Organization totals spanning and exceeding the synthetic training ranges"""
+    rng = np.random.default_rng(seed)
+    upper = np.array([1000, 10000, 1000, 5000, 10000], dtype=float)
+    return rng.uniform(0, 3 * upper, size=(n_samples, len(upper)))
+
+
+def check_parity(model, compiled, X: np.ndarray) -> bool:
+    expected = model.predict(X)
+    actual = compiled.predict(X)
+    identical = np.array_equal(expected, actual)
+    print(f"parity on {len(X)} rows: {'identical' if identical else 'MISMATCH'} "
+          f"(max abs diff {np.abs(expected - actual).max():.3g})")
+    return identical
+
+
+def latency_ms(fn, X: np.ndarray, repeats: int) -> np.ndarray:
+    fn(X)  # warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.array(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compiled forest parity and latency benchmark")
+    parser.add_argument("--samples", type=int, default=20000, help="Rows used for the parity check")
+    parser.add_argument("--repeats", type=int, default=200, help="Timed calls per batch size")
+    parser.add_argument("--version", default=None, help="Model artifact version")
+    args = parser.parse_args()
+
+    model, scaler, metadata = load_artifacts(args.version)
+    compiled = CompiledForest.from_multioutput(model)
+    print(f"model {metadata['version']}: {len(compiled.roots)} trees, "
+          f"{compiled.node_count} nodes, max depth {compiled.max_depth}")
+
+    X = (sample_totals(args.samples) - scaler.mean_) / scaler.scale_
+    ok = check_parity(model, compiled, X)
+
+    print(f"{'rows':>6} {'sklearn p50':>12} {'p99':>9} {'compiled p50':>13} {'p99':>9} {'speedup':>8}")
+    for batch_size in BATCH_SIZES:
+        batch = X[:batch_size]
+        base = latency_ms(model.predict, batch, args.repeats)
+        fast = latency_ms(compiled.predict, batch, args.repeats)
+        print(f"{batch_size:>6} {np.percentile(base, 50):>10.3f}ms {np.percentile(base, 99):>7.3f}ms "
+              f"{np.percentile(fast, 50):>11.3f}ms {np.percentile(fast, 99):>7.3f}ms "
+              f"{np.percentile(base, 50) / np.percentile(fast, 50):>7.1f}x")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
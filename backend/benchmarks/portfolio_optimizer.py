@@ -0,0 +1,101 @@
+"""
+Portfolio Optimizer Benchmark
+Exact vs greedy technology selection on synthetic catalogs, checked against brute force on small ones
+
+Usage (from the backend directory):
+    python -m benchmarks.portfolio_optimizer [--sizes 100 300 600] [--time-limit-ms 200] [--trials 200]
+"""
+
+import sys
+import random
+import argparse
+import itertools
+
+from services.portfolio_optimizer import PortfolioOptimizer, STATUS_OPTIMAL, reduction_value, combined_reduction
+from services.technology_catalog import effectiveness
+
+# How reduction factors relate to costs; correlated instances are the hard ones for branch-and-bound
+CORRELATIONS = ["none", "weak", "strong"]
+
+
+def synthetic_catalog(n: int, correlation: str, seed: int = 0):
+    """Technologies in the effectiveness order /simulate hands to the optimizer"""
+    rng = random.Random(seed)
+    technologies = []
+    for i in range(n):
+        cost = rng.uniform(1e4, 1e6)
+        reduction_factor = {
+            "none": rng.uniform(0.001, 0.1),
+            "weak": cost / 1e7 * rng.uniform(0.9, 1.1),
+            "strong": cost / 1e7 + 0.001
+        }[correlation]
+        technologies.append({"id": f"tech-{i}", "reduction_factor": reduction_factor, "cost": cost})
+    return sorted(technologies, key=effectiveness, reverse=True)
+
+
+def objective(technologies, positions, target: float):
+    """(capped value, cost): larger value first, then lower cost"""
+    value = sum(reduction_value(technologies[i]["reduction_factor"]) for i in positions)
+    cap = float("inf") if target >= 1 else reduction_value(target)
+    return min(value, cap), sum(technologies[i]["cost"] for i in positions)
+
+
+def brute_force(technologies, target: float, budget: float):
+    best = (0.0, 0.0)
+    for size in range(1, len(technologies) + 1):
+        for positions in itertools.combinations(range(len(technologies)), size):
+            value, cost = objective(technologies, positions, target)
+            if cost <= budget and (value > best[0] + 1e-9 or (value >= best[0] - 1e-9 and cost < best[1])):
+                best = (value, cost)
+    return best
+
+
+def check_exact(optimizer: PortfolioOptimizer, trials: int) -> bool:
+    """Optimizer vs brute force on catalogs of up to 12 technologies"""
+    rng = random.Random(1)
+    mismatches = 0
+    for _ in range(trials):
+        technologies = synthetic_catalog(rng.randint(1, 12), rng.choice(CORRELATIONS), rng.randrange(1 << 30))
+        target = rng.choice([0.2, 0.5, 0.8, 1.0])
+        budget = rng.uniform(0.1, 0.6) * sum(tech["cost"] for tech in technologies)
+        solution = optimizer.optimize(technologies, target, budget, time_limit_ms=10000)
+        value, cost = objective(technologies, solution.positions, target)
+        expected = brute_force(technologies, target, budget)
+        if solution.status != STATUS_OPTIMAL or cost > budget or abs(value - expected[0]) > 1e-7 \
+                or cost > expected[1] + 1e-6:
+            mismatches += 1
+    print(f"brute-force check: {trials - mismatches}/{trials} optimal")
+    return mismatches == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Portfolio optimizer benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 600], help="Candidate technologies")
+    parser.add_argument("--time-limit-ms", type=float, default=200, help="Optimizer time limit")
+    parser.add_argument("--trials", type=int, default=200, help="Small instances checked by brute force")
+    args = parser.parse_args()
+
+    optimizer = PortfolioOptimizer(time_limit_ms=args.time_limit_ms)
+    ok = check_exact(optimizer, args.trials)
+
+    print(f"{'n':>5} {'correlation':>11} {'target':>6} {'greedy':>9} {'optimizer':>9} {'cost saved':>10} "
+          f"{'status':>8} {'nodes':>7} {'ms':>7}")
+    for n in args.sizes:
+        for correlation in CORRELATIONS:
+            technologies = synthetic_catalog(n, correlation, seed=n)
+            budget = 0.1 * sum(tech["cost"] for tech in technologies)
+            # A reachable target (cheapest set reaching it) and an unreachable one (best reduction in budget)
+            for target in (0.5, 1.0):
+                greedy = objective(technologies, optimizer.greedy(technologies, target, budget), target)
+                solution = optimizer.optimize(technologies, target, budget)
+                value, cost = objective(technologies, solution.positions, target)
+                ok = ok and (value > greedy[0] + 1e-9 or (value >= greedy[0] - 1e-9 and cost <= greedy[1] + 1e-6))
+                print(f"{n:>5} {correlation:>11} {target:>6.0%} {combined_reduction(greedy[0]):>9.4%} "
+                      f"{combined_reduction(value):>9.4%} {1 - cost / greedy[1]:>10.1%} {solution.status:>8} "
+                      f"{solution.nodes:>7} {solution.elapsed_ms:>7.1f}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Prediction Interval Benchmark
+Compares forest percentile intervals from one compiled pass against a per-estimator loop
+
+Usage (from the backend directory):
+    python -m benchmarks.prediction_intervals [--level 90] [--repeats 50]
+"""
+
+import sys
+import argparse
+import numpy as np
+
+from simulation.forest_compiler import CompiledForest
+from simulation.model_artifacts import load_artifacts
+from benchmarks.forest_parity import sample_totals, latency_ms
+
+BATCH_SIZES = [1, 8, 64, 256]
+
+
+def naive_intervals(model, X: np.ndarray, percentiles):
+    """Call predict on every tree of every output forest, then take percentiles"""
+    predictions = np.empty((len(X), len(model.estimators_)))
+    bounds = np.empty((len(X), len(model.estimators_), len(percentiles)))
+    for output_index, forest in enumerate(model.estimators_):
+        per_tree = np.stack([tree.predict(X) for tree in forest.estimators_], axis=1)
+        predictions[:, output_index] = forest.predict(X)
+        bounds[:, output_index, :] = np.percentile(per_tree, percentiles, axis=1).T
+    return predictions, bounds
+
+
+def compiled_intervals(compiled: CompiledForest, X: np.ndarray, percentiles):
+    """One vectorized pass over all trees, reused for the mean and the percentiles"""
+    per_tree = compiled.tree_predictions(X)
+    return compiled.predict_from_trees(per_tree), compiled.percentiles_from_trees(per_tree, percentiles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forest prediction interval benchmark")
+    parser.add_argument("--level", type=float, default=90, help="Interval level in percent")
+    parser.add_argument("--repeats", type=int, default=50, help="Timed calls per batch size")
+    parser.add_argument("--version", default=None, help="Model artifact version")
+    args = parser.parse_args()
+
+    model, scaler, metadata = load_artifacts(args.version)
+    compiled = CompiledForest.from_multioutput(model)
+    tail = (100 - args.level) / 2
+    percentiles = [tail, 100 - tail]
+    print(f"model {metadata['version']}: {len(compiled.roots)} trees, {args.level:g}% intervals")
+
+    X = (sample_totals(2000) - scaler.mean_) / scaler.scale_
+    expected = naive_intervals(model, X, percentiles)
+    actual = compiled_intervals(compiled, X, percentiles)
+    ok = all(np.array_equal(e, a) for e, a in zip(expected, actual))
+    print(f"parity on {len(X)} rows: {'identical' if ok else 'MISMATCH'}")
+
+    print(f"{'rows':>6} {'predict p50':>12} {'naive p50':>11} {'compiled p50':>13} {'vs naive':>9} {'vs predict':>11}")
+    for batch_size in BATCH_SIZES:
+        batch = X[:batch_size]
+        point = np.percentile(latency_ms(model.predict, batch, args.repeats), 50)
+        naive = np.percentile(latency_ms(lambda b: naive_intervals(model, b, percentiles), batch, args.repeats), 50)
+        fast = np.percentile(latency_ms(lambda b: compiled_intervals(compiled, b, percentiles), batch, args.repeats), 50)
+        print(f"{batch_size:>6} {point:>10.3f}ms {naive:>9.3f}ms {fast:>11.3f}ms "
+              f"{naive / fast:>8.1f}x {fast / point:>10.2f}x")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
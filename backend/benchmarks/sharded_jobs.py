@@ -0,0 +1,116 @@
+"""
+Sharded Job Benchmark
+Scaling of process-pool sharded quantification with the number of worker processes
+
+Usage (from the backend directory):
+    python -m benchmarks.sharded_jobs [--organizations 20000] [--departments 10] [--workers 1 2 4 8]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+from simulation.carbon_quantification_model import carbon_model, BatchQuantificationRequest, BatchQuantificationResponse
+from simulation.sharded_jobs import ShardedJobRunner, ShardedJob
+from simulation.streaming_ingest import STREAM_FORMAT_NDJSON, VALUE_FIELDS
+
+DEPARTMENT_NAMES = ["Manufacturing", "Logistics", "Office", "Warehouse", "Retail", "Research", "Fleet", "Plant"]
+
+
+def job_upload(n_organizations: int, n_departments: int, seed: int = 0) -> bytes:
+    """NDJSON rows, one per department, each organization's rows together"""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(1, 1000, size=(n_organizations * n_departments, len(VALUE_FIELDS))).round(3)
+    lines = []
+    for i, row in enumerate(values.tolist()):
+        record = {"organization_id": f"org-{i // n_departments}",
+                  "name": DEPARTMENT_NAMES[i % n_departments % len(DEPARTMENT_NAMES)] + f"-{i % n_departments}"}
+        record.update(zip(VALUE_FIELDS, row))
+        lines.append(json.dumps(record))
+    return "\n".join(lines).encode("utf-8")
+
+
+def serial_quantify(data: bytes) -> bytes:
+    """What /quantify/batch does with the same rows, in one process"""
+    organizations = {}
+    for line in data.split(b"\n"):
+        record = json.loads(line)
+        organizations.setdefault(record.pop("organization_id"), []).append(record)
+    request = BatchQuantificationRequest.model_validate({"organizations": [
+        {"organization_id": organization, "departments": departments}
+        for organization, departments in organizations.items()
+    ]})
+    batch = carbon_model.prepare_batch([org.departments for org in request.organizations])
+    results = carbon_model.finalize_batch(batch, carbon_model.predict_totals(batch.totals))
+    return BatchQuantificationResponse(results=[
+        {"organization_id": org.organization_id, "result": result}
+        for org, result in zip(request.organizations, results)
+    ]).model_dump_json().encode("utf-8")
+
+
+def comparable(result: bytes):
+    """Parsed results without input_flags, which depend on each process's screening history"""
+    parsed = json.loads(result)
+    for entry in parsed["results"]:
+        entry["result"].pop("input_flags", None)
+    return parsed
+
+
+def timed_job(runner: ShardedJobRunner, data: bytes):
+    """Time a job on an uploaded file; writing the upload is not timed"""
+    with runner.spool() as spool:
+        spool.write(data)
+    try:
+        job = ShardedJob("benchmark", STREAM_FORMAT_NDJSON, len(data))
+        started = time.perf_counter()
+        result = runner.run(job, spool.name)
+        return time.perf_counter() - started, result
+    finally:
+        os.remove(spool.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded quantification job benchmark")
+    parser.add_argument("--organizations", type=int, default=20000, help="Organizations in the upload")
+    parser.add_argument("--departments", type=int, default=10, help="Departments per organization")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Pool sizes to time; powers of two up to the CPU count by default")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or [n for n in [1, 2, 4, 8, 16, 32, 64] if n <= cpus]
+    data = job_upload(args.organizations, args.departments)
+    carbon_model.ensure_loaded()
+    print(f"{args.organizations} organizations x {args.departments} departments "
+          f"({len(data) / 1e6:.1f} MB NDJSON), {cpus} CPUs, model {carbon_model.version}")
+
+    started = time.perf_counter()
+    expected = serial_quantify(data)
+    serial = time.perf_counter() - started
+    print(f"serial /quantify/batch path: {serial:.2f}s")
+
+    ok = True
+    baseline = None
+    print(f"{'workers':>7} {'wall':>8} {'vs serial':>10} {'speedup':>8} {'efficiency':>11} {'parity':>9}")
+    for n in workers:
+        runner = ShardedJobRunner(max_workers=n)
+        try:
+            timed_job(runner, data[:data.find(b"\n")])  # start the processes and load the model
+            elapsed, result = timed_job(runner, data)
+        finally:
+            runner.shutdown()
+        baseline = baseline or elapsed
+        same = comparable(result) == comparable(expected)
+        ok = ok and same
+        speedup = baseline / elapsed
+        print(f"{n:>7} {elapsed:>7.2f}s {serial / elapsed:>9.2f}x {speedup:>7.2f}x "
+              f"{speedup / (n / workers[0]):>10.0%} {'identical' if same else 'MISMATCH':>9}")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Worker Memory Benchmark
+Reports per-worker RSS/PSS for private model copies versus preloaded and memory-mapped models
+
+Usage (from the backend directory, Linux only):
+    python -m benchmarks.worker_rss [--workers 4]
+
+Modes:
+    private  - every worker loads its own copy with joblib.load (plain uvicorn --workers)
+    preload  - the parent loads once and forks workers (gunicorn_conf.py with preload_app)
+    mmap     - every worker memory-maps the compiled forest (CARBON_MODEL_MMAP=1)
+"""
+
+import gc
+import argparse
+import multiprocessing
+import numpy as np
+
+from simulation.model_artifacts import load_artifacts, load_shared_artifacts
+
+MODES = ["private", "preload", "mmap"]
+
+
+def read_memory_kb():
+    """Rss, Pss and shared pages of the current process from /proc"""
+    stats = {}
+    with open("/proc/self/smaps_rollup", 'r') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Shared_Clean:", "Shared_Dirty:"):
+                stats[parts[0].rstrip(":")] = int(parts[1])
+    stats["Shared"] = stats.pop("Shared_Clean", 0) + stats.pop("Shared_Dirty", 0)
+    return stats
+
+
+def _predict(model, scaler, compiled, X):
+    X_scaled = (X - scaler.mean_) / scaler.scale_
+    if compiled is not None:
+        return compiled.predict(X_scaled)
+    return model.predict(X_scaled)
+
+
+def _worker(mode, preloaded, all_loaded, results, done):
+    if mode == "private":
+        model, scaler, _ = load_artifacts()
+        compiled = None
+    elif mode == "mmap":
+        compiled, scaler, _ = load_shared_artifacts()
+        model = None
+    else:
+        model, scaler, compiled = preloaded
+
+    X = np.random.default_rng(0).uniform(1, 5000, size=(64, len(scaler.mean_)))
+    _predict(model, scaler, compiled, X)
+
+    # Measure only once every worker holds its model, so shared pages are split fairly in Pss
+    all_loaded.wait()
+    results.put(read_memory_kb())
+    done.wait()
+
+
+def run_mode(mode: str, n_workers: int):
+    context = multiprocessing.get_context("fork")
+    preloaded = None
+    if mode == "preload":
+        model, scaler, _ = load_artifacts()
+        preloaded = (model, scaler, None)
+        gc.freeze()
+
+    all_loaded = context.Barrier(n_workers)
+    done = context.Event()
+    results = context.Queue()
+    workers = [
+        context.Process(target=_worker, args=(mode, preloaded, all_loaded, results, done))
+        for _ in range(n_workers)
+    ]
+    for worker in workers:
+        worker.start()
+    stats = [results.get() for _ in workers]
+    done.set()
+    for worker in workers:
+        worker.join()
+
+    if mode == "preload":
+        gc.unfreeze()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-worker memory of the carbon model deployment modes")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    args = parser.parse_args()
+
+    print(f"{'mode':>8} {'rss/worker':>12} {'pss/worker':>12} {'shared/worker':>14} {'total pss':>11}")
+    for mode in args.modes:
+        stats = run_mode(mode, args.workers)
+        rss = np.mean([s["Rss"] for s in stats]) / 1024
+        pss = np.mean([s["Pss"] for s in stats]) / 1024
+        shared = np.mean([s["Shared"] for s in stats]) / 1024
+        total = sum(s["Pss"] for s in stats) / 1024
+        print(f"{mode:>8} {rss:>10.1f}MB {pss:>10.1f}MB {shared:>12.1f}MB {total:>9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for multi-worker deployments
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn_conf.py main:app
+
+The app and the carbon model are loaded once in the master before workers
+are forked, so the model arrays are shared copy-on-write between workers.
+Set CARBON_MODEL_MMAP=1 to serve the memory-mapped compiled forest instead
+of the sklearn trees; its pages are then shared through the page cache.
+"""
+
+import gc
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+
+def on_starting(server):
+    # With preload_app the app module is already imported at this point
+    from simulation.carbon_quantification_model import carbon_model
+
+    carbon_model.load()
+    # Keep the collector from touching (and so copying) the preloaded objects in each worker
+    gc.freeze()
+    server.log.info(f"Preloaded carbon model version {carbon_model.version}")
@@ -1,7 +1,12 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import simulation, gemini_routes, marketplace
 from simulation import carbon_routes
+from simulation.carbon_quantification_model import carbon_model, factor_sets
+from simulation.inference_executor import inference_executor
+from simulation.sharded_jobs import sharded_job_runner
+from services.monte_carlo import monte_carlo
 
 app = FastAPI(
     title="CarbonSaathi API",
@@ -24,6 +29,22 @@ app.include_router(carbon_routes.router)
 app.include_router(gemini_routes.router)
 app.include_router(marketplace.router)
 
+@app.on_event("startup")
+async def warm_up_models():
+    # Load model artifacts in the background; set CARBON_MODEL_WARMUP=0 to load on first request
+    if os.environ.get("CARBON_MODEL_WARMUP", "1") != "0":
+        carbon_model.warm_up()
+    # Swap in edited emission factor sets without a restart; CARBON_FACTOR_SET_WATCH=0 disables
+    if os.environ.get("CARBON_FACTOR_SET_WATCH", "1") != "0":
+        factor_sets.start_watching()
+
+@app.on_event("shutdown")
+async def shutdown_executors():
+    factor_sets.stop_watching()
+    inference_executor.shutdown()
+    sharded_job_runner.shutdown()
+    monte_carlo.shutdown()
+
 @app.get("/")
 async def root():
     return {
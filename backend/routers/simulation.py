@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import List, Dict, Optional, Any
+from pydantic import BaseModel, Field
+from typing import List, Dict, Optional, Any, Literal, Union
 import json
 import os
 import random
@@ -8,6 +8,11 @@ from datetime import datetime
 
 # Import the AI-driven simulation router
 from simulation.simulation_api import router as ai_simulation_router
+from services.technology_catalog import TechnologyCatalog, ORDER_EFFECTIVENESS, ORDER_REDUCTION
+from services.portfolio_optimizer import portfolio_optimizer
+from services.emission_trajectory import EmissionTrajectory
+from services.monte_carlo import monte_carlo
+from simulation.inference_executor import inference_executor, ExecutorBusyError
 
 router = APIRouter(
     prefix="/simulation",
@@ -36,6 +41,13 @@ class SimulationInput(BaseModel):
     time_horizon: int
     industry_type: str
     selected_technologies: List[str] = []
+    # "greedy" picks by reduction factor / cost; "optimal" solves the selection exactly (see portfolio_optimizer)
+    optimizer: Literal["greedy", "optimal"] = "greedy"
+    # "records" gives a dict per month; "arrays" gives monthly emissions plus each technology's activation month
+    trajectory_format: Literal["records", "arrays"] = "records"
+    # Runs sampled from the technology uncertainty ranges; 0 skips the Monte Carlo analysis
+    monte_carlo_runs: int = Field(0, ge=0)
+    monte_carlo_seed: Optional[int] = Field(None, ge=0)
 
 class SimulationResult(BaseModel):
     scenario_id: str
@@ -48,7 +60,9 @@ class SimulationResult(BaseModel):
     roi: float
     implementation_timeline: Dict[str, Any]
     technologies: List[Technology]
-    emission_trajectory: List[Dict[str, Any]]
+    emission_trajectory: Union[List[Dict[str, Any]], Dict[str, Any]]
+    optimization: Optional[Dict[str, Any]] = None
+    uncertainty: Optional[Dict[str, Any]] = None
 
 # Load technologies data
 TECHNOLOGIES = [
@@ -254,68 +268,77 @@ TECHNOLOGIES = [
     }
 ]
 
+# Indexed once here; the routes below only look up and intersect
+catalog = TechnologyCatalog(TECHNOLOGIES)
+
 @router.get("/technologies", response_model=List[Technology])
 async def get_technologies(
     category: Optional[str] = None,
     search: Optional[str] = None,
-    applicability: Optional[str] = None
+    applicability: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of technologies, e.g. for typeahead")
 ):
-    """Get all available carbon reduction technologies with optional filtering"""
-    result = TECHNOLOGIES
-    
-    if category:
-        result = [tech for tech in result if tech["category"] == category]
-    
+    """
+    Get all available carbon reduction technologies with optional filtering
+
+    With search, technologies whose name or description contains the text
+    are ranked: name words starting with it first, then description words,
+    then any other match.
+    """
     if search:
-        search = search.lower()
-        result = [tech for tech in result if search in tech["name"].lower() or search in tech["description"].lower()]
-    
-    if applicability:
-        result = [tech for tech in result if applicability in tech["applicability"]]
+        return catalog.search(search, category, applicability, limit)
     
-    return result
+    result = catalog.filter(category, applicability)
+    return result[:limit] if limit else result
 
 @router.get("/technology/{technology_id}", response_model=Technology)
 async def get_technology(technology_id: str):
     """Get details for a specific technology"""
-    for tech in TECHNOLOGIES:
-        if tech["id"] == technology_id:
-            return tech
-    raise HTTPException(status_code=404, detail="Technology not found")
+    tech = catalog.get(technology_id)
+    if tech is None:
+        raise HTTPException(status_code=404, detail="Technology not found")
+    return tech
 
 @router.get("/categories")
 async def get_categories():
     """Get all unique technology categories"""
-    categories = set()
-    for tech in TECHNOLOGIES:
-        categories.add(tech["category"])
-    return {"categories": list(categories)}
+    return {"categories": catalog.categories}
 
 @router.post("/simulate", response_model=SimulationResult)
 async def simulate_scenario(simulation_input: SimulationInput):
     """
     Run a carbon reduction simulation based on provided parameters
     """
-    # Get relevant technologies (either selected or all applicable ones)
-    applicable_technologies = []
+    if not simulation_input.baseline_emissions > 0:
+        # Reductions, ROI and the Monte Carlo percentiles are all relative to the baseline
+        raise HTTPException(status_code=400, detail="baseline_emissions must be positive")
     
+    # Get relevant technologies (either selected or all applicable ones),
+    # sorted by effectiveness (reduction factor / cost)
     if simulation_input.selected_technologies:
-        for tech_id in simulation_input.selected_technologies:
-            tech = next((t for t in TECHNOLOGIES if t["id"] == tech_id), None)
-            if tech:
-                applicable_technologies.append(tech)
+        applicable_technologies = catalog.rank_by_effectiveness(
+            catalog.lookup(simulation_input.selected_technologies)
+        )
     else:
-        # If no technologies specifically selected, find applicable ones for the industry
-        applicable_technologies = [
-            tech for tech in TECHNOLOGIES 
-            if simulation_input.industry_type in tech["applicability"]
-        ]
+        # If no technologies specifically selected, use the presorted view for the industry
+        applicable_technologies = catalog.applicable(simulation_input.industry_type, ORDER_EFFECTIVENESS)
     
-    # Sort technologies by effectiveness (reduction factor / cost)
-    applicable_technologies.sort(
-        key=lambda t: t["reduction_factor"] / t["cost"], 
-        reverse=True
-    )
+    # The optimal selection goes through the same pass below, which takes all of it:
+    # it fits the budget, and a cheapest set reaching the target reaches it only with its last technology
+    optimization = None
+    if simulation_input.optimizer == "optimal":
+        # Up to the optimizer's time limit of CPU work, kept off the event loop
+        try:
+            solution = await inference_executor.run(
+                portfolio_optimizer.optimize,
+                applicable_technologies,
+                simulation_input.target_reduction / 100,
+                simulation_input.budget_constraint or None
+            )
+        except ExecutorBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        applicable_technologies = [applicable_technologies[position] for position in solution.positions]
+        optimization = solution.summary()
     
     # Create implementation plan
     selected_techs = []
@@ -358,30 +381,12 @@ async def simulate_scenario(simulation_input: SimulationInput):
         current_month = max(current_month + 2, end_month - 4)  # Allow some parallel implementation
     
     # Calculate emission trajectory over time
-    emission_trajectory = []
-    monthly_emissions = simulation_input.baseline_emissions / 12  # Monthly emissions
-    
-    for month in range(simulation_input.time_horizon):
-        month_reduction = 0
-        active_techs = []
-        
-        # Check which technologies are active this month
-        for tech in selected_techs:
-            tech_id = tech["id"]
-            if month >= timeline[tech_id]["end_month"]:
-                month_reduction += simulation_input.baseline_emissions * tech["reduction_factor"] / 12
-                active_techs.append(tech["name"])
-        
-        # Calculate this month's emissions
-        month_emissions = monthly_emissions - month_reduction
-        if month_emissions < 0:
-            month_emissions = 0
-            
-        emission_trajectory.append({
-            "month": month,
-            "emissions": month_emissions,
-            "active_technologies": active_techs
-        })
+    emission_trajectory = EmissionTrajectory(
+        selected_techs,
+        timeline,
+        simulation_input.baseline_emissions,
+        simulation_input.time_horizon
+    ).output(simulation_input.trajectory_format)
     
     # Calculate ROI (simple version - reduction value / cost)
     # Assuming carbon price of $40 per ton
@@ -394,6 +399,24 @@ async def simulate_scenario(simulation_input: SimulationInput):
     else:
         roi = 0
     
+    # P10 / P50 / P90 outcomes of the same plan with uncertain reductions, timings and costs
+    uncertainty = None
+    if simulation_input.monte_carlo_runs:
+        try:
+            uncertainty = await inference_executor.run(
+                monte_carlo.simulate,
+                selected_techs,
+                simulation_input.baseline_emissions,
+                simulation_input.time_horizon,
+                simulation_input.monte_carlo_runs,
+                carbon_price,
+                simulation_input.monte_carlo_seed
+            )
+        except ExecutorBusyError as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     # Create the response
     result = {
         "scenario_id": f"scenario-{random.randint(1000, 9999)}",
@@ -406,7 +429,9 @@ async def simulate_scenario(simulation_input: SimulationInput):
         "roi": roi,
         "implementation_timeline": timeline,
         "technologies": selected_techs,
-        "emission_trajectory": emission_trajectory
+        "emission_trajectory": emission_trajectory,
+        "optimization": optimization,
+        "uncertainty": uncertainty
     }
     
     return result
@@ -420,24 +445,15 @@ async def recommend_technologies(
 ):
     """Recommend technologies based on industry and constraints"""
     
-    # Filter by industry applicability
-    applicable_techs = [
-        tech for tech in TECHNOLOGIES 
-        if industry_type in tech["applicability"]
-    ]
-    
-    # Apply additional filters if provided
-    if budget:
-        applicable_techs = [tech for tech in applicable_techs if tech["cost"] <= budget]
-    
-    if time_horizon:
-        applicable_techs = [tech for tech in applicable_techs if tech["implementation_time"] <= time_horizon]
-    
-    # Sort by effectiveness (reduction factor)
-    applicable_techs.sort(key=lambda t: t["reduction_factor"], reverse=True)
-    
-    # Return top 5 recommendations
-    return applicable_techs[:5]
+    # Top 5 of the industry's view sorted by reduction factor that fit the
+    # budget and time horizon (either is ignored when not given)
+    return catalog.top(
+        industry_type,
+        5,
+        ORDER_REDUCTION,
+        max_cost=budget or None,
+        max_implementation_time=time_horizon or None
+    )
 
 # Include the AI simulation router for advanced features
 # This will add the routes from simulation_api.py with the prefix /simulation
@@ -0,0 +1,78 @@
+"""
+Emission Trajectory
+Monthly emissions of an implementation plan from NumPy activation masks
+"""
+
+import numpy as np
+from typing import Any, Dict, List
+
+# Trajectory output formats
+TRAJECTORY_RECORDS = "records"  # one dict per month with the active technology names
+TRAJECTORY_ARRAYS = "arrays"    # emissions per month plus each technology's activation month
+
+
+class EmissionTrajectory:
+    """
+    Monthly emissions over a horizon, where a technology removes
+    baseline * reduction_factor / 12 per month once its implementation ends.
+
+    The active set only changes at the distinct end months, so reductions
+    are computed once per activation step: a (steps, technologies) mask of
+    the technologies active at each step, summed with a cumulative sum in
+    plan order (the order the per-month loop added them, so the floats are
+    identical). Months then look up their step with one searchsorted. The
+    cost is steps x technologies plus the months, instead of their product.
+    """
+
+    def __init__(self, technologies: List[Dict[str, Any]], timeline: Dict[str, Dict[str, Any]],
+                 baseline_emissions: float, time_horizon: int):
+        self.names = [tech["name"] for tech in technologies]
+        self.activation_months = np.array([timeline[tech["id"]]["end_month"] for tech in technologies], dtype=np.int64)
+        monthly_reductions = baseline_emissions * np.array([tech["reduction_factor"] for tech in technologies],
+                                                           dtype=float) / 12
+
+        self.steps = np.unique(self.activation_months)
+        active = self.activation_months[None, :] <= self.steps[:, None]
+        # Row sums as running sums in plan order; inactive technologies add an exact 0.0
+        step_reductions = np.cumsum(np.where(active, monthly_reductions, 0.0), axis=1)[:, -1] \
+            if len(technologies) else np.zeros(0)
+        self.active = active
+
+        months = np.arange(max(0, time_horizon))
+        # Activation steps reached by each month; 0 means nothing is active yet
+        self.month_steps = np.searchsorted(self.steps, months, side="right")
+        reductions = np.concatenate([[0.0], step_reductions])[self.month_steps]
+        self.emissions = np.maximum(baseline_emissions / 12 - reductions, 0.0)
+
+    def __len__(self):
+        return len(self.emissions)
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Per-month dicts: month, emissions and the names of the active technologies (shared per step)"""
+        step_names = [[]] + [
+            [name for name, on in zip(self.names, row) if on]
+            for row in self.active.tolist()
+        ]
+        return [
+            {"month": month, "emissions": emissions, "active_technologies": step_names[step]}
+            for month, (emissions, step) in enumerate(zip(self.emissions.tolist(), self.month_steps.tolist()))
+        ]
+
+    def arrays(self) -> Dict[str, Any]:
+        """
+        Compact form: emissions per month, and the technologies with the month
+        each becomes active (a technology is active in months >= its entry)
+        """
+        return {
+            "months": len(self.emissions),
+            "emissions": self.emissions.tolist(),
+            "technologies": self.names,
+            "activation_months": self.activation_months.tolist()
+        }
+
+    def output(self, trajectory_format: str = TRAJECTORY_RECORDS):
+        if trajectory_format == TRAJECTORY_ARRAYS:
+            return self.arrays()
+        if trajectory_format == TRAJECTORY_RECORDS:
+            return self.records()
+        raise ValueError(f"Unknown trajectory format '{trajectory_format}'")
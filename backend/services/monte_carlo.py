@@ -0,0 +1,208 @@
+"""
+Monte Carlo
+Vectorized uncertainty runs of a simulation plan, sampled from the technology_data.json ranges
+"""
+
+import os
+import json
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+TECHNOLOGY_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulation", "technology_data.json"
+)
+
+PERCENTILES = [10, 50, 90]
+
+# Runs per random stream and per pool task; results do not depend on the number of workers
+BLOCK_RUNS = 4096
+
+# Sampled parameters, in the row order of the relative ranges
+PARAMETERS = ["reduction_factor", "implementation_time", "cost"]
+
+# Largest sampled reduction factor; a technology cannot remove more than all emissions
+MAX_REDUCTION_FACTOR = 0.999
+
+# Catalog categories whose closest technology_data.json category has another name
+CATEGORY_ALIASES = {
+    "Carbon Capture": "Emission Capture",
+    "Process Emissions": "Emission Capture",
+    "Carbon Sinks": "Nature-Based Solutions",
+    "Smart Systems": "Digitalization",
+    "Transportation": "Electrification"
+}
+
+
+def _relative_range(values: Dict[str, float]) -> List[float]:
+    """min and max over the midpoint of a recorded range"""
+    low, high = sorted((abs(values["min"]), abs(values["max"])))
+    middle = (low + high) / 2
+    return [low / middle, high / middle] if middle else [1.0, 1.0]
+
+
+def plan_parameters(technologies: List[Dict[str, Any]]) -> np.ndarray:
+    """(parameters, technologies): the catalog point values"""
+    return np.array([[tech[parameter] for tech in technologies] for parameter in PARAMETERS],
+                    dtype=float).reshape(len(PARAMETERS), len(technologies))
+
+
+class UncertaintyRanges:
+    """
+    Relative spreads (low / midpoint, high / midpoint) of reduction,
+    implementation time and capital cost per category. technology_data.json
+    records ranges in per-technology units (USD/kW, tCO2e/MW/year, ...)
+    for a different set of entries than the simulation catalog, so only
+    the relative width carries over: a catalog value v is sampled in
+    [v * low, v * high]. Categories missing from the file use the
+    average over all of its entries.
+    """
+
+    def __init__(self, path: str = TECHNOLOGY_DATA_PATH):
+        ranges: Dict[str, List[List[List[float]]]] = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for tech in json.load(f).get("technologies", []):
+                    ranges.setdefault(tech["category"], []).append([
+                        _relative_range(tech["emissionReductionPotential"]),
+                        _relative_range(tech["implementationTime"]),
+                        _relative_range(tech["cost"]["capital"])
+                    ])
+        everything = [entry for entries in ranges.values() for entry in entries]
+        # (parameters, [low, high]); a point estimate when the file is missing
+        self.default = np.mean(everything, axis=0) if everything else np.ones((len(PARAMETERS), 2))
+        self.by_category = {category: np.mean(entries, axis=0) for category, entries in ranges.items()}
+
+    def relative(self, category: str) -> np.ndarray:
+        return self.by_category.get(CATEGORY_ALIASES.get(category, category), self.default)
+
+    def bounds(self, technologies: List[Dict[str, Any]]) -> np.ndarray:
+        """(2, parameters, technologies): low and high absolute bounds around each point value"""
+        points = plan_parameters(technologies)
+        relative = np.array([self.relative(tech["category"]) for tech in technologies]).reshape(
+            len(technologies), len(PARAMETERS), 2)
+        return np.stack([points * relative[:, :, 0].T, points * relative[:, :, 1].T])
+
+
+def _simulate_block(points: np.ndarray, bounds: np.ndarray, baseline_emissions: float, time_horizon: int,
+                    carbon_price: float, seed: np.random.SeedSequence, runs: int) -> Dict[str, np.ndarray]:
+    """
+    One block of runs. Every parameter is drawn from a triangular
+    distribution peaking at the catalog value; the plan is then evaluated
+    for all runs at once, technology by technology as in /simulate.
+    """
+    rng = np.random.default_rng(seed)
+    n_techs = points.shape[1]
+    # triangular() needs left <= mode < right, also for zero-width ranges and negative values
+    left = np.minimum(bounds.min(axis=0), points)
+    right = np.maximum(bounds.max(axis=0), np.nextafter(points, np.inf))
+    samples = rng.triangular(left, points, right, size=(runs,) + points.shape)
+    reduction_factors = np.clip(samples[:, 0], 0, MAX_REDUCTION_FACTOR)
+    implementation_times = np.maximum(np.rint(samples[:, 1]), 0).astype(np.int64)
+    costs = samples[:, 2]
+
+    # Timeline and diminishing returns, vectorized over runs
+    end_months = np.empty((runs, n_techs), dtype=np.int64)
+    current_month = np.zeros(runs, dtype=np.int64)
+    reduction = np.zeros(runs)
+    for i in range(n_techs):
+        end_months[:, i] = current_month + implementation_times[:, i]
+        current_month = np.maximum(current_month + 2, end_months[:, i] - 4)
+        tech_reduction = baseline_emissions * reduction_factors[:, i]
+        reduction += tech_reduction if i == 0 else tech_reduction * (1 - reduction / baseline_emissions)
+    total_cost = costs.sum(axis=1)
+
+    reduction_value = reduction * carbon_price * (time_horizon / 12)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        roi = np.where(total_cost > 0, (reduction_value - total_cost) / total_cost, 0.0)
+
+    # Monthly reductions start at each end month: scatter them, then a running sum per run
+    months = max(0, time_horizon)
+    slots = np.arange(runs)[:, None] * (months + 1) + np.minimum(end_months, months)
+    monthly = np.bincount(slots.ravel(), (baseline_emissions * reduction_factors / 12).ravel(),
+                          minlength=runs * (months + 1)).reshape(runs, months + 1)
+    emissions = np.maximum(baseline_emissions / 12 - np.cumsum(monthly[:, :months], axis=1), 0.0)
+
+    return {
+        "achieved_reduction": reduction / baseline_emissions * 100,
+        "total_cost": total_cost,
+        "roi": roi,
+        "emissions": emissions
+    }
+
+
+def _simulate_task(args) -> Dict[str, np.ndarray]:
+    return _simulate_block(*args)
+
+
+class MonteCarloSimulator:
+    """
+    Samples thousands of outcomes of a fixed plan (technologies in
+    implementation order) and reports percentiles of achieved reduction,
+    cost, ROI and the monthly emission trajectory. Runs are split into
+    blocks with their own random streams; blocks run in this process or,
+    for large requests with max_workers set, on a process pool.
+    """
+
+    def __init__(self, ranges: UncertaintyRanges, max_workers: int = 0, pool_min_runs: int = 50000,
+                 max_runs: int = 100000, max_trajectory_cells: int = 20_000_000):
+        self.ranges = ranges
+        self.max_workers = max_workers
+        self.pool_min_runs = pool_min_runs
+        self.max_runs = max_runs
+        self.max_trajectory_cells = max_trajectory_cells
+        self._pool = None
+
+    def _processes(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def simulate(self, technologies: List[Dict[str, Any]], baseline_emissions: float, time_horizon: int,
+                 runs: int, carbon_price: float, seed: Optional[int] = None) -> Dict[str, Any]:
+        if not baseline_emissions > 0:
+            raise ValueError("Monte Carlo runs need positive baseline emissions")
+        if not 0 < runs <= self.max_runs:
+            raise ValueError(f"Monte Carlo runs must be between 1 and {self.max_runs}")
+        if runs * max(1, time_horizon) > self.max_trajectory_cells:
+            # Every run's trajectory is kept until the monthly percentiles are taken
+            raise ValueError(f"Monte Carlo runs x months must be at most {self.max_trajectory_cells}")
+        sequence = np.random.SeedSequence(seed)
+        points = plan_parameters(technologies)
+        bounds = self.ranges.bounds(technologies)
+
+        block_runs = [min(BLOCK_RUNS, runs - start) for start in range(0, runs, BLOCK_RUNS)]
+        tasks = [(points, bounds, baseline_emissions, time_horizon, carbon_price, block_seed, n)
+                 for block_seed, n in zip(sequence.spawn(len(block_runs)), block_runs)]
+        if self.max_workers and runs >= self.pool_min_runs and len(tasks) > 1:
+            blocks = list(self._processes().map(_simulate_task, tasks))
+        else:
+            blocks = [_simulate_task(task) for task in tasks]
+
+        def percentiles(key: str) -> Dict[str, Any]:
+            values = np.concatenate([block[key] for block in blocks])
+            result = np.percentile(values, PERCENTILES, axis=0)
+            return {f"p{p}": row.tolist() if np.ndim(row) else float(row) for p, row in zip(PERCENTILES, result)}
+
+        return {
+            "runs": runs,
+            "seed": sequence.entropy,
+            "percentiles": PERCENTILES,
+            "achieved_reduction": percentiles("achieved_reduction"),
+            "total_cost": percentiles("total_cost"),
+            "roi": percentiles("roi"),
+            "emission_trajectory": percentiles("emissions")
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+
+
+# Create singleton instance
+monte_carlo = MonteCarloSimulator(
+    UncertaintyRanges(),
+    max_workers=int(os.environ.get("CARBON_MONTE_CARLO_WORKERS", "0")),
+    pool_min_runs=int(os.environ.get("CARBON_MONTE_CARLO_POOL_MIN_RUNS", "50000"))
+)
@@ -0,0 +1,296 @@
+"""
+Portfolio Optimizer
+Exact budget-constrained technology selection by branch-and-bound with knapsack DP bounds
+"""
+
+import os
+import math
+import time
+import numpy as np
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+# Solution statuses
+STATUS_OPTIMAL = "optimal"
+STATUS_TIMEOUT = "timeout"  # best selection found in time, never worse than the greedy one
+
+# A reduction factor of 1 would make the additive value infinite
+MAX_REDUCTION_FACTOR = 1 - 1e-12
+
+# Relative tolerance when comparing summed values
+VALUE_EPSILON = 1e-9
+
+
+def reduction_value(reduction_factor: float) -> float:
+    """-log(1 - r): combined reductions 1 - prod(1 - r) become sums of these"""
+    return -math.log1p(-min(reduction_factor, MAX_REDUCTION_FACTOR))
+
+
+def combined_reduction(value: float) -> float:
+    """Fraction of emissions removed by a selection with the given summed value"""
+    return -math.expm1(-value)
+
+
+class PortfolioSolution:
+    """Selected positions (ascending, into the candidate list) and how the search ended"""
+
+    def __init__(self, positions: List[int], status: str, reduction: float, cost: float,
+                 nodes: int, elapsed_ms: float):
+        self.positions = positions
+        self.status = status
+        self.reduction = reduction
+        self.cost = cost
+        self.nodes = nodes
+        self.elapsed_ms = elapsed_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "nodes": self.nodes,
+            "elapsed_ms": round(self.elapsed_ms, 3)
+        }
+
+
+class PortfolioOptimizer:
+    """
+    Chooses the technologies that reach the target reduction at the lowest
+    cost within the budget or, when the target is out of reach, that give
+    the largest combined reduction (the cheaper one on ties). Reductions
+    combine multiplicatively, which is what the greedy diminishing-returns
+    correction computes, so in log space the problem is a 0/1 knapsack.
+
+    Branch-and-bound runs depth first over the candidates in value density
+    order. A node is pruned by the smaller of two upper bounds: the
+    fractional (LP) knapsack bound, and a DP table of the best value per
+    remaining budget with costs rounded down to a grid. The incumbent is
+    seeded with the greedy selection and with a DP solution on costs
+    rounded up, so the search mostly proves optimality. Past the time
+    limit it stops and returns the best selection found.
+    """
+
+    def __init__(self, time_limit_ms: float = 200, grid_size: int = 4096, max_table_cells: int = 4_000_000):
+        self.time_limit_ms = time_limit_ms
+        self.grid_size = grid_size
+        self.max_table_cells = max_table_cells
+
+    def greedy(self, technologies: List[Dict[str, Any]], target: float, budget: Optional[float]) -> List[int]:
+        """Positions the greedy pass of /simulate picks: in order, while under target and within budget"""
+        target_value = self._target_value(target)
+        remaining = float("inf") if budget is None else budget
+        value = 0.0
+        positions = []
+        for position, tech in enumerate(technologies):
+            if value >= target_value or tech["cost"] > remaining:
+                continue
+            positions.append(position)
+            value += reduction_value(tech["reduction_factor"])
+            remaining -= tech["cost"]
+        return positions
+
+    def optimize(self, technologies: List[Dict[str, Any]], target: float, budget: Optional[float],
+                 time_limit_ms: Optional[float] = None) -> PortfolioSolution:
+        """Best selection for a target reduction fraction and budget (None for unlimited)"""
+        started = time.perf_counter()
+        deadline = started + (self.time_limit_ms if time_limit_ms is None else time_limit_ms) / 1000
+        target_value = self._target_value(target)
+        values = [reduction_value(tech["reduction_factor"]) for tech in technologies]
+        costs = [float(tech["cost"]) for tech in technologies]
+
+        # Free technologies are always worth taking; ones that cannot help or do not fit are never picked
+        base = [i for i in range(len(technologies)) if costs[i] <= 0 and values[i] > 0]
+        items = [i for i in range(len(technologies))
+                 if costs[i] > 0 and values[i] > 0 and (budget is None or costs[i] <= budget)]
+        greedy = self.greedy(technologies, target, budget)
+        if budget is None:
+            budget = sum(costs[i] for i in items)
+        items.sort(key=lambda i: values[i] / costs[i], reverse=True)
+        search = _BranchAndBound(
+            [values[i] for i in items], [costs[i] for i in items], budget, target_value,
+            sum(values[i] for i in base), self._grid(len(items), budget)
+        )
+
+        # Seed the incumbent so a timeout never returns less than the greedy selection
+        rank = {item: k for k, item in enumerate(items)}
+        search.offer([rank[i] for i in greedy if i in rank])
+        search.offer(search.rounded_up_selection())
+
+        finished = search.run(deadline)
+        positions = sorted(base + [items[k] for k in search.best])
+        return PortfolioSolution(
+            positions,
+            STATUS_OPTIMAL if finished else STATUS_TIMEOUT,
+            combined_reduction(search.base_value + sum(search.values[k] for k in search.best)),
+            search.best_cost,
+            search.nodes,
+            (time.perf_counter() - started) * 1000
+        )
+
+    @staticmethod
+    def _target_value(target: float) -> float:
+        return float("inf") if target >= 1 else reduction_value(max(target, 0.0))
+
+    def _grid(self, n_items: int, budget: float) -> int:
+        """Budget steps of the DP tables, fewer for long candidate lists to bound their size"""
+        if budget <= 0:
+            return 0
+        return max(1, min(self.grid_size, self.max_table_cells // (n_items + 1)))
+
+
+class _BranchAndBound:
+    """Search state over candidates already sorted by value density"""
+
+    def __init__(self, values: List[float], costs: List[float], budget: float, target_value: float,
+                 base_value: float, grid: int):
+        self.values = values
+        self.costs = costs
+        self.budget = budget
+        self.target_value = target_value
+        self.base_value = base_value
+        self.n = len(values)
+        self.epsilon = VALUE_EPSILON * max(1.0, min(target_value, base_value + sum(values)))
+        self.cost_epsilon = VALUE_EPSILON * max(1.0, budget)
+        self.nodes = 0
+
+        self.cost_prefix = [0.0]
+        self.value_prefix = [0.0]
+        for value, cost in zip(values, costs):
+            self.cost_prefix.append(self.cost_prefix[-1] + cost)
+            self.value_prefix.append(self.value_prefix[-1] + value)
+
+        self.grid = grid
+        self.unit = budget / grid if grid else 0.0
+        self.bound_table = self._rounded_down_table() if grid else None
+
+        # Empty selection until offer() is given something better
+        self.best: List[int] = []
+        self.best_value = min(base_value, target_value)
+        self.best_cost = 0.0
+
+    def _rounded_down_table(self) -> np.ndarray:
+        """
+        table[k, b]: best value from candidates k.. with costs rounded down to
+        whole grid steps and b steps of budget. Rounding down only loosens
+        the budget, so this is an upper bound for the exact problem.
+        """
+        table = np.zeros((self.n + 1, self.grid + 1))
+        for k in range(self.n - 1, -1, -1):
+            steps = max(0, math.floor(self.costs[k] / self.unit - 1e-9))
+            table[k] = table[k + 1]
+            if steps <= self.grid:
+                np.maximum(table[k + 1, steps:], table[k + 1, :self.grid + 1 - steps] + self.values[k],
+                           out=table[k, steps:])
+        return table
+
+    def rounded_up_selection(self) -> List[int]:
+        """
+        Knapsack DP with costs rounded up to grid steps, so every selection
+        it considers fits the budget: the cheapest grid budget that reaches
+        the target, or the best value in the whole budget.
+        """
+        if not self.grid or not self.n:
+            return []
+        best = np.zeros(self.grid + 1)
+        taken = np.zeros((self.n, self.grid + 1), dtype=bool)
+        for k in range(self.n):
+            steps = math.ceil(self.costs[k] / self.unit)
+            if steps > self.grid:
+                continue
+            candidate = best[:self.grid + 1 - steps] + self.values[k]
+            taken[k, steps:] = candidate > best[steps:]
+            np.maximum(best[steps:], candidate, out=best[steps:])
+        needed = self.target_value - self.base_value
+        reached = np.flatnonzero(best >= needed - self.epsilon)
+        capacity = int(reached[0]) if len(reached) else self.grid
+
+        selection = []
+        for k in range(self.n - 1, -1, -1):
+            if taken[k, capacity]:
+                selection.append(k)
+                capacity -= math.ceil(self.costs[k] / self.unit)
+        return selection[::-1]
+
+    def offer(self, selection: List[int]):
+        """Make a candidate selection the incumbent if it fits and is better"""
+        cost = sum(self.costs[k] for k in selection)
+        if cost <= self.budget + self.cost_epsilon and self._improve(
+                self.base_value + sum(self.values[k] for k in selection), cost):
+            self.best = list(selection)
+
+    def _improve(self, value: float, cost: float) -> bool:
+        """Record value and cost as the incumbent's if they beat it; the caller sets the selection"""
+        value = min(value, self.target_value)
+        if value > self.best_value + self.epsilon or (
+                value >= self.best_value - self.epsilon and cost < self.best_cost - self.cost_epsilon):
+            self.best_value = value
+            self.best_cost = cost
+            return True
+        return False
+
+    def _lp_bound(self, k: int, remaining: float) -> float:
+        """Fractional knapsack value of candidates k.. in remaining budget"""
+        limit = self.cost_prefix[k] + remaining
+        j = bisect_right(self.cost_prefix, limit + self.cost_epsilon) - 1
+        bound = self.value_prefix[j] - self.value_prefix[k]
+        if j < self.n:
+            bound += (limit - self.cost_prefix[j]) * self.values[j] / self.costs[j]
+        return bound
+
+    def _cover_bound(self, k: int, needed: float) -> float:
+        """Least fractional cost of getting `needed` more value from candidates k.."""
+        if needed <= 0:
+            return 0.0
+        goal = self.value_prefix[k] + needed
+        if goal > self.value_prefix[self.n] + self.epsilon:
+            return float("inf")
+        j = min(self.n, bisect_left(self.value_prefix, goal))
+        return (self.cost_prefix[j - 1] - self.cost_prefix[k]
+                + max(0.0, goal - self.value_prefix[j - 1]) * self.costs[j - 1] / self.values[j - 1])
+
+    def run(self, deadline: float) -> bool:
+        """Depth-first search; False if the deadline cut it short"""
+        if time.perf_counter() > deadline:
+            return False
+        # Nodes: (next candidate, cost, value, chosen candidates as a linked list)
+        stack = [(0, 0.0, self.base_value, None)]
+        while stack:
+            self.nodes += 1
+            if not self.nodes & 1023 and time.perf_counter() > deadline:
+                return False
+            k, cost, value, chosen = stack.pop()
+            if self._improve(value, cost):
+                self.best = _unlink(chosen)
+            if k == self.n or value >= self.target_value - self.epsilon:
+                continue
+
+            remaining = self.budget - cost
+            bound = self._lp_bound(k, remaining)
+            if self.bound_table is not None:
+                bound = min(bound, self.bound_table[k, min(self.grid, int(remaining / self.unit + 1e-9))])
+            bound = min(value + bound, self.target_value)
+            if bound < self.best_value - self.epsilon:
+                continue
+            if bound <= self.best_value + self.epsilon and (
+                    cost + self._cover_bound(k, self.best_value - self.epsilon - value)
+                    >= self.best_cost - self.cost_epsilon):
+                continue
+
+            stack.append((k + 1, cost, value, chosen))
+            if self.costs[k] <= remaining + self.cost_epsilon:
+                # Pushed last, so taking the denser candidate is explored first
+                stack.append((k + 1, cost + self.costs[k], value + self.values[k], (k, chosen)))
+        return True
+
+
+def _unlink(chosen) -> List[int]:
+    selection = []
+    while chosen is not None:
+        k, chosen = chosen
+        selection.append(k)
+    return selection[::-1]
+
+
+# Create singleton instance
+portfolio_optimizer = PortfolioOptimizer(
+    time_limit_ms=float(os.environ.get("CARBON_OPTIMIZER_TIME_LIMIT_MS", "200")),
+    grid_size=int(os.environ.get("CARBON_OPTIMIZER_GRID", "4096"))
+)
@@ -0,0 +1,145 @@
+"""
+Technology Catalog
+In-memory technology catalog with id, category and applicability indexes built once at load time
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from .text_search import TextSearchIndex
+
+# Orderings precomputed per applicability
+ORDER_CATALOG = "catalog"
+ORDER_EFFECTIVENESS = "effectiveness"  # reduction_factor / cost, best first
+ORDER_REDUCTION = "reduction"          # reduction_factor, best first
+
+
+def effectiveness(tech: Dict[str, Any]) -> float:
+    """Reduction per unit cost; a free technology ranks first"""
+    return tech["reduction_factor"] / tech["cost"] if tech["cost"] else float("inf")
+
+
+class _PositionIndex:
+    """Catalog positions per key, ascending, with a set for membership tests"""
+
+    def __init__(self):
+        self.positions: Dict[str, List[int]] = {}
+        self.members: Dict[str, frozenset] = {}
+
+    def add(self, key: str, position: int):
+        self.positions.setdefault(key, []).append(position)
+
+    def freeze(self):
+        self.members = {key: frozenset(positions) for key, positions in self.positions.items()}
+
+
+class TechnologyCatalog:
+    """
+    Technologies with a hash index by id, inverted indexes by category and
+    applicability, and per-applicability views sorted by effectiveness and
+    by reduction factor. Filters intersect index entries starting from the
+    smallest, so their cost follows the size of the matches rather than of
+    the catalog. Results keep catalog order unless a sorted view is asked
+    for; sorted views are stable, as the list sorts they replace. Text
+    search goes through a TextSearchIndex over names and descriptions.
+    """
+
+    def __init__(self, technologies: Iterable[Dict[str, Any]]):
+        self.technologies = list(technologies)
+        self.by_id: Dict[str, int] = {}
+        self.by_category = _PositionIndex()
+        self.by_applicability = _PositionIndex()
+
+        for position, tech in enumerate(self.technologies):
+            # The first entry wins for a repeated id, like a scan would
+            self.by_id.setdefault(tech["id"], position)
+            self.by_category.add(tech["category"], position)
+            for industry in dict.fromkeys(tech["applicability"]):
+                self.by_applicability.add(industry, position)
+        self.by_category.freeze()
+        self.by_applicability.freeze()
+
+        self.categories = list(self.by_category.positions)
+        self.text_index = TextSearchIndex(
+            [tech["name"] for tech in self.technologies],
+            [tech["description"] for tech in self.technologies]
+        )
+        self._effectiveness = [effectiveness(tech) for tech in self.technologies]
+        self._sort_keys = {
+            ORDER_EFFECTIVENESS: self._effectiveness,
+            ORDER_REDUCTION: [tech["reduction_factor"] for tech in self.technologies]
+        }
+        self._applicability_views = {
+            order: {
+                industry: sorted(positions, key=keys.__getitem__, reverse=True)
+                for industry, positions in self.by_applicability.positions.items()
+            }
+            for order, keys in self._sort_keys.items()
+        }
+
+    def __len__(self):
+        return len(self.technologies)
+
+    def get(self, technology_id: str) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(technology_id)
+        return None if position is None else self.technologies[position]
+
+    def lookup(self, technology_ids: List[str]) -> List[Dict[str, Any]]:
+        """Technologies for the ids in the given order; unknown ids are skipped, repeats kept"""
+        return [self.technologies[self.by_id[tid]] for tid in technology_ids if tid in self.by_id]
+
+    def filter_positions(self, category: Optional[str] = None, applicability: Optional[str] = None) -> List[int]:
+        """Ascending catalog positions matching every given filter"""
+        constraints = []
+        if category:
+            constraints.append((self.by_category.positions.get(category, []), self.by_category.members.get(category, frozenset())))
+        if applicability:
+            constraints.append((self.by_applicability.positions.get(applicability, []),
+                                self.by_applicability.members.get(applicability, frozenset())))
+        if not constraints:
+            return list(range(len(self.technologies)))
+        constraints.sort(key=lambda constraint: len(constraint[0]))
+        positions = constraints[0][0]
+        for _, members in constraints[1:]:
+            positions = [position for position in positions if position in members]
+        return positions
+
+    def filter(self, category: Optional[str] = None, applicability: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [self.technologies[position] for position in self.filter_positions(category, applicability)]
+
+    def search(self, query: str, category: Optional[str] = None, applicability: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ranked technologies whose name or description contains query, within the filters"""
+        members = []
+        if category:
+            members.append(self.by_category.members.get(category, frozenset()))
+        if applicability:
+            members.append(self.by_applicability.members.get(applicability, frozenset()))
+        accept = (lambda position: all(position in m for m in members)) if members else None
+        return [self.technologies[position] for position in self.text_index.search(query, limit, accept)]
+
+    def applicable(self, industry: str, order: str = ORDER_CATALOG) -> List[Dict[str, Any]]:
+        """Technologies applicable to an industry, in catalog order or a precomputed sorted view"""
+        if order == ORDER_CATALOG:
+            positions = self.by_applicability.positions.get(industry, [])
+        else:
+            positions = self._applicability_views[order].get(industry, [])
+        return [self.technologies[position] for position in positions]
+
+    def rank_by_effectiveness(self, technologies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Stable sort of arbitrary catalog entries, best effectiveness first"""
+        return sorted(technologies, key=effectiveness, reverse=True)
+
+    def top(self, industry: str, limit: int, order: str = ORDER_REDUCTION,
+            max_cost: Optional[float] = None, max_implementation_time: Optional[int] = None) -> List[Dict[str, Any]]:
+        """The first `limit` applicable technologies of a sorted view that satisfy the constraints"""
+        result = []
+        for position in self._applicability_views[order].get(industry, []):
+            tech = self.technologies[position]
+            if max_cost is not None and tech["cost"] > max_cost:
+                continue
+            if max_implementation_time is not None and tech["implementation_time"] > max_implementation_time:
+                continue
+            result.append(tech)
+            if len(result) == limit:
+                break
+        return result
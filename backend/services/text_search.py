@@ -0,0 +1,127 @@
+"""
+Text Search
+Token prefix and trigram inverted indexes for ranked substring search over names and descriptions
+"""
+
+import re
+import heapq
+import numpy as np
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional
+
+TOKEN_PATTERN = re.compile(r"\w+")
+FIELD_SEPARATOR = "\x00"
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _TokenIndex:
+    """Sorted vocabulary and ascending positions per token, for prefix lookups"""
+
+    def __init__(self, texts: List[str]):
+        postings: Dict[str, List[int]] = {}
+        for position, text in enumerate(texts):
+            for token in set(TOKEN_PATTERN.findall(text)):
+                postings.setdefault(token, []).append(position)
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def prefix_positions(self, prefix: str) -> Iterator[int]:
+        """Ascending positions with a token starting with prefix (may repeat; callers dedupe)"""
+        lists = []
+        for i in range(bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            token = self.vocabulary[i]
+            if not token.startswith(prefix):
+                break
+            lists.append(self.postings[token])
+        return iter(lists[0]) if len(lists) == 1 else heapq.merge(*lists)
+
+
+class TextSearchIndex:
+    """
+    Case-insensitive substring search over (name, description) pairs,
+    matching exactly what `query in name.lower() or query in
+    description.lower()` matches. Results are ranked:
+
+    1. a word in the name starts with the query
+    2. a word in the description starts with the query
+    3. the query occurs anywhere else
+
+    each in catalog order. The first two tiers come from token prefix
+    indexes; the last from intersecting the query's trigram postings and
+    checking the few candidates. With a limit, tiers are merged lazily and
+    the search stops once enough matches are found.
+    """
+
+    def __init__(self, names: List[str], descriptions: List[str]):
+        self.names = [name.lower() for name in names]
+        self.descriptions = [description.lower() for description in descriptions]
+        self.name_tokens = _TokenIndex(self.names)
+        self.description_tokens = _TokenIndex(self.descriptions)
+
+        postings: Dict[str, List[int]] = {}
+        for position, (name, description) in enumerate(zip(self.names, self.descriptions)):
+            for gram in _trigrams(name + FIELD_SEPARATOR + description):
+                postings.setdefault(gram, []).append(position)
+        self.trigrams = {gram: np.array(positions, dtype=np.int64) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _contains(self, query: str, position: int) -> bool:
+        return query in self.names[position] or query in self.descriptions[position]
+
+    def _substring_candidates(self, query: str, intersect: bool = True) -> Iterator[int]:
+        """
+        Ascending positions that may contain query; every true match is
+        included. A generator, so nothing is looked up unless the earlier
+        tiers leave room under the limit. Without intersect, the rarest
+        trigram's postings are streamed as they are, which is cheaper when
+        the caller checks candidates and stops after a few matches.
+        """
+        if len(query) < 3 or FIELD_SEPARATOR in query:
+            yield from range(len(self.names))
+            return
+        grams = sorted((self.trigrams.get(gram) for gram in _trigrams(query)),
+                       key=lambda positions: -1 if positions is None else len(positions))
+        if grams[0] is None:
+            return
+        if not intersect:
+            yield from grams[0].tolist()
+            return
+        candidates = grams[0]
+        for positions in grams[1:]:
+            # Probe the larger posting list for each remaining candidate
+            found = np.searchsorted(positions, candidates)
+            found[found == len(positions)] = 0
+            candidates = candidates[positions[found] == candidates]
+            if not len(candidates):
+                return
+        yield from candidates.tolist()
+
+    def search(self, query: str, limit: Optional[int] = None,
+               accept: Optional[Callable[[int], bool]] = None) -> List[int]:
+        """Ranked positions of the entries containing query, optionally filtered by accept"""
+        query = query.lower()
+        # (positions, whether they still need checking)
+        tiers = []
+        if TOKEN_PATTERN.fullmatch(query):
+            tiers.append((self.name_tokens.prefix_positions(query), False))
+            tiers.append((self.description_tokens.prefix_positions(query), False))
+        tiers.append((self._substring_candidates(query, intersect=limit is None), True))
+
+        result = []
+        seen = set()
+        for positions, verify in tiers:
+            for position in positions:
+                if position in seen or (verify and not self._contains(query, position)):
+                    continue
+                seen.add(position)
+                if accept is not None and not accept(position):
+                    continue
+                result.append(position)
+                if limit is not None and len(result) >= limit:
+                    return result
+        return result
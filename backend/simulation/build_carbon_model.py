@@ -0,0 +1,155 @@
+"""
+Carbon Model Build
+Offline training of the carbon quantification model into versioned artifacts
+
+Usage (from the backend directory):
+    python -m simulation.build_carbon_model [--n-samples 1000] [--n-estimators 100] [--no-distill]
+"""
+
+import json
+import argparse
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+import sklearn
+from datetime import datetime, timezone
+from sklearn.multioutput import MultiOutputRegressor
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from .carbon_quantification_model import factor_sets
+from .forest_compiler import CompiledForest
+from .model_artifacts import ARTIFACT_DIR, save_artifacts, load_metadata
+from .model_distillation import distill, distillation_report
+
+# Seeds of the extra synthetic sets used for distillation and its holdout report
+DISTILL_SEED = 7
+HOLDOUT_SEED = 1234
+
+
+def generate_synthetic_data(n_samples: int, emission_factors=None, seed: int = 42):
+    """Generate synthetic data for model training from the given (default: active) emission factors"""
+    EMISSION_FACTORS = emission_factors or factor_sets.current.factors
+    # A local generator: reseeding the global one would race with anything else drawing from it
+    # (RandomState gives the same draws the global seed did, so earlier builds reproduce)
+    rng = np.random.RandomState(seed)
+
+    # Generate random input values
+    X = pd.DataFrame({
+        'Energy Usage (MWh)': rng.uniform(1, 1000, n_samples),
+        'Fuel Consumption (L)': rng.uniform(1, 10000, n_samples),
+        'Industrial Output (tons)': rng.uniform(1, 1000, n_samples),
+        'Waste Generated (tons)': rng.uniform(1, 5000, n_samples),
+        'Transport Distance (km)': rng.uniform(1, 10000, n_samples)
+    })
+
+    # Calculate outputs using emission factors with some noise
+    emissions = (
+        X['Energy Usage (MWh)'] * EMISSION_FACTORS['Energy Usage (MWh)'] +
+        X['Fuel Consumption (L)'] * EMISSION_FACTORS['Fuel Consumption (L)'] +
+        X['Industrial Output (tons)'] * EMISSION_FACTORS['Industrial Output (tons)'] +
+        X['Waste Generated (tons)'] * EMISSION_FACTORS['Waste Generated (tons)'] +
+        X['Transport Distance (km)'] * EMISSION_FACTORS['Transport Distance (km)']
+    )
+
+    # Add some noise
+    emissions = emissions * rng.normal(1, 0.1, n_samples)
+
+    # Carbon credits are typically 1:1 with emissions (in tons)
+    carbon_credits = emissions / 1000  # Convert kg to tons
+
+    # Create output DataFrame
+    y = pd.DataFrame({
+        'Total Emissions (kg CO₂)': emissions,
+        'Carbon Credits Required': carbon_credits
+    })
+
+    return X, y
+
+
+def feature_ranges(X: pd.DataFrame) -> Dict[str, list]:
+    """[min, max] of every training feature, used to flag extrapolation at serving time"""
+    return {column: [float(X[column].min()), float(X[column].max())] for column in X.columns}
+
+
+def train_model(X: pd.DataFrame, y: pd.DataFrame, n_estimators: int = 100):
+    """Fit the scaler and the multi-output forest, returning (model, scaler)"""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    model = MultiOutputRegressor(RandomForestRegressor(n_estimators=n_estimators, random_state=42))
+    model.fit(X_scaled, y)
+
+    return model, scaler
+
+
+def build(n_samples: int = 1000, n_estimators: int = 100,
+          artifact_dir: str = ARTIFACT_DIR, version: str = None,
+          distill_samples: int = 20000, holdout_samples: int = 2000) -> str:
+    """
+    Train on synthetic data and save a new artifact version. Unless
+    distill_samples is 0, a compact surrogate is distilled from the forest
+    and its report is stored in the metadata.
+    """
+    factor_set = factor_sets.current
+    X, y = generate_synthetic_data(n_samples, factor_set.factors)
+    model, scaler = train_model(X, y, n_estimators)
+    return save_build(
+        model, scaler, factor_set,
+        {"n_samples": n_samples, "n_estimators": n_estimators, "feature_ranges": feature_ranges(X)},
+        artifact_dir=artifact_dir, version=version,
+        distill_samples=distill_samples, holdout_samples=holdout_samples
+    )
+
+
+def save_build(model, scaler, factor_set, metadata: Dict[str, Any],
+               artifact_dir: str = ARTIFACT_DIR, version: str = None,
+               distill_samples: int = 20000, holdout_samples: int = 2000,
+               make_latest: bool = True) -> str:
+    """Distill, describe and save a trained model and scaler as a new artifact version"""
+    features = list(scaler.feature_names_in_)
+    compact, report = None, None
+    if distill_samples:
+        # The surrogate learns the forest's outputs on a denser sample; the holdout keeps its noisy ground truth
+        X_distill, _ = generate_synthetic_data(distill_samples, factor_set.factors, seed=DISTILL_SEED)
+        X_holdout, y_holdout = generate_synthetic_data(holdout_samples, factor_set.factors, seed=HOLDOUT_SEED)
+        compact = distill(model, scaler, X_distill, features)
+        report = distillation_report(model, compact, scaler, X_holdout, y_holdout.values)
+
+    metadata = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **metadata,
+        "features": features,
+        "emission_factors": dict(factor_set.factors),
+        "emission_factors_version": factor_set.version,
+        "sklearn_version": sklearn.__version__,
+        "distillation": report
+    }
+    return save_artifacts(
+        model, scaler, metadata, artifact_dir=artifact_dir, version=version, make_latest=make_latest,
+        compiled=CompiledForest.from_multioutput(model), compact=compact
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build versioned carbon quantification model artifacts")
+    parser.add_argument("--n-samples", type=int, default=1000, help="Synthetic training rows")
+    parser.add_argument("--n-estimators", type=int, default=100, help="Trees per output forest")
+    parser.add_argument("--output-dir", default=ARTIFACT_DIR, help="Artifact directory")
+    parser.add_argument("--version", default=None, help="Version name (defaults to a UTC timestamp)")
+    parser.add_argument("--distill-samples", type=int, default=20000, help="Rows labelled by the forest for the compact model")
+    parser.add_argument("--no-distill", action="store_true", help="Skip building the compact model")
+    args = parser.parse_args()
+
+    version = build(args.n_samples, args.n_estimators, args.output_dir, args.version,
+                    distill_samples=0 if args.no_distill else args.distill_samples)
+    print(f"Built carbon model version {version} in {args.output_dir}")
+
+    report = load_metadata(version, args.output_dir).get("distillation")
+    if report:
+        print("Distillation report:")
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,22 @@
 import numpy as np
 import pandas as pd
-from sklearn.multioutput import MultiOutputRegressor
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
 from typing import Dict, List, Optional
-import joblib
+import logging
 import os
+import threading
 from pydantic import BaseModel
 
+from .emission_factor_sets import FactorSet, FactorSetRegistry, FactorSetError
+from .forest_compiler import CompiledForest
+from .input_screening import input_screener
+from .emission_factor_db import ACTIVITY_FIELDS
+from .model_artifacts import (
+    load_artifacts, load_shared_artifacts, load_compact_artifacts, set_latest_version,
+    ArtifactNotFoundError
+)
+
+logger = logging.getLogger(__name__)
+
 # Define models for API
 class DepartmentInput(BaseModel):
     name: str
@@ -16,6 +25,8 @@ class DepartmentInput(BaseModel):
     industrial_output: float  # tons
     waste_generated: float  # tons
     transport_distance: float  # km
+    region: Optional[str] = None  # emission factor region, e.g. "IN-MH"; global factors when omitted
+    year: Optional[int] = None  # emission factor year; latest available when omitted
 
 class QuantificationRequest(BaseModel):
     departments: List[DepartmentInput]
@@ -30,13 +41,42 @@ class DepartmentEmission(BaseModel):
     emission: float
     percentage: float
 
+class InputFlag(BaseModel):
+    department: str
+    feature: str  # DepartmentInput field
+    value: float
+    reason: str  # non_finite, negative, implausible, outlier_high or outlier_low
+
+class PredictionInterval(BaseModel):
+    level: float  # percent of the forest's trees inside [lower, upper]
+    lower: float
+    upper: float
+
 class QuantificationResponse(BaseModel):
     total_emissions: float  # kg CO2
     carbon_credits_required: float
     department_emissions: List[DepartmentEmission]
     activity_emissions: List[ActivityEmission]
+    total_emissions_interval: Optional[PredictionInterval] = None
+    carbon_credits_interval: Optional[PredictionInterval] = None
+    emission_factors_version: Optional[str] = None
+    input_flags: Optional[List[InputFlag]] = None  # screened department values; omitted when nothing was flagged
+
+class OrganizationInput(BaseModel):
+    organization_id: str
+    departments: List[DepartmentInput]
+
+class BatchQuantificationRequest(BaseModel):
+    organizations: List[OrganizationInput]
+
+class OrganizationQuantification(BaseModel):
+    organization_id: str
+    result: QuantificationResponse
 
-# Emission factors (Kg CO₂ per unit)
+class BatchQuantificationResponse(BaseModel):
+    results: List[OrganizationQuantification]
+
+# Built-in emission factors (Kg CO₂ per unit), used when no factor set file is available
 EMISSION_FACTORS = {
     'Energy Usage (MWh)': 700,         # 700 kg CO₂/MWh
     'Fuel Consumption (L)': 2.31,      # Diesel CO₂ factor
@@ -45,13 +85,55 @@ EMISSION_FACTORS = {
     'Transport Distance (km)': 0.2     # Vehicle emissions per km
 }
 
+# Versioned factor sets from simulation/emission_factor_sets, hot-swapped by a watcher thread
+factor_sets = FactorSetRegistry(
+    EMISSION_FACTORS,
+    poll_seconds=float(os.environ.get("CARBON_FACTOR_SET_POLL_SECONDS", "5"))
+)
+try:
+    factor_sets.reload()
+except FactorSetError as e:
+    logger.error(f"Using built-in emission factors: {e}")
+
+# Model load states reported by the readiness endpoint
+MODEL_STATUS_NOT_LOADED = "not_loaded"
+MODEL_STATUS_LOADING = "loading"
+MODEL_STATUS_READY = "ready"
+MODEL_STATUS_FAILED = "failed"
+
+
+# Inference engines selectable with CARBON_INFERENCE_ENGINE
+INFERENCE_ENGINE_SKLEARN = "sklearn"
+INFERENCE_ENGINE_COMPILED = "compiled"
+INFERENCE_ENGINE_COMPACT = "compact"  # distilled surrogate; the forest is never loaded
+
+
+class ModelNotReadyError(Exception):
+    """Raised when the trained model artifact cannot be loaded"""
+
+
+class IntervalsUnavailableError(Exception):
+    """Raised when prediction intervals are requested from a model without trees"""
+
+
 # Model class that will handle both prediction and simple calculation
 class CarbonQuantificationModel:
-    def __init__(self):
-        self.model_path = "simulation/carbon_model.joblib"
-        self.scaler_path = "simulation/carbon_scaler.joblib"
-        self.model = None
-        self.scaler = None
+    def __init__(self, version: Optional[str] = None, engine: Optional[str] = None):
+        # Artifacts are loaded lazily; training happens offline in build_carbon_model
+        self.requested_version = version
+        self.engine = engine or os.environ.get("CARBON_INFERENCE_ENGINE", INFERENCE_ENGINE_SKLEARN)
+        # The compiled engine wins on small batches; larger ones go to sklearn
+        self.compiled_max_rows = int(os.environ.get("CARBON_COMPILED_MAX_ROWS", "256"))
+        # Shared mode memory-maps the compiled forest and never loads the sklearn trees
+        self.shared_memory = os.environ.get("CARBON_MODEL_MMAP", "0") == "1"
+        # Number of replaced models kept in memory for rollback
+        self.history_size = int(os.environ.get("CARBON_MODEL_HISTORY", "3"))
+        # Everything loaded for one version; swapped as a single reference
+        self.loaded = None
+        self.history = []
+        self.status = MODEL_STATUS_NOT_LOADED
+        self.error = None
+        self._load_lock = threading.Lock()
         self.features = [
             'Energy Usage (MWh)', 
             'Fuel Consumption (L)', 
@@ -59,150 +141,459 @@ class CarbonQuantificationModel:
             'Waste Generated (tons)', 
             'Transport Distance (km)'
         ]
-        self.setup_model()
-    
-    def setup_model(self):
-        # Check if model exists, otherwise create a new one
-        if os.path.exists(self.model_path) and os.path.exists(self.scaler_path):
-            # Load existing model
-            self.model = joblib.load(self.model_path)
-            self.scaler = joblib.load(self.scaler_path)
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.loaded.version if self.loaded is not None else None
+
+    @property
+    def metadata(self) -> Dict:
+        return self.loaded.metadata if self.loaded is not None else {}
+
+    def load_version(self, version: Optional[str] = None) -> "LoadedModel":
+        """Load the artifacts of a version for the configured engine, without activating them"""
+        model, compiled, compact = None, None, None
+        if self.engine == INFERENCE_ENGINE_COMPACT:
+            compact, scaler, metadata = load_compact_artifacts(version)
+        elif self.shared_memory:
+            compiled, scaler, metadata = load_shared_artifacts(version)
         else:
-            # Create and save a simple model
-            # In a real implementation, you would train on actual data
-            # Here we'll create a basic model that approximates the calculation
-            self.model = MultiOutputRegressor(RandomForestRegressor(n_estimators=100, random_state=42))
-            self.scaler = StandardScaler()
-            
-            # Generate synthetic training data
-            X, y = self._generate_synthetic_data(1000)
-            
-            # Fit the scaler
-            X_scaled = self.scaler.fit_transform(X)
-            
-            # Train the model
-            self.model.fit(X_scaled, y)
-            
-            # Save the model and scaler
-            joblib.dump(self.model, self.model_path)
-            joblib.dump(self.scaler, self.scaler_path)
-    
-    def _generate_synthetic_data(self, n_samples):
-        """Generate synthetic data for model training"""
-        np.random.seed(42)
-        
-        # Generate random input values
-        X = pd.DataFrame({
-            'Energy Usage (MWh)': np.random.uniform(1, 1000, n_samples),
-            'Fuel Consumption (L)': np.random.uniform(1, 10000, n_samples),
-            'Industrial Output (tons)': np.random.uniform(1, 1000, n_samples),
-            'Waste Generated (tons)': np.random.uniform(1, 5000, n_samples),
-            'Transport Distance (km)': np.random.uniform(1, 10000, n_samples)
-        })
-        
-        # Calculate outputs using emission factors with some noise
-        emissions = (
-            X['Energy Usage (MWh)'] * EMISSION_FACTORS['Energy Usage (MWh)'] +
-            X['Fuel Consumption (L)'] * EMISSION_FACTORS['Fuel Consumption (L)'] +
-            X['Industrial Output (tons)'] * EMISSION_FACTORS['Industrial Output (tons)'] +
-            X['Waste Generated (tons)'] * EMISSION_FACTORS['Waste Generated (tons)'] +
-            X['Transport Distance (km)'] * EMISSION_FACTORS['Transport Distance (km)']
-        )
-        
-        # Add some noise
-        emissions = emissions * np.random.normal(1, 0.1, n_samples)
-        
-        # Carbon credits are typically 1:1 with emissions (in tons)
-        carbon_credits = emissions / 1000  # Convert kg to tons
-        
-        # Create output DataFrame
-        y = pd.DataFrame({
-            'Total Emissions (kg CO₂)': emissions,
-            'Carbon Credits Required': carbon_credits
-        })
-        
-        return X, y
+            model, scaler, metadata = load_artifacts(version)
+            compiled = CompiledForest.from_multioutput(model) if self.engine == INFERENCE_ENGINE_COMPILED else None
+        return LoadedModel(model, scaler, metadata, compiled, compact)
+
+    def load(self):
+        """Load the model and scaler artifacts, once"""
+        with self._load_lock:
+            if self.status == MODEL_STATUS_READY:
+                return
+            self.status = MODEL_STATUS_LOADING
+            try:
+                loaded = self.load_version(self.requested_version)
+            except Exception as e:
+                self.status = MODEL_STATUS_FAILED
+                self.error = str(e)
+                logger.error(f"Failed to load carbon model: {self.error}")
+                raise ModelNotReadyError(self.error) from e
+
+            self.loaded = loaded
+            self.error = None
+            self.status = MODEL_STATUS_READY
+            logger.info(f"Loaded carbon model version {self.version}")
+
+    def swap(self, loaded: "LoadedModel"):
+        """
+        Activate an already loaded model. In-flight predictions keep the
+        LoadedModel they started with, so nothing waits and nothing mixes
+        two versions. The replaced model is kept for rollback. Process pools
+        started for another version are replaced on their next submission.
+        """
+        with self._load_lock:
+            previous = self.loaded
+            if previous is not None:
+                self.history = ([previous] + self.history)[:self.history_size]
+            self.loaded = loaded
+            self.error = None
+            self.status = MODEL_STATUS_READY
+        logger.info(f"Swapped carbon model {previous.version if previous else None} -> {loaded.version}")
+
+    def rollback(self, version: Optional[str] = None) -> "LoadedModel":
+        """
+        Reactivate the previous model, or a given version (from memory when
+        it is still held, otherwise from disk). LATEST is pointed at it so
+        restarted workers come back on the same version.
+        """
+        with self._load_lock:
+            if version is None:
+                if not self.history:
+                    raise ModelNotReadyError("No previous model version to roll back to")
+                loaded = self.history[0]
+            else:
+                loaded = next((entry for entry in self.history if entry.version == version), None)
+        if loaded is None:
+            try:
+                loaded = self.load_version(version)
+            except Exception as e:
+                raise ModelNotReadyError(str(e)) from e
+
+        with self._load_lock:
+            previous = self.loaded
+            self.history = [entry for entry in self.history if entry is not loaded]
+            if previous is not None:
+                self.history = ([previous] + self.history)[:self.history_size]
+            self.loaded = loaded
+            self.error = None
+            self.status = MODEL_STATUS_READY
+        try:
+            set_latest_version(loaded.version)
+        except ArtifactNotFoundError:
+            logger.warning(f"Model version {loaded.version} has no artifact directory; LATEST left unchanged")
+        logger.info(f"Rolled carbon model back {previous.version if previous else None} -> {loaded.version}")
+        return loaded
+
+    def ensure_loaded(self):
+        """Load on first use; a failed load is retried on the next call"""
+        if self.status != MODEL_STATUS_READY:
+            self.load()
+
+    def ensure_version(self, version: Optional[str]):
+        """Like ensure_loaded, pinned to a version; pool workers use it to serve the parent's model"""
+        if version is not None and self.version != version:
+            with self._load_lock:
+                self.requested_version = version
+                self.status = MODEL_STATUS_NOT_LOADED
+        self.ensure_loaded()
+
+    def warm_up(self) -> threading.Thread:
+        """Load the artifacts in a background thread so startup is not blocked"""
+        def _load():
+            try:
+                self.load()
+            except ModelNotReadyError:
+                pass
+
+        thread = threading.Thread(target=_load, name="carbon-model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def readiness(self) -> Dict[str, Optional[str]]:
+        training_factors = self.metadata.get("emission_factors")
+        engine = self.engine
+        if self.shared_memory and engine != INFERENCE_ENGINE_COMPACT:
+            engine = INFERENCE_ENGINE_COMPILED
+        return {
+            "status": self.status,
+            "model_version": self.version,
+            "previous_versions": [entry.version for entry in self.history],
+            "engine": engine,
+            "shared_memory": self.shared_memory,
+            "emission_factors_version": factor_sets.current.version,
+            # The synthetic training targets were computed from these factors
+            "model_factors_in_sync": (
+                None if training_factors is None else training_factors == factor_sets.current.factors
+            ),
+            "error": self.error
+        }
     
     def predict(self, department_inputs: List[DepartmentInput]) -> QuantificationResponse:
         """
         Process department inputs and return emissions data
         """
-        # Aggregate inputs by department
-        total_inputs = {feature: 0 for feature in self.features}
-        department_data = {}
-        
-        for dept in department_inputs:
-            dept_dict = {
-                'Energy Usage (MWh)': dept.energy_usage,
-                'Fuel Consumption (L)': dept.fuel_consumption,
-                'Industrial Output (tons)': dept.industrial_output,
-                'Waste Generated (tons)': dept.waste_generated,
-                'Transport Distance (km)': dept.transport_distance
-            }
-            
-            department_data[dept.name] = dept_dict
-            
-            # Sum up for total
-            for feature in self.features:
-                total_inputs[feature] += dept_dict[feature]
-        
-        # Calculate direct emissions by department
-        department_emissions = {}
-        total_direct_emission = 0
-        
-        for dept_name, data in department_data.items():
-            dept_emission = 0
-            for feature, value in data.items():
-                dept_emission += value * EMISSION_FACTORS[feature]
-            
-            department_emissions[dept_name] = dept_emission
-            total_direct_emission += dept_emission
-        
-        # Calculate direct emissions by activity
-        activity_emissions = {}
-        for feature in self.features:
-            val = total_inputs[feature]
-            emis = val * EMISSION_FACTORS[feature]
-            activity_emissions[feature] = emis
-        
-        # Use the ML model for overall prediction
-        input_df = pd.DataFrame([total_inputs])
-        input_scaled = self.scaler.transform(input_df)
-        prediction = self.model.predict(input_scaled)
-        
-        total_pred_emission = prediction[0][0]
-        carbon_credits_required = prediction[0][1]
-        
-        # Prepare department emissions list
-        dept_emissions_list = []
-        for dept, emission in department_emissions.items():
-            percent = (emission / total_direct_emission) * 100 if total_direct_emission != 0 else 0
-            dept_emissions_list.append(
+        return self.predict_batch([department_inputs])[0]
+
+    def predict_batch(self, organizations: List[List[DepartmentInput]]) -> List[QuantificationResponse]:
+        """
+        Process the departments of many organizations in one vectorized pass.
+        Returns one response per organization, in input order.
+        """
+        batch = self.prepare_batch(organizations)
+        predictions = self.predict_totals(batch.totals)
+        return self.finalize_batch(batch, predictions)
+
+    def prepare_batch(self, organizations: List[List[DepartmentInput]]) -> "PreparedBatch":
+        """
+        Pack all departments into one matrix and compute the direct
+        (emission factor) department and activity emissions per organization
+        """
+        # Read the active factor set once; a concurrent swap does not affect this batch
+        factor_set = factor_sets.current
+        rows = []
+        row_org = []
+        row_names = []
+        regions = []
+        years = []
+        slot_names = []
+        slot_org = []
+        slot_row = []
+        slot_offsets = [0]
+
+        for org_index, departments in enumerate(organizations):
+            # A repeated department name replaces the earlier entry in the
+            # breakdown but still counts towards the organization totals
+            seen = {}
+            for dept in departments:
+                if dept.name in seen:
+                    slot_row[seen[dept.name]] = len(rows)
+                else:
+                    seen[dept.name] = len(slot_names)
+                    slot_names.append(dept.name)
+                    slot_org.append(org_index)
+                    slot_row.append(len(rows))
+                rows.append((
+                    dept.energy_usage,
+                    dept.fuel_consumption,
+                    dept.industrial_output,
+                    dept.waste_generated,
+                    dept.transport_distance
+                ))
+                row_org.append(org_index)
+                row_names.append(dept.name)
+                regions.append(dept.region)
+                years.append(dept.year)
+            slot_offsets.append(len(slot_names))
+
+        values = np.array(rows, dtype=float).reshape(len(rows), len(self.features))
+        input_flags = self.screen_inputs(values, row_org, row_names)
+
+        # Per-row factors are gathered in one pass, only when some department asks for them
+        factor_matrix = None
+        if any(region is not None for region in regions) or any(year is not None for year in years):
+            factor_matrix = factor_set.database.gather(regions, years)
+
+        return self._prepare_packed(values, row_org, slot_names, slot_org, slot_row, slot_offsets,
+                                    factor_set, factor_matrix, input_flags)
+
+    def prepare_departments(self, names: List[str], values: np.ndarray, screen: bool = True,
+                            input_flags: Optional[Dict[int, List[InputFlag]]] = None) -> "PreparedBatch":
+        """
+        Prepare a single organization from a (departments, features) matrix
+        whose department names are already unique. Pass screen=False when
+        the values are sums of rows that were screened one by one (streamed
+        uploads, time-series rollups): sums are not inputs, so they are not
+        checked against per-row limits and never enter the screening history.
+        """
+        n_depts = len(names)
+        zeros = np.zeros(n_depts, dtype=np.intp)
+        if screen:
+            input_flags = self.screen_inputs(values, zeros, names)
+        return self._prepare_packed(values, zeros, list(names), zeros, np.arange(n_depts), [0, n_depts],
+                                    factor_sets.current, input_flags=input_flags)
+
+    def screen_departments(self, departments: List[DepartmentInput]) -> Optional[List[InputFlag]]:
+        """Screen one organization's departments on their own; its flags, or None"""
+        values = np.array([
+            (dept.energy_usage, dept.fuel_consumption, dept.industrial_output,
+             dept.waste_generated, dept.transport_distance)
+            for dept in departments
+        ], dtype=float).reshape(len(departments), len(self.features))
+        flags = self.screen_inputs(values, np.zeros(len(departments), dtype=np.intp),
+                                   [dept.name for dept in departments])
+        return flags.get(0) if flags else None
+
+    def screen_inputs(self, values: np.ndarray, row_org, row_names: List[str],
+                      update_history: bool = True) -> Optional[Dict[int, List[InputFlag]]]:
+        """
+        Screen department rows before any emissions are computed. Raises
+        InputScreeningError for invalid values in reject mode; otherwise
+        returns the flags grouped by organization index (None if none).
+        The rows feed the screening history only once they are accepted.
+        """
+        result = input_screener.screen(values)
+        if result is None:
+            return None
+        input_screener.check(result, row_names)
+        if update_history:
+            input_screener.remember(input_screener.accepted_rows(values, result))
+        return self.screening_flags(result, values, row_org, row_names)
+
+    def screening_flags(self, result, values: np.ndarray, row_org,
+                        row_names: List[str]) -> Optional[Dict[int, List[InputFlag]]]:
+        """The flags of a ScreeningResult grouped by organization index (None if none)"""
+        if not result:
+            return None
+        flags = {}
+        for row, column, reason in zip(result.rows.tolist(), result.columns.tolist(), result.reasons()):
+            flags.setdefault(int(row_org[row]), []).append(InputFlag(
+                department=row_names[row],
+                feature=ACTIVITY_FIELDS[column],
+                value=float(values[row, column]),
+                reason=reason
+            ))
+        return flags
+
+    def _prepare_packed(self, values, row_org, slot_names, slot_org, slot_row, slot_offsets,
+                        factor_set: FactorSet, factor_matrix: Optional[np.ndarray] = None,
+                        input_flags: Optional[Dict[int, List[InputFlag]]] = None) -> "PreparedBatch":
+        """
+        Direct department and activity emissions for packed department rows,
+        using the factor set's global factors or a per-row (rows, features) factor matrix
+        """
+
+        n_orgs = len(slot_offsets) - 1
+        row_org = np.asarray(row_org, dtype=np.intp)
+        slot_org = np.asarray(slot_org, dtype=np.intp)
+
+        # bincount accumulates in input order, so the sums are identical to
+        # adding the values one department at a time
+        totals = np.column_stack([
+            np.bincount(row_org, weights=values[:, i], minlength=n_orgs)
+            for i in range(len(self.features))
+        ]) if n_orgs else np.zeros((0, len(self.features)))
+
+        row_emissions = _weighted_row_sums(values, factor_set.vector, factor_matrix)
+        slot_emissions = row_emissions[np.asarray(slot_row, dtype=np.intp)]
+        total_direct = np.bincount(slot_org, weights=slot_emissions, minlength=n_orgs)
+        if factor_matrix is None:
+            activity_emissions = totals * factor_set.vector
+        else:
+            row_activity = values * factor_matrix
+            activity_emissions = np.column_stack([
+                np.bincount(row_org, weights=row_activity[:, i], minlength=n_orgs)
+                for i in range(len(self.features))
+            ]) if n_orgs else np.zeros((0, len(self.features)))
+
+        return PreparedBatch(
+            totals=totals,
+            slot_names=slot_names,
+            slot_offsets=slot_offsets,
+            slot_emissions=slot_emissions,
+            slot_percentages=_percentages(slot_emissions, total_direct[slot_org]),
+            activity_emissions=activity_emissions,
+            activity_percentages=_percentages(activity_emissions, total_direct[:, None]),
+            factor_set_version=factor_set.version,
+            input_flags=input_flags
+        )
+
+    def predict_totals(self, totals: np.ndarray) -> np.ndarray:
+        """
+        Run the ML model on stacked organization totals, one row per organization.
+        Returns an array of (total emissions, carbon credits required) rows.
+        """
+        if len(totals) == 0:
+            return np.zeros((0, 2))
+        self.ensure_loaded()
+        # One read of the reference; a concurrent swap only affects later calls
+        loaded = self.loaded
+        if loaded.compact is not None:
+            return loaded.compact.predict((np.asarray(totals, dtype=float) - loaded.scaler.mean_) / loaded.scaler.scale_)
+        if loaded.compiled is not None and (loaded.model is None or len(totals) <= self.compiled_max_rows):
+            # Same arithmetic as StandardScaler.transform without the DataFrame round trip
+            input_scaled = (np.asarray(totals, dtype=float) - loaded.scaler.mean_) / loaded.scaler.scale_
+            return loaded.compiled.predict(input_scaled)
+        input_df = pd.DataFrame(totals, columns=self.features)
+        input_scaled = loaded.scaler.transform(input_df)
+        return loaded.model.predict(input_scaled)
+
+    def predict_totals_with_intervals(self, totals: np.ndarray, level: float):
+        """
+        Point predictions plus central percentile intervals across the trees.
+        Every tree is evaluated once in the compiled forest; the same per-tree
+        outputs give both the mean and the percentiles. Returns
+        (predictions, bounds) with bounds shaped (organizations, outputs, 2).
+        """
+        if len(totals) == 0:
+            return np.zeros((0, 2)), np.zeros((0, 2, 2))
+        self.ensure_loaded()
+        loaded = self.loaded
+        forest = self._tree_forest(loaded)
+        input_scaled = (np.asarray(totals, dtype=float) - loaded.scaler.mean_) / loaded.scaler.scale_
+        per_tree = forest.tree_predictions(input_scaled)
+        tail = (100 - level) / 2
+        return forest.predict_from_trees(per_tree), forest.percentiles_from_trees(per_tree, [tail, 100 - tail])
+
+    def _tree_forest(self, loaded: "LoadedModel") -> CompiledForest:
+        if loaded.compiled is not None:
+            return loaded.compiled
+        if loaded.model is None:
+            raise IntervalsUnavailableError("Prediction intervals need the forest model; the compact model is being served")
+        with self._load_lock:
+            if loaded.interval_forest is None:
+                loaded.interval_forest = CompiledForest.from_multioutput(loaded.model)
+            return loaded.interval_forest
+
+    def finalize_batch(self, batch: "PreparedBatch", predictions: np.ndarray,
+                       bounds: Optional[np.ndarray] = None, level: Optional[float] = None) -> List[QuantificationResponse]:
+        """Build one QuantificationResponse per organization, with intervals when bounds are given"""
+        slot_emissions = batch.slot_emissions.tolist()
+        slot_percentages = batch.slot_percentages.tolist()
+        activity_emissions = batch.activity_emissions.tolist()
+        activity_percentages = batch.activity_percentages.tolist()
+
+        results = []
+        for org_index in range(len(batch.totals)):
+            start, end = batch.slot_offsets[org_index], batch.slot_offsets[org_index + 1]
+
+            dept_emissions_list = [
                 DepartmentEmission(
-                    department=dept,
-                    emission=round(emission, 2),
-                    percentage=round(percent, 2)
+                    department=batch.slot_names[i],
+                    emission=round(slot_emissions[i], 2),
+                    percentage=round(slot_percentages[i], 2)
                 )
-            )
-        
-        # Prepare activity emissions list
-        activity_emissions_list = []
-        for activity, emission in activity_emissions.items():
-            percent = (emission / total_direct_emission) * 100 if total_direct_emission != 0 else 0
-            activity_emissions_list.append(
+                for i in range(start, end)
+            ]
+
+            activity_emissions_list = [
                 ActivityEmission(
                     activity=activity,
-                    emission=round(emission, 2),
-                    percentage=round(percent, 2)
+                    emission=round(activity_emissions[org_index][j], 2),
+                    percentage=round(activity_percentages[org_index][j], 2)
                 )
-            )
-        
-        return QuantificationResponse(
-            total_emissions=round(total_pred_emission, 2),
-            carbon_credits_required=round(carbon_credits_required, 2),
-            department_emissions=dept_emissions_list,
-            activity_emissions=activity_emissions_list
-        )
+                for j, activity in enumerate(self.features)
+            ]
+
+            results.append(QuantificationResponse(
+                total_emissions=round(predictions[org_index][0], 2),
+                carbon_credits_required=round(predictions[org_index][1], 2),
+                department_emissions=dept_emissions_list,
+                activity_emissions=activity_emissions_list,
+                total_emissions_interval=_interval(bounds, org_index, 0, level),
+                carbon_credits_interval=_interval(bounds, org_index, 1, level),
+                emission_factors_version=batch.factor_set_version,
+                input_flags=batch.input_flags.get(org_index) if batch.input_flags else None
+            ))
+
+        return results
+
+
+class LoadedModel:
+    """The artifacts of one model version, as loaded for the configured engine"""
+
+    def __init__(self, model, scaler, metadata, compiled=None, compact=None):
+        self.model = model                # sklearn forest; None in shared memory and compact modes
+        self.scaler = scaler
+        self.metadata = metadata
+        self.compiled = compiled
+        self.compact = compact
+        self.interval_forest = None       # compiled lazily for intervals when the sklearn engine is used
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.metadata.get("version")
+
+
+class PreparedBatch:
+    """Packed departments of a batch of organizations and their direct emissions"""
+
+    def __init__(self, totals, slot_names, slot_offsets, slot_emissions, slot_percentages,
+                 activity_emissions, activity_percentages, factor_set_version=None, input_flags=None):
+        self.totals = totals                              # (organizations, features)
+        self.slot_names = slot_names                      # department names, grouped by organization
+        self.slot_offsets = slot_offsets                  # organization i owns slots [offsets[i], offsets[i + 1])
+        self.slot_emissions = slot_emissions
+        self.slot_percentages = slot_percentages
+        self.activity_emissions = activity_emissions      # (organizations, features)
+        self.activity_percentages = activity_percentages
+        self.factor_set_version = factor_set_version      # emission factor set the emissions were computed with
+        self.input_flags = input_flags                    # organization index -> screening flags
+
+
+def _weighted_row_sums(values: np.ndarray, factor_vector: np.ndarray,
+                       factor_matrix: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Multiply each row by factor_vector (or its own row of factor_matrix)
+    and sum it. The columns are accumulated left to right so every row
+    matches a scalar Python loop bit for bit.
+    """
+    result = np.zeros(len(values))
+    for i, factor in enumerate(factor_vector):
+        result += values[:, i] * (factor if factor_matrix is None else factor_matrix[:, i])
+    return result
+
+
+def _interval(bounds: Optional[np.ndarray], org_index: int, output_index: int,
+              level: Optional[float]) -> Optional[PredictionInterval]:
+    if bounds is None:
+        return None
+    lower, upper = bounds[org_index][output_index]
+    return PredictionInterval(level=level, lower=round(float(lower), 2), upper=round(float(upper), 2))
+
+
+def _percentages(emissions: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Share of each emission in its organization's direct total, 0 where the total is 0"""
+    percentages = np.zeros_like(emissions)
+    np.divide(emissions, totals, out=percentages, where=np.broadcast_to(totals != 0, emissions.shape))
+    percentages *= 100
+    return percentages
 
 # Create singleton instance
 carbon_model = CarbonQuantificationModel() 
\ No newline at end of file
@@ -1,5 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
-from .carbon_quantification_model import carbon_model, QuantificationRequest, QuantificationResponse, DepartmentInput
+import os
+from fastapi import APIRouter, HTTPException, Depends, Request, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from .carbon_quantification_model import (
+    carbon_model, QuantificationRequest, QuantificationResponse, DepartmentInput,
+    BatchQuantificationRequest, BatchQuantificationResponse, OrganizationQuantification,
+    ModelNotReadyError, IntervalsUnavailableError, MODEL_STATUS_READY, factor_sets
+)
+from .emission_factor_db import UnknownRegionError
+from .emission_factor_sets import FactorSetError
+from .columnar import (
+    FORMAT_COLUMNAR, ENCODING_JSON, MEDIA_TYPES, EncodingUnavailableError,
+    columnar_results, encode_columnar
+)
+from .inference_batcher import inference_batcher
+from .inference_executor import inference_executor, ExecutorBusyError
+from .result_cache import result_cache, canonical_key
+from .timeseries_store import timeseries_store, PeriodRecordRequest, TimeSeriesResponse, PeriodError
+from .streaming_ingest import DepartmentStreamAggregator, IngestError, format_from_content_type
+from .sensitivity import SensitivityRequest, SensitivityResponse, SensitivityGrid, SensitivityError
+from .model_artifacts import list_versions
+from .model_retraining import training_samples, model_retrainer, RetrainInProgressError
+from .drift_monitor import drift_monitor
+from .input_screening import input_screener, InputScreeningError
+from .result_export import export_stream, EXPORT_CSV, EXPORT_MEDIA_TYPES
+from .sharded_jobs import sharded_job_runner, JobNotFoundError, JobsBusyError, JOB_SUCCEEDED, JOB_FAILED
+
+# Raw lines parsed per executor job while streaming an upload
+STREAM_CHUNK_LINES = 10000
+
+# Job uploads are buffered to blocks of this size and written to their spool file off the event loop
+SPOOL_WRITE_BYTES = 1 << 20
 
 # Create router for carbon quantification
 router = APIRouter(
@@ -8,8 +40,53 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def _prepare_batch(organizations):
+    # Submitted totals feed the retraining sample
+    batch = carbon_model.prepare_batch(organizations)
+    training_samples.record(batch)
+    return batch
+
+async def _quantify(organizations, interval: Optional[float] = None):
+    """Direct emissions per organization plus one micro-batched model predict"""
+    batch = await inference_executor.run(_prepare_batch, organizations)
+    if interval is not None:
+        return await _predict_with_intervals(batch, interval)
+    return await _predict_prepared(batch)
+
+async def _predict_with_intervals(batch, interval: float):
+    # Needs every tree's output, so it runs as its own forest pass instead of joining a micro-batch
+    predictions, bounds = await inference_executor.run(
+        carbon_model.predict_totals_with_intervals, batch.totals, interval
+    )
+    return await inference_executor.run(_finalize_batch, batch, predictions, bounds, interval)
+
+async def _predict_prepared(batch):
+    predictions = await inference_batcher.submit(batch.totals)
+    return await inference_executor.run(_finalize_batch, batch, predictions)
+
+def _observe(batch, predictions):
+    # Model total vs direct factor sum, for the drift monitor
+    drift_monitor.observe(
+        batch.totals, predictions[:, 0], batch.activity_emissions.sum(axis=1),
+        carbon_model.metadata.get("feature_ranges")
+    )
+
+def _finalize_batch(batch, predictions, bounds=None, interval=None):
+    _observe(batch, predictions)
+    return carbon_model.finalize_batch(batch, predictions, bounds, interval)
+
+def _columnar_response(batch, predictions, encoding, bounds=None, interval=None):
+    _observe(batch, predictions)
+    result = columnar_results(batch, predictions, carbon_model.features, bounds, interval)[0]
+    return encode_columnar(result, encoding)
+
 @router.post("/quantify", response_model=QuantificationResponse)
-async def quantify_emissions(request: QuantificationRequest):
+async def quantify_emissions(
+    request: QuantificationRequest,
+    format: Optional[str] = Query(None, description="'columnar' for parallel arrays instead of per-department objects"),
+    encoding: str = Query(ENCODING_JSON, description="Columnar encoding: json, msgpack or arrow"),
+    interval: Optional[float] = Query(None, gt=0, lt=100, description="Prediction interval level in percent, e.g. 90")
+):
     """
     Calculate carbon emissions based on department data
     
@@ -18,7 +95,26 @@ async def quantify_emissions(request: QuantificationRequest):
     - Carbon credits required
     - Department-wise emissions breakdown
     - Activity-wise emissions breakdown
+    
+    With format=columnar the breakdowns come back as parallel arrays
+    (departments, emissions, percentages) built directly from NumPy,
+    optionally encoded as MessagePack or an Arrow IPC stream.
+    
+    With interval=<level> the totals also carry a central percentile
+    interval across the random forest's trees (e.g. interval=90 gives the
+    5th to 95th percentile).
+
+    Department values are screened first: negative or non-finite values
+    (and, with CARBON_SCREENING_MAXIMUMS=1, implausibly large ones) and
+    values outside the IQR fences of recent requests are listed in
+    input_flags. With CARBON_SCREENING_MODE=reject the invalid ones fail
+    the request with 400 instead.
     """
+    if format is not None and format != FORMAT_COLUMNAR:
+        raise HTTPException(status_code=400, detail=f"Unknown format '{format}'")
+    if encoding not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding '{encoding}'")
+    
     try:
         # Validate that we have at least one department
         if not request.departments or len(request.departments) == 0:
@@ -27,10 +123,42 @@ async def quantify_emissions(request: QuantificationRequest):
                 detail="At least one department must be provided"
             )
         
+        if format == FORMAT_COLUMNAR:
+            batch = await inference_executor.run(_prepare_batch, [request.departments])
+            if interval is not None:
+                predictions, bounds = await inference_executor.run(
+                    carbon_model.predict_totals_with_intervals, batch.totals, interval
+                )
+                return await inference_executor.run(_columnar_response, batch, predictions, encoding, bounds, interval)
+            predictions = await inference_batcher.submit(batch.totals)
+            return await inference_executor.run(_columnar_response, batch, predictions, encoding)
+        
+        # Repeated payloads are served from the result cache once the model is loaded
+        cache_key = None
+        generation = (carbon_model.version, factor_sets.current.fingerprint)
+        if result_cache.enabled and interval is None and carbon_model.status == MODEL_STATUS_READY:
+            cache_key = canonical_key(request.departments, *generation)
+            cached = result_cache.get(cache_key, generation)
+            if cached is not None:
+                # Flags depend on the current IQR fences, so they are never cached
+                input_flags = await inference_executor.run(carbon_model.screen_departments, request.departments)
+                return cached.model_copy(update={"input_flags": input_flags})
+        
         # Process the data using our model
-        result = carbon_model.predict(request.departments)
-        return result
+        results = await _quantify([request.departments], interval)
+        if cache_key and generation == (carbon_model.version, factor_sets.current.fingerprint):
+            result_cache.put(cache_key, results[0].model_copy(update={"input_flags": None}), generation,
+                             rows=len(request.departments))
+        return results[0]
         
+    except (UnknownRegionError, IntervalsUnavailableError, InputScreeningError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EncodingUnavailableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"Carbon model is not available: {str(e)}")
     except Exception as e:
         # Log the error in a production environment
         raise HTTPException(
@@ -38,13 +166,452 @@ async def quantify_emissions(request: QuantificationRequest):
             detail=f"Error processing quantification request: {str(e)}"
         )
 
+@router.post("/quantify/batch", response_model=BatchQuantificationResponse)
+async def quantify_emissions_batch(
+    request: BatchQuantificationRequest,
+    interval: Optional[float] = Query(None, gt=0, lt=100, description="Prediction interval level in percent, e.g. 90")
+):
+    """
+    Calculate carbon emissions for many organizations in one call
+    
+    All departments of all organizations are packed into one matrix and the
+    ML model runs once on the stacked organization totals. Each result is
+    identical to calling /quantify for that organization alone.
+    """
+    if not request.organizations:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one organization must be provided"
+        )
+    for org in request.organizations:
+        if not org.departments:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Organization '{org.organization_id}' has no departments"
+            )
+    
+    try:
+        results = await _quantify([org.departments for org in request.organizations], interval)
+        return BatchQuantificationResponse(
+            results=[
+                OrganizationQuantification(organization_id=org.organization_id, result=result)
+                for org, result in zip(request.organizations, results)
+            ]
+        )
+        
+    except (UnknownRegionError, IntervalsUnavailableError, InputScreeningError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"Carbon model is not available: {str(e)}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing batch quantification request: {str(e)}"
+        )
+
+async def _export_response(organization_ids, organizations, export_format: str):
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown export format '{export_format}'")
+    
+    try:
+        batch = await inference_executor.run(_prepare_batch, organizations)
+        predictions = await inference_batcher.submit(batch.totals)
+        await inference_executor.run(_observe, batch, predictions)
+        content = export_stream(export_format, batch, predictions, organization_ids, carbon_model.features)
+    except (UnknownRegionError, InputScreeningError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except EncodingUnavailableError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"Carbon model is not available: {str(e)}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error exporting quantification results: {str(e)}"
+        )
+    
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="carbon_quantification.{export_format}"',
+            "X-Emission-Factors-Version": batch.factor_set_version or ""
+        }
+    )
+
+@router.post("/quantify/export")
+async def export_quantification(
+    request: QuantificationRequest,
+    format: str = Query(EXPORT_CSV, description="csv or parquet")
+):
+    """
+    Download the department, activity and total breakdowns as CSV or Parquet
+    
+    Emissions are computed exactly as in /quantify. The request body is
+    parsed and the batch prepared in memory as usual; only the output is
+    serialized in chunks of department rows (one Parquet row group each),
+    so neither the whole file nor a response object per department is
+    built. Rows have the columns
+    organization_id (empty here), breakdown (department, activity or
+    total), name, emission (kg CO₂) and percentage.
+    """
+    if not request.departments:
+        raise HTTPException(status_code=400, detail="At least one department must be provided")
+    return await _export_response([None], [request.departments], format)
+
+@router.post("/quantify/batch/export")
+async def export_quantification_batch(
+    request: BatchQuantificationRequest,
+    format: str = Query(EXPORT_CSV, description="csv or parquet")
+):
+    """Download the breakdowns of many organizations as CSV or Parquet, as in /quantify/export"""
+    if not request.organizations:
+        raise HTTPException(status_code=400, detail="At least one organization must be provided")
+    for org in request.organizations:
+        if not org.departments:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Organization '{org.organization_id}' has no departments"
+            )
+    return await _export_response(
+        [org.organization_id for org in request.organizations],
+        [org.departments for org in request.organizations],
+        format
+    )
+
+@router.post("/quantify/stream", response_model=QuantificationResponse)
+async def quantify_emissions_stream(
+    http_request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults from Content-Type")
+):
+    """
+    Calculate carbon emissions from a streamed CSV or NDJSON upload
+    
+    Each row has the DepartmentInput fields (name, energy_usage,
+    fuel_consumption, industrial_output, waste_generated, transport_distance).
+    Rows are aggregated as they arrive, so memory depends on the number of
+    distinct departments rather than on the upload size. Rows repeating a
+    department name (e.g. one row per period) are summed into that department.
+    Input screening applies to each uploaded row. Global emission factors
+    apply to the sums, so rows setting region or year are rejected.
+    """
+    stream_format = format or format_from_content_type(http_request.headers.get("content-type"))
+    if stream_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+    
+    try:
+        aggregator = DepartmentStreamAggregator(stream_format)
+        pending_lines = []
+        async for chunk in http_request.stream():
+            pending_lines.extend(aggregator.split_lines(chunk))
+            if len(pending_lines) >= STREAM_CHUNK_LINES:
+                await inference_executor.run(aggregator.add_lines, pending_lines)
+                pending_lines = []
+        pending_lines.extend(aggregator.split_lines(b"", final=True))
+        await inference_executor.run(aggregator.add_lines, pending_lines)
+        
+        if not aggregator.names:
+            raise HTTPException(
+                status_code=400,
+                detail="At least one department must be provided"
+            )
+        
+        # Rows were screened as they were parsed; the department sums are not screened again
+        await inference_executor.run(input_screener.remember, aggregator.accepted_rows)
+        batch = await inference_executor.run(
+            carbon_model.prepare_departments, aggregator.names, aggregator.sums, False,
+            {0: aggregator.input_flags} if aggregator.input_flags else None
+        )
+        await inference_executor.run(training_samples.record, batch)
+        results = await _predict_prepared(batch)
+        return results[0]
+        
+    except HTTPException:
+        raise
+    except (IngestError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"Carbon model is not available: {str(e)}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing streamed quantification request: {str(e)}"
+        )
+
+@router.post("/sensitivity", response_model=SensitivityResponse)
+async def analyze_sensitivity(request: SensitivityRequest):
+    """
+    What-if sweep over per-feature perturbations
+    
+    Each requested feature is scaled by every change (e.g. -0.1 for a 10%
+    drop) for the whole organization and, with per_department, for each
+    department on its own. All perturbed organization totals are stacked
+    into one matrix and scored with a single model predict, so a sweep of
+    a thousand points costs one round trip.
+    """
+    if not request.departments:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one department must be provided"
+        )
+    if not request.changes:
+        raise HTTPException(status_code=400, detail="At least one change must be provided")
+    
+    try:
+        grid = await inference_executor.run(SensitivityGrid, request)
+        totals = await inference_executor.run(grid.totals)
+        predictions = await inference_executor.predict_totals(totals)
+        return await inference_executor.run(grid.response, predictions)
+        
+    except (SensitivityError, UnknownRegionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=f"Carbon model is not available: {str(e)}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing sensitivity request: {str(e)}"
+        )
+
+@router.post("/timeseries/{organization_id}/periods", response_model=TimeSeriesResponse)
+async def record_period(organization_id: str, request: PeriodRecordRequest):
+    """
+    Record one month of department data for an organization
+    
+    Returns the latest month, year-to-date, rolling 12-month and all-time
+    rollups at department, activity and organization level. Appending a
+    month (or correcting one) updates the rollups incrementally. Months
+    are summed before emission factors are applied, so global factors are
+    used and departments setting region or year are rejected.
+    """
+    if not request.departments:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one department must be provided"
+        )
+    if any(dept.region is not None or dept.year is not None for dept in request.departments):
+        raise HTTPException(
+            status_code=400,
+            detail="region and year are not supported for time series, whose months are summed per "
+                   "department; use /quantify for per-department emission factors"
+        )
+    try:
+        # Screening, the rollup update and the response are CPU work, kept off the event loop
+        return await inference_executor.run(timeseries_store.record, organization_id, request.period, request.departments)
+    except (PeriodError, InputScreeningError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@router.get("/timeseries/{organization_id}", response_model=TimeSeriesResponse)
+async def get_timeseries(organization_id: str):
+    """Get the current rollups for an organization"""
+    try:
+        result = await inference_executor.run(timeseries_store.get, organization_id)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    if result is None:
+        raise HTTPException(status_code=404, detail="No periods recorded for this organization")
+    return result
+
+@router.post("/jobs", status_code=202)
+async def submit_quantification_job(
+    http_request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson; defaults from Content-Type")
+):
+    """
+    Quantify a very large multi-organization upload in the background
+    
+    Each CSV or NDJSON row has an organization_id plus the DepartmentInput
+    fields (region and year optional). The upload is cut into shards that
+    are parsed and aggregated in parallel worker processes, and the merged
+    organizations are predicted the same way. Poll GET /jobs/{job_id} for
+    progress and fetch GET /jobs/{job_id}/result, which has the shape of
+    the /quantify/batch response. Keep each organization's rows together
+    so no organization spans two shards.
+
+    The upload is written to a temporary file as it arrives rather than
+    held in memory. A few jobs run at a time and others queue behind
+    them; when the queue is full the request gets 503 with Retry-After.
+    """
+    stream_format = format or format_from_content_type(http_request.headers.get("content-type"))
+    if stream_format is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+    
+    if sharded_job_runner.busy:
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "1"})
+    
+    spool = sharded_job_runner.spool()
+    submitted = False
+    try:
+        has_rows = False
+        buffer = bytearray()
+        with spool:
+            async for chunk in http_request.stream():
+                buffer += chunk
+                has_rows = has_rows or bool(chunk.strip())
+                if len(buffer) >= SPOOL_WRITE_BYTES:
+                    await run_in_threadpool(spool.write, bytes(buffer))
+                    buffer.clear()
+            await run_in_threadpool(spool.write, bytes(buffer))
+        if not has_rows:
+            raise HTTPException(status_code=400, detail="At least one department must be provided")
+        job = sharded_job_runner.submit(spool.name, stream_format)
+        submitted = True
+        return job.status()
+    except JobsBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    finally:
+        if not submitted:
+            os.remove(spool.name)
+
+@router.get("/jobs/{job_id}")
+async def get_quantification_job(job_id: str):
+    """State and progress (phase, completed/total work units) of a quantification job"""
+    try:
+        return sharded_job_runner.get(job_id).status()
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job '{job_id}'")
+
+@router.get("/jobs/{job_id}/result")
+async def get_quantification_job_result(job_id: str):
+    """Results of a finished job, in the /quantify/batch response shape"""
+    try:
+        job = sharded_job_runner.get(job_id)
+    except JobNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired job '{job_id}'")
+    if job.state == JOB_FAILED:
+        raise HTTPException(status_code=422, detail=f"Job failed: {job.error}")
+    if job.state != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.state}", headers={"Retry-After": "1"})
+    return Response(content=job.result, media_type="application/json")
+
+@router.get("/status")
+async def get_model_status():
+    """Readiness of the quantification model (not_loaded, loading, ready or failed)"""
+    return carbon_model.readiness()
+
+@router.get("/model")
+async def get_model_versions():
+    """Serving model version, versions held for rollback, built versions and the retraining sample"""
+    return {
+        "model_version": carbon_model.version,
+        "previous_versions": [entry.version for entry in carbon_model.history],
+        "available_versions": list_versions(),
+        "training_samples": training_samples.stats(),
+        "retraining": model_retrainer.status()
+    }
+
+@router.post("/model/retrain", status_code=202)
+async def start_retraining():
+    """
+    Retrain in the background on synthetic data plus submitted organizations
+    
+    The candidate is validated on a holdout of submitted organizations and
+    on the synthetic holdout. If it is no worse than the serving model it
+    is saved as a new version and swapped in; requests already running
+    finish on the model they started with. Poll GET /model/retrain.
+    """
+    try:
+        return model_retrainer.start()
+    except RetrainInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/model/retrain")
+async def get_retraining_status():
+    """State of the last retraining job (running, promoted, rejected or failed)"""
+    return model_retrainer.status()
+
+@router.post("/model/rollback")
+async def rollback_model(version: Optional[str] = Query(None, description="Version to restore; the previous one by default")):
+    """Swap back to the previous model version, or to a given built version"""
+    try:
+        await inference_executor.run(carbon_model.rollback, version)
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return carbon_model.readiness()
+
+@router.get("/metrics/inference")
+async def get_inference_metrics():
+    """Micro-batching metrics (batch size histogram, queue wait) and executor load"""
+    return {
+        "max_batch_size": inference_batcher.max_batch_size,
+        "max_wait_ms": inference_batcher.max_wait_ms,
+        "enabled": inference_batcher.enabled,
+        **inference_batcher.metrics.snapshot(),
+        "executor": inference_executor.stats()
+    }
+
+@router.get("/metrics/drift")
+async def get_drift_metrics():
+    """
+    Residuals of the model total against the direct emission factor sum,
+    input feature distributions and how often inputs fall outside the
+    model's training ranges (all-time reservoir and recent-window quantiles)
+    """
+    return {
+        "model_version": carbon_model.version,
+        **await inference_executor.run(drift_monitor.snapshot)
+    }
+
+@router.post("/metrics/drift/reset")
+async def reset_drift_metrics():
+    """Start the drift statistics over, e.g. after a model swap"""
+    drift_monitor.reset()
+    return {"reset": True}
+
+@router.get("/metrics/screening")
+async def get_screening_metrics():
+    """Input screening mode, flag counts by reason and the current outlier fences"""
+    return input_screener.stats()
+
+@router.post("/metrics/screening/reset")
+async def reset_screening_metrics():
+    """Drop the screening history and counters; fences are refitted from new requests"""
+    input_screener.reset()
+    return {"reset": True}
+
+@router.get("/metrics/cache")
+async def get_cache_metrics():
+    """Result cache hit/miss counters and size"""
+    return result_cache.stats()
+
 @router.get("/emission-factors")
-async def get_emission_factors():
-    """Get the emission factors used in calculations"""
-    from .carbon_quantification_model import EMISSION_FACTORS
+async def get_emission_factors(region: Optional[str] = None, year: Optional[int] = None):
+    """
+    Get the emission factors used in calculations
+
+    Without a region the global factors of the active factor set are
+    returned. With a region (and optionally a year, latest by default) the
+    factors applied to departments that name that region are returned.
+    """
+    factor_set = factor_sets.current
+    factors = dict(factor_set.factors)
+    if region is not None or year is not None:
+        try:
+            factors = dict(zip(factor_set.factors, factor_set.database.lookup(region, year).tolist()))
+        except UnknownRegionError as e:
+            raise HTTPException(status_code=404, detail=str(e))
     
     return {
-        "emission_factors": {k: v for k, v in EMISSION_FACTORS.items()},
+        "emission_factors": factors,
+        "emission_factors_version": factor_set.version,
+        "region": region,
+        "year": year,
         "units": {
             "Energy Usage (MWh)": "kg CO₂/MWh",
             "Fuel Consumption (L)": "kg CO₂/L",
@@ -54,6 +621,32 @@ async def get_emission_factors():
         }
     }
 
+@router.get("/emission-factors/regions")
+async def get_emission_factor_regions():
+    """List the regions and year range covered by the active factor set"""
+    factor_set = factor_sets.current
+    return {
+        "emission_factors_version": factor_set.version,
+        "regions": factor_set.database.regions,
+        "min_year": factor_set.database.min_year,
+        "max_year": factor_set.database.max_year,
+        "entries": factor_set.database.entry_count
+    }
+
+@router.get("/emission-factors/status")
+async def get_emission_factor_status():
+    """Active factor set, reload count and the last reload error"""
+    return factor_sets.status()
+
+@router.post("/emission-factors/reload")
+async def reload_emission_factors():
+    """Check the factor set directory now instead of waiting for the next poll"""
+    try:
+        await inference_executor.run(factor_sets.reload, True)
+    except FactorSetError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return factor_sets.status()
+
 @router.get("/example")
 async def get_example_request():
     """Get an example request body for the quantify endpoint"""
@@ -0,0 +1,126 @@
+"""
+Columnar Results
+Parallel-array quantification results with optional MessagePack / Arrow IPC encoding
+"""
+
+import json
+import numpy as np
+from typing import Any, Dict, List, Optional
+from fastapi import Response
+
+FORMAT_COLUMNAR = "columnar"
+
+ENCODING_JSON = "json"
+ENCODING_MSGPACK = "msgpack"
+ENCODING_ARROW = "arrow"
+
+MEDIA_TYPES = {
+    ENCODING_JSON: "application/json",
+    ENCODING_MSGPACK: "application/msgpack",
+    ENCODING_ARROW: "application/vnd.apache.arrow.stream"
+}
+
+# Binary encodings are optional dependencies
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+
+class EncodingUnavailableError(Exception):
+    """Raised when a binary encoding is requested but its package is not installed"""
+
+
+def columnar_results(batch, predictions: np.ndarray, activities: List[str],
+                     bounds: Optional[np.ndarray] = None, level: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    One result per organization as parallel NumPy arrays, sliced straight
+    from the prepared batch without building a model object per department.
+    Values are rounded to 2 decimals with NumPy rounding. Prediction
+    intervals are added as [lower, upper] pairs when bounds are given.
+    """
+    names = np.array(batch.slot_names, dtype=object)
+    emissions = np.round(batch.slot_emissions, 2)
+    percentages = np.round(batch.slot_percentages, 2)
+    activity_emissions = np.round(batch.activity_emissions, 2)
+    activity_percentages = np.round(batch.activity_percentages, 2)
+    totals = np.round(predictions, 2)
+    bounds = np.round(bounds, 2) if bounds is not None else None
+
+    results = []
+    for org_index in range(len(batch.totals)):
+        start, end = batch.slot_offsets[org_index], batch.slot_offsets[org_index + 1]
+        results.append({
+            "total_emissions": float(totals[org_index][0]),
+            "carbon_credits_required": float(totals[org_index][1]),
+            "departments": names[start:end],
+            "emissions": emissions[start:end],
+            "percentages": percentages[start:end],
+            "activities": activities,
+            "activity_emissions": activity_emissions[org_index],
+            "activity_percentages": activity_percentages[org_index],
+            "emission_factors_version": batch.factor_set_version
+        })
+        if batch.input_flags and org_index in batch.input_flags:
+            results[-1]["input_flags"] = [flag.model_dump() for flag in batch.input_flags[org_index]]
+        if bounds is not None:
+            results[-1].update({
+                "interval_level": level,
+                "total_emissions_interval": bounds[org_index][0],
+                "carbon_credits_interval": bounds[org_index][1]
+            })
+    return results
+
+
+def _plain(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value.tolist() if isinstance(value, np.ndarray) else value for key, value in result.items()}
+
+
+def encode_columnar(result: Dict[str, Any], encoding: str = ENCODING_JSON) -> Response:
+    """Serialize one columnar result in the requested encoding"""
+    if encoding == ENCODING_JSON:
+        content = json.dumps(_plain(result), separators=(",", ":"))
+    elif encoding == ENCODING_MSGPACK:
+        if msgpack is None:
+            raise EncodingUnavailableError("MessagePack encoding needs the 'msgpack' package")
+        content = msgpack.packb(_plain(result))
+    elif encoding == ENCODING_ARROW:
+        if pyarrow is None:
+            raise EncodingUnavailableError("Arrow encoding needs the 'pyarrow' package")
+        content = _encode_arrow(result)
+    else:
+        raise ValueError(f"Unknown encoding '{encoding}'")
+    return Response(content=content, media_type=MEDIA_TYPES[encoding])
+
+
+def _encode_arrow(result: Dict[str, Any]) -> bytes:
+    # Department columns form the record batch; organization totals and the
+    # activity breakdown travel in the schema metadata
+    table = pyarrow.table({
+        "department": pyarrow.array(result["departments"].tolist(), type=pyarrow.string()),
+        "emission": pyarrow.array(result["emissions"], type=pyarrow.float64()),
+        "percentage": pyarrow.array(result["percentages"], type=pyarrow.float64())
+    })
+    metadata = {
+        "total_emissions": json.dumps(result["total_emissions"]),
+        "carbon_credits_required": json.dumps(result["carbon_credits_required"]),
+        "activities": json.dumps(result["activities"]),
+        "activity_emissions": json.dumps(result["activity_emissions"].tolist()),
+        "activity_percentages": json.dumps(result["activity_percentages"].tolist()),
+        "emission_factors_version": json.dumps(result["emission_factors_version"])
+    }
+    for key in ("interval_level", "total_emissions_interval", "carbon_credits_interval", "input_flags"):
+        if key in result:
+            metadata[key] = json.dumps(_plain({key: result[key]})[key])
+    table = table.replace_schema_metadata(metadata)
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
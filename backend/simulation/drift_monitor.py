@@ -0,0 +1,214 @@
+"""
+Drift Monitor
+Streaming statistics of model residuals and input features, folded off the request path
+"""
+
+import os
+import threading
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Input ranges of the synthetic training data, used for models whose metadata has none
+DEFAULT_FEATURE_RANGES = {
+    'Energy Usage (MWh)': [1, 1000],
+    'Fuel Consumption (L)': [1, 10000],
+    'Industrial Output (tons)': [1, 1000],
+    'Waste Generated (tons)': [1, 5000],
+    'Transport Distance (km)': [1, 10000]
+}
+
+QUANTILES = [0.01, 0.1, 0.5, 0.9, 0.99]
+
+
+class RunningStats:
+    """Count, mean, variance, min and max per column, merged batch by batch (Chan et al.)"""
+
+    def __init__(self, n_columns: int):
+        self.count = 0
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+        self.min = np.full(n_columns, np.inf)
+        self.max = np.full(n_columns, -np.inf)
+
+    def update(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = values.mean(axis=0)
+        batch_m2 = ((values - batch_mean) ** 2).sum(axis=0)
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * n / total
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / self.count) if self.count else np.zeros_like(self.m2)
+
+
+class Reservoir:
+    """Uniform sample of every row seen (all-time) plus a ring buffer of the latest rows (recent)"""
+
+    def __init__(self, n_columns: int, size: int, seed: int = 0):
+        self.size = size
+        self.sample = np.empty((size, n_columns))
+        self.recent = np.empty((size, n_columns))
+        self.filled = 0
+        self.recent_filled = 0
+        self.recent_next = 0
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray):
+        n = len(values)
+        fill = min(self.size - self.filled, n)
+        self.sample[self.filled:self.filled + fill] = values[:fill]
+        self.filled += fill
+        if fill < n:
+            positions = self.seen + np.arange(fill, n)
+            slots = self._rng.integers(0, positions + 1)
+            keep = slots < self.size
+            self.sample[slots[keep]] = values[fill:][keep]
+        self.seen += n
+
+        tail = values[-self.size:]
+        slots = (self.recent_next + np.arange(len(tail))) % self.size
+        self.recent[slots] = tail
+        self.recent_next = (self.recent_next + len(tail)) % self.size
+        self.recent_filled = min(self.size, self.recent_filled + len(tail))
+
+    def quantiles(self, recent: bool = False) -> Optional[np.ndarray]:
+        """(len(QUANTILES), columns), or None before the first row"""
+        rows = self.recent[:self.recent_filled] if recent else self.sample[:self.filled]
+        return np.quantile(rows, QUANTILES, axis=0) if len(rows) else None
+
+
+class DriftMonitor:
+    """
+    Tracks the gap between the model's total and the direct emission factor
+    sum, and how often inputs leave the model's training range. observe()
+    only queues references to arrays the request already computed; the
+    statistics are folded in once fold_rows rows are pending or when the
+    metrics are read, as a handful of vectorized updates.
+    """
+
+    def __init__(self, features: List[str], reservoir_size: int = 4096,
+                 fold_rows: int = 1024, enabled: bool = True):
+        self.features = features
+        self.fold_rows = fold_rows
+        self.enabled = enabled
+        self.reservoir_size = reservoir_size
+        self._lock = threading.Lock()
+        self._pending = []
+        self._pending_rows = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            n_features = len(self.features)
+            self._pending = []
+            self._pending_rows = 0
+            # Residual columns: absolute (kg CO₂) and relative to the direct sum
+            self.residuals = RunningStats(2)
+            self.residual_sample = Reservoir(2, self.reservoir_size, seed=1)
+            self.inputs = RunningStats(n_features)
+            self.input_sample = Reservoir(n_features, self.reservoir_size, seed=2)
+            self.below_range = np.zeros(n_features, dtype=np.int64)
+            self.above_range = np.zeros(n_features, dtype=np.int64)
+            self.extrapolated = 0
+            self.ranges = None
+
+    def observe(self, totals: np.ndarray, predicted: np.ndarray, direct: np.ndarray,
+                feature_ranges: Optional[Dict[str, List[float]]] = None):
+        """Queue one batch: organization totals, predicted total emissions and direct emission sums"""
+        if not self.enabled or len(totals) == 0:
+            return
+        with self._lock:
+            self._pending.append((totals, predicted, direct, feature_ranges))
+            self._pending_rows += len(totals)
+            if self._pending_rows >= self.fold_rows:
+                self._fold()
+
+    def _fold(self):
+        if not self._pending:
+            return
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        totals = np.concatenate([entry[0] for entry in pending])
+        predicted = np.concatenate([entry[1] for entry in pending])
+        direct = np.concatenate([entry[2] for entry in pending])
+        # Ranges of the latest model; a swap inside one fold window is not worth splitting for
+        feature_ranges = pending[-1][3] or DEFAULT_FEATURE_RANGES
+        ranges = np.array([
+            feature_ranges.get(feature, DEFAULT_FEATURE_RANGES[feature]) for feature in self.features
+        ], dtype=float)
+        self.ranges = ranges
+
+        residual = predicted - direct
+        relative = np.divide(residual, direct, out=np.zeros_like(residual), where=direct != 0)
+        residuals = np.column_stack([residual, relative])
+        self.residuals.update(residuals)
+        self.residual_sample.update(residuals)
+
+        self.inputs.update(totals)
+        self.input_sample.update(totals)
+        below = totals < ranges[:, 0]
+        above = totals > ranges[:, 1]
+        self.below_range += below.sum(axis=0)
+        self.above_range += above.sum(axis=0)
+        self.extrapolated += int((below | above).any(axis=1).sum())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._fold()
+            count = self.inputs.count
+            residual_q = self.residual_sample.quantiles()
+            residual_recent_q = self.residual_sample.quantiles(recent=True)
+            input_q = self.input_sample.quantiles()
+            input_recent_q = self.input_sample.quantiles(recent=True)
+
+            def quantile_dict(q, column):
+                return None if q is None else {f"p{int(p * 100)}": float(q[i, column]) for i, p in enumerate(QUANTILES)}
+
+            def residual_stats(column):
+                return {
+                    "mean": float(self.residuals.mean[column]) if count else None,
+                    "std": float(self.residuals.std()[column]) if count else None,
+                    "min": float(self.residuals.min[column]) if count else None,
+                    "max": float(self.residuals.max[column]) if count else None,
+                    "quantiles": quantile_dict(residual_q, column),
+                    "recent_quantiles": quantile_dict(residual_recent_q, column)
+                }
+
+            return {
+                "enabled": self.enabled,
+                "observations": count,
+                "extrapolated": self.extrapolated,
+                "extrapolation_rate": self.extrapolated / count if count else 0,
+                "residual": residual_stats(0),             # model total minus direct sum, kg CO₂
+                "relative_residual": residual_stats(1),    # as a fraction of the direct sum
+                "features": {
+                    feature: {
+                        "training_range": self.ranges[i].tolist() if self.ranges is not None else None,
+                        "mean": float(self.inputs.mean[i]) if count else None,
+                        "std": float(self.inputs.std()[i]) if count else None,
+                        "min": float(self.inputs.min[i]) if count else None,
+                        "max": float(self.inputs.max[i]) if count else None,
+                        "below_range": int(self.below_range[i]),
+                        "above_range": int(self.above_range[i]),
+                        "out_of_range_rate": float(self.below_range[i] + self.above_range[i]) / count if count else 0,
+                        "quantiles": quantile_dict(input_q, i),
+                        "recent_quantiles": quantile_dict(input_recent_q, i)
+                    }
+                    for i, feature in enumerate(self.features)
+                }
+            }
+
+
+# Create singleton instance
+drift_monitor = DriftMonitor(
+    list(DEFAULT_FEATURE_RANGES),
+    reservoir_size=int(os.environ.get("CARBON_DRIFT_RESERVOIR_SIZE", "4096")),
+    enabled=os.environ.get("CARBON_DRIFT_MONITOR_ENABLED", "1") != "0"
+)
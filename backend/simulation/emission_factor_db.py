@@ -0,0 +1,117 @@
+"""
+Emission Factor Database
+Region-, activity- and year-specific emission factors behind a dense array index
+"""
+
+import os
+import csv
+import hashlib
+import numpy as np
+from typing import Dict, List, Optional, Sequence
+
+# Activity columns, in the same order as the model features
+ACTIVITY_FIELDS = [
+    'energy_usage',
+    'fuel_consumption',
+    'industrial_output',
+    'waste_generated',
+    'transport_distance'
+]
+
+# Region used when a department does not name one; always carries the base EMISSION_FACTORS
+GLOBAL_REGION = "GLOBAL"
+
+
+class UnknownRegionError(ValueError):
+    """Raised when a department names a region that is not in the database"""
+
+
+class EmissionFactorDatabase:
+    """
+    Factors held in one (regions, years, activities) array. Gaps are filled
+    when the database is built: a missing year takes the closest earlier
+    year of the same region (or the first later one), and a region with no
+    value for an activity falls back to the global factor. Every lookup is
+    then a single array gather.
+    """
+
+    def __init__(self, rows: List[Dict[str, str]], global_factors: Sequence[float], source: str = ""):
+        years = sorted({int(row['year']) for row in rows}) or [0]
+        self.min_year, self.max_year = years[0], years[-1]
+        self.regions = [GLOBAL_REGION] + sorted({row['region'] for row in rows} - {GLOBAL_REGION})
+        self.region_index = {region: i for i, region in enumerate(self.regions)}
+        self.global_factors = np.array(global_factors, dtype=float)
+
+        n_years = self.max_year - self.min_year + 1
+        factors = np.full((len(self.regions), n_years, len(ACTIVITY_FIELDS)), np.nan)
+        activity_index = {activity: i for i, activity in enumerate(ACTIVITY_FIELDS)}
+        for row in rows:
+            if row['region'] == GLOBAL_REGION:
+                continue
+            if row['activity'] not in activity_index:
+                raise ValueError(f"Unknown activity '{row['activity']}' in emission factor database")
+            factors[
+                self.region_index[row['region']],
+                int(row['year']) - self.min_year,
+                activity_index[row['activity']]
+            ] = float(row['factor'])
+
+        self.factors = _fill_gaps(factors, self.global_factors)
+        self.entry_count = len(rows)
+        self.source = source
+
+    @property
+    def version(self) -> str:
+        """Content hash of the filled factor table"""
+        digest = hashlib.sha256(self.factors.tobytes())
+        digest.update("|".join(self.regions).encode("utf-8"))
+        digest.update(str(self.min_year).encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def region_codes(self, regions: Sequence[Optional[str]]) -> np.ndarray:
+        """Region names to row indexes; None maps to the global region"""
+        unique, inverse = np.unique(np.array([region or GLOBAL_REGION for region in regions], dtype=object),
+                                    return_inverse=True)
+        codes = np.empty(len(unique), dtype=np.intp)
+        for i, region in enumerate(unique):
+            if region not in self.region_index:
+                raise UnknownRegionError(f"Unknown region '{region}'")
+            codes[i] = self.region_index[region]
+        return codes[inverse]
+
+    def year_offsets(self, years: Sequence[Optional[int]]) -> np.ndarray:
+        """Years to column indexes; None means the latest year, out-of-range years are clamped"""
+        values = np.array([self.max_year if year is None else year for year in years], dtype=np.int64)
+        return np.clip(values, self.min_year, self.max_year) - self.min_year
+
+    def gather(self, regions: Sequence[Optional[str]], years: Sequence[Optional[int]]) -> np.ndarray:
+        """(rows, activities) factor matrix for per-row regions and years"""
+        return self.factors[self.region_codes(regions), self.year_offsets(years)]
+
+    def lookup(self, region: Optional[str] = None, year: Optional[int] = None) -> np.ndarray:
+        return self.gather([region], [year])[0]
+
+
+def _fill_gaps(factors: np.ndarray, global_factors: np.ndarray) -> np.ndarray:
+    n_regions, n_years, _ = factors.shape
+    for region in range(n_regions):
+        for year in range(1, n_years):
+            missing = np.isnan(factors[region, year])
+            factors[region, year, missing] = factors[region, year - 1, missing]
+        for year in range(n_years - 2, -1, -1):
+            missing = np.isnan(factors[region, year])
+            factors[region, year, missing] = factors[region, year + 1, missing]
+
+    factors[0] = global_factors
+    missing = np.isnan(factors)
+    factors[missing] = np.broadcast_to(global_factors, factors.shape)[missing]
+    return factors
+
+
+def load_factor_database(global_factors: Sequence[float], path: str) -> EmissionFactorDatabase:
+    """Read a region,activity,year,factor CSV into an EmissionFactorDatabase"""
+    rows = []
+    if os.path.exists(path):
+        with open(path, 'r', newline='') as f:
+            rows = list(csv.DictReader(f))
+    return EmissionFactorDatabase(rows, global_factors, source=path)
@@ -0,0 +1,179 @@
+"""
+Emission Factor Sets
+Versioned emission factor files, watched and swapped in memory without a restart
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import numpy as np
+from typing import Any, Dict, Optional
+
+from .emission_factor_db import EmissionFactorDatabase, load_factor_database
+
+logger = logging.getLogger(__name__)
+
+# Sets live in <FACTOR_SET_DIR>/<version>.json and LATEST names the active version.
+# The shipped sample-regional set holds illustrative regional factors with no
+# source; it is only active when selected explicitly
+FACTOR_SET_DIR = os.environ.get(
+    "CARBON_FACTOR_SET_DIR",
+    os.path.join(os.path.dirname(__file__), "emission_factor_sets")
+)
+LATEST_FILENAME = "LATEST"
+
+# Version reported when no factor set file is available
+BUILTIN_VERSION = "builtin"
+
+
+class FactorSetError(Exception):
+    """Raised when a factor set file is missing or malformed"""
+
+
+class FactorSet:
+    """
+    One immutable set of global and regional factors. A request reads the
+    active set once and uses that object throughout, so a swap never mixes
+    two versions in one response.
+    """
+
+    def __init__(self, version: str, factors: Dict[str, float],
+                 database: Optional[EmissionFactorDatabase] = None, source: Optional[str] = None):
+        self.version = version
+        self.factors = dict(factors)
+        self.vector = np.array(list(self.factors.values()), dtype=float)
+        self.vector.flags.writeable = False
+        self.database = database if database is not None else EmissionFactorDatabase([], self.vector)
+        self.source = source
+        # Content hash, so an in-place edit of a version is still noticed by the caches
+        self.fingerprint = hashlib.sha256(
+            (json.dumps(self.factors, sort_keys=True) + self.database.version).encode("utf-8")
+        ).hexdigest()[:12]
+
+
+def load_factor_set(version: str, features, set_dir: str = FACTOR_SET_DIR) -> FactorSet:
+    """Read <set_dir>/<version>.json and its optional regional factor CSV"""
+    path = os.path.join(set_dir, f"{version}.json")
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise FactorSetError(f"Cannot read emission factor set '{version}': {e}") from e
+
+    factors = data.get("emission_factors") or {}
+    if list(factors) != list(features):
+        raise FactorSetError(
+            f"Emission factor set '{version}' must define exactly {list(features)} in that order"
+        )
+    factors = {name: float(value) for name, value in factors.items()}
+
+    database = None
+    if data.get("regional_factors"):
+        regional_path = os.path.join(set_dir, data["regional_factors"])
+        if not os.path.exists(regional_path):
+            raise FactorSetError(f"Regional factors '{data['regional_factors']}' of set '{version}' not found")
+        database = load_factor_database(list(factors.values()), regional_path)
+
+    return FactorSet(data.get("version", version), factors, database, source=path)
+
+
+class FactorSetRegistry:
+    """
+    Holds the active FactorSet. A daemon thread polls the set directory and
+    swaps in a new set by rebinding `current`; readers never take a lock or
+    touch the filesystem.
+    """
+
+    def __init__(self, default_factors: Dict[str, float], set_dir: str = FACTOR_SET_DIR,
+                 version: Optional[str] = None, poll_seconds: float = 5.0):
+        self.set_dir = set_dir
+        self.pinned_version = version or os.environ.get("CARBON_FACTOR_SET_VERSION")
+        self.poll_seconds = poll_seconds
+        self.builtin = FactorSet(BUILTIN_VERSION, default_factors)
+        self.current = self.builtin
+        self.reloads = 0
+        self.last_error = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def _directory_signature(self):
+        try:
+            with os.scandir(self.set_dir) as entries:
+                return tuple(sorted(
+                    (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                    for entry in entries if entry.is_file()
+                ))
+        except FileNotFoundError:
+            return ()
+
+    def _resolve_version(self) -> Optional[str]:
+        if self.pinned_version:
+            return self.pinned_version
+        latest_path = os.path.join(self.set_dir, LATEST_FILENAME)
+        if os.path.exists(latest_path):
+            with open(latest_path, 'r') as f:
+                return f.read().strip() or None
+        return None
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the active set if the directory changed since the last check.
+        Returns True when a different set was swapped in. On error the
+        current set stays active and FactorSetError is raised.
+        """
+        with self._lock:
+            signature = self._directory_signature()
+            if not force and signature == self._signature:
+                return False
+            # A broken set is reported once, not on every poll, until the directory changes again
+            self._signature = signature
+            try:
+                version = self._resolve_version()
+                factor_set = (
+                    load_factor_set(version, self.builtin.factors, self.set_dir) if version else self.builtin
+                )
+            except FactorSetError as e:
+                self.last_error = str(e)
+                raise
+            self.last_error = None
+            if (factor_set.version, factor_set.fingerprint) == (self.current.version, self.current.fingerprint):
+                return False
+
+            self.current = factor_set
+            self.reloads += 1
+            logger.info(f"Activated emission factor set {factor_set.version} ({factor_set.fingerprint})")
+            return True
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.reload()
+            except FactorSetError as e:
+                logger.error(f"Keeping emission factor set {self.current.version}: {e}")
+
+    def start_watching(self) -> threading.Thread:
+        """Poll the set directory in a daemon thread until stop_watching()"""
+        if self._watcher is None or not self._watcher.is_alive():
+            self._stop.clear()
+            self._watcher = threading.Thread(target=self._watch, name="emission-factor-watcher", daemon=True)
+            self._watcher.start()
+        return self._watcher
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "version": self.current.version,
+            "fingerprint": self.current.fingerprint,
+            "source": self.current.source,
+            "pinned_version": self.pinned_version,
+            "reloads": self.reloads,
+            "watching": self._watcher is not None and self._watcher.is_alive(),
+            "poll_seconds": self.poll_seconds,
+            "last_error": self.last_error
+        }
@@ -0,0 +1,126 @@
+"""
+Forest Compiler
+Flattens the trained random forests into contiguous arrays for vectorized evaluation
+"""
+
+import os
+import json
+import numpy as np
+from typing import List, Optional
+
+# Node arrays persisted as plain .npy files so workers can memory-map and share them
+ARRAY_NAMES = ["feature", "threshold", "children", "value", "roots", "tree_outputs"]
+LAYOUT_FILENAME = "layout.json"
+
+
+class CompiledForest:
+    """
+    All trees of all outputs packed into flat node arrays. Evaluation walks
+    every (sample, tree) pair one level per step with NumPy gathers, so a
+    batch costs max_depth array operations instead of one sklearn call per tree.
+    Leaves point to themselves, which lets shallower trees idle until the
+    deepest one finishes.
+    """
+
+    def __init__(self, forests: Optional[List] = None):
+        if forests is None:
+            return
+
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        roots, tree_outputs = [], []
+        offset = 0
+        max_depth = 0
+
+        for output_index, forest in enumerate(forests):
+            for estimator in forest.estimators_:
+                tree = estimator.tree_
+                n_nodes = tree.node_count
+                node_ids = np.arange(n_nodes)
+                is_leaf = tree.children_left == -1
+
+                features.append(np.where(is_leaf, 0, tree.feature))
+                thresholds.append(tree.threshold)
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+                rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+                values.append(tree.value[:, 0, 0])
+                roots.append(offset)
+                tree_outputs.append(output_index)
+
+                max_depth = max(max_depth, tree.max_depth)
+                offset += n_nodes
+
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds).astype(np.float64)
+        # children[2 * node] is the left child, children[2 * node + 1] the right one
+        self.children = np.stack([np.concatenate(lefts), np.concatenate(rights)], axis=1).ravel().astype(np.intp)
+        self.value = np.concatenate(values).astype(np.float64)
+        self.roots = np.array(roots, dtype=np.intp)
+        self.tree_outputs = np.array(tree_outputs, dtype=np.intp)
+        self.n_outputs = len(forests)
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_multioutput(cls, model) -> "CompiledForest":
+        """Compile a MultiOutputRegressor of RandomForestRegressors"""
+        return cls(list(model.estimators_))
+
+    def save(self, directory: str):
+        """Write the node arrays uncompressed so they can be memory-mapped"""
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, LAYOUT_FILENAME), 'w') as f:
+            json.dump({"n_outputs": self.n_outputs, "max_depth": self.max_depth}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = "r") -> "CompiledForest":
+        """
+        Load saved node arrays. With mmap_mode the arrays are backed by the
+        page cache, so every process mapping the same files shares one copy.
+        """
+        compiled = cls()
+        for name in ARRAY_NAMES:
+            setattr(compiled, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode))
+        with open(os.path.join(directory, LAYOUT_FILENAME), 'r') as f:
+            layout = json.load(f)
+        compiled.n_outputs = layout["n_outputs"]
+        compiled.max_depth = layout["max_depth"]
+        return compiled
+
+    @property
+    def node_count(self) -> int:
+        return len(self.value)
+
+    def tree_predictions(self, X: np.ndarray) -> np.ndarray:
+        """Leaf value reached by every tree for every sample, shape (samples, trees)"""
+        # sklearn compares float32 inputs against float64 thresholds; do the same for parity
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.tile(self.roots, (len(X), 1))
+
+        for _ in range(self.max_depth):
+            go_right = ~(flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + go_right]
+
+        return self.value[nodes]
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Forest means per output, shape (samples, outputs)"""
+        return self.predict_from_trees(self.tree_predictions(X))
+
+    def predict_from_trees(self, per_tree: np.ndarray) -> np.ndarray:
+        result = np.empty((len(per_tree), self.n_outputs))
+        for output_index in range(self.n_outputs):
+            columns = per_tree[:, self.tree_outputs == output_index]
+            # cumsum adds tree by tree like sklearn's accumulation, keeping results bit-identical
+            result[:, output_index] = np.cumsum(columns, axis=1)[:, -1] / columns.shape[1]
+        return result
+
+    def percentiles_from_trees(self, per_tree: np.ndarray, percentiles: List[float]) -> np.ndarray:
+        """Percentiles across the trees of each output, shape (samples, outputs, percentiles)"""
+        result = np.empty((len(per_tree), self.n_outputs, len(percentiles)))
+        for output_index in range(self.n_outputs):
+            columns = per_tree[:, self.tree_outputs == output_index]
+            result[:, output_index, :] = np.percentile(columns, percentiles, axis=1).T
+        return result
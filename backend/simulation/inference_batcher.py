@@ -0,0 +1,153 @@
+"""
+Inference Batcher
+Micro-batching of concurrent quantification requests into one model predict call
+"""
+
+import os
+import time
+import asyncio
+import numpy as np
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List
+
+from .inference_executor import inference_executor
+
+# Upper bounds of the batch size histogram buckets (rows per predict call)
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class BatcherMetrics:
+    """Running counters for batch sizes and time spent waiting in the queue"""
+
+    def __init__(self, sample_size: int = 1024):
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self.max_batch_rows = 0
+        self.batch_size_histogram = {bucket: 0 for bucket in BATCH_SIZE_BUCKETS}
+        self.batch_size_overflow = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self._recent_waits_ms = deque(maxlen=sample_size)
+
+    def record_batch(self, rows: int, requests: int, waits_ms: List[float]):
+        self.batches += 1
+        self.requests += requests
+        self.rows += rows
+        self.max_batch_rows = max(self.max_batch_rows, rows)
+
+        for bucket in BATCH_SIZE_BUCKETS:
+            if rows <= bucket:
+                self.batch_size_histogram[bucket] += 1
+                break
+        else:
+            self.batch_size_overflow += 1
+
+        for wait in waits_ms:
+            self.total_wait_ms += wait
+            self.max_wait_ms = max(self.max_wait_ms, wait)
+            self._recent_waits_ms.append(wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        recent = np.array(self._recent_waits_ms) if self._recent_waits_ms else np.zeros(1)
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "rows": self.rows,
+            "mean_batch_rows": round(self.rows / self.batches, 2) if self.batches else 0,
+            "max_batch_rows": self.max_batch_rows,
+            "batch_size_histogram": {
+                **{f"<={bucket}": count for bucket, count in self.batch_size_histogram.items()},
+                f">{BATCH_SIZE_BUCKETS[-1]}": self.batch_size_overflow
+            },
+            "queue_wait_ms": {
+                "mean": round(self.total_wait_ms / self.requests, 3) if self.requests else 0,
+                "p50": round(float(np.percentile(recent, 50)), 3),
+                "p99": round(float(np.percentile(recent, 99)), 3),
+                "max": round(self.max_wait_ms, 3)
+            }
+        }
+
+
+class MicroBatcher:
+    """
+    Collects rows submitted within max_wait_ms (or until max_batch_size rows
+    are pending) and awaits predict_fn once on the stacked rows. Each caller
+    gets back the prediction rows for its own submission.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], Awaitable[np.ndarray]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0, enabled: bool = True):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.enabled = enabled
+        self.metrics = BatcherMetrics()
+        self._pending = []
+        self._pending_rows = 0
+        self._timer = None
+        # The event loop only keeps weak references to tasks; in-flight batches are held here
+        self._tasks = set()
+
+    async def submit(self, rows: np.ndarray) -> np.ndarray:
+        """Queue rows for the next batch and wait for their predictions"""
+        if not self.enabled:
+            self.metrics.record_batch(len(rows), 1, [0.0])
+            return await self.predict_fn(rows)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((rows, future, time.perf_counter()))
+        self._pending_rows += len(rows)
+
+        if self._pending_rows >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _take_pending(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        return pending
+
+    def _flush(self):
+        pending = self._take_pending()
+        if pending:
+            task = asyncio.get_running_loop().create_task(self._run_batch(pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, pending):
+        flushed_at = time.perf_counter()
+        stacked = np.concatenate([rows for rows, _, _ in pending])
+        self.metrics.record_batch(
+            len(stacked), len(pending),
+            [(flushed_at - enqueued_at) * 1000 for _, _, enqueued_at in pending]
+        )
+
+        try:
+            predictions = await self.predict_fn(stacked)
+        except Exception as e:
+            for _, future, _ in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for rows, future, _ in pending:
+            if not future.done():
+                future.set_result(predictions[offset:offset + len(rows)])
+            offset += len(rows)
+
+
+# Create singleton instance
+inference_batcher = MicroBatcher(
+    inference_executor.predict_totals,
+    max_batch_size=int(os.environ.get("CARBON_BATCH_MAX_SIZE", "64")),
+    max_wait_ms=float(os.environ.get("CARBON_BATCH_MAX_WAIT_MS", "2")),
+    enabled=os.environ.get("CARBON_BATCH_ENABLED", "1") != "0"
+)
@@ -0,0 +1,124 @@
+"""
+Inference Executor
+Bounded executor that keeps CPU-bound quantification work off the asyncio event loop
+"""
+
+import os
+import asyncio
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .carbon_quantification_model import carbon_model
+
+EXECUTOR_KIND_THREAD = "thread"
+EXECUTOR_KIND_PROCESS = "process"
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the executor already has max_pending jobs queued or running"""
+
+
+def _init_worker(version: Optional[str]):
+    # Runs once per worker process; with fork the parent's loaded model is reused
+    carbon_model.ensure_version(version)
+
+
+def _worker_predict_totals(totals: np.ndarray) -> np.ndarray:
+    return carbon_model.predict_totals(totals)
+
+
+class InferenceExecutor:
+    """
+    Runs quantification work on a dedicated pool. Model predictions go to a
+    thread pool by default or to a process pool with the model preloaded in
+    every worker; other CPU work (packing, response building) always uses
+    the thread pool. Submissions beyond max_pending are rejected.
+
+    The process pool serves the model version it was started with. Once
+    the model is swapped or rolled back, the next prediction replaces it
+    with a pool on the new version; predictions already running on the
+    old pool finish there.
+    """
+
+    def __init__(self, kind: str = EXECUTOR_KIND_THREAD, max_workers: int = 4, max_pending: int = 256):
+        if kind not in (EXECUTOR_KIND_THREAD, EXECUTOR_KIND_PROCESS):
+            raise ValueError(f"Unknown executor kind '{kind}'")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._pending = 0
+        self._thread_pool = None
+        self._process_pool = None
+        self._process_version = None
+
+    def _threads(self) -> ThreadPoolExecutor:
+        if self._thread_pool is None:
+            self._thread_pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="carbon-inference"
+            )
+        return self._thread_pool
+
+    def _processes(self) -> ProcessPoolExecutor:
+        # Only called from the event loop thread, like the pending counter
+        version = carbon_model.version
+        if self._process_pool is not None and self._process_version != version:
+            self._process_pool.shutdown(wait=False)
+            self._process_pool = None
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_init_worker,
+                initargs=(version,)
+            )
+            self._process_version = version
+        return self._process_pool
+
+    async def _submit(self, pool, fn: Callable, *args) -> Any:
+        # The counter is only touched from the event loop thread, so no lock is needed
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorBusyError(f"Inference queue is full ({self.max_pending} pending jobs)")
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        finally:
+            self._pending -= 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Run fn(*args) on the thread pool"""
+        return await self._submit(self._threads(), fn, *args)
+
+    async def predict_totals(self, totals: np.ndarray) -> np.ndarray:
+        """Run the model on stacked organization totals"""
+        if self.kind == EXECUTOR_KIND_PROCESS:
+            return await self._submit(self._processes(), _worker_predict_totals, totals)
+        return await self._submit(self._threads(), carbon_model.predict_totals, totals)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self.rejected,
+            "process_model_version": self._process_version if self._process_pool is not None else None
+        }
+
+    def shutdown(self):
+        for pool in (self._thread_pool, self._process_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._thread_pool = None
+        self._process_pool = None
+
+
+# Create singleton instance
+inference_executor = InferenceExecutor(
+    kind=os.environ.get("CARBON_EXECUTOR_KIND", EXECUTOR_KIND_THREAD),
+    max_workers=int(os.environ.get("CARBON_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_pending=int(os.environ.get("CARBON_EXECUTOR_MAX_PENDING", "256"))
+)
@@ -0,0 +1,239 @@
+"""
+Input Screening
+Vectorized range validation and outlier flags for department rows, ahead of the model
+"""
+
+import os
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from .emission_factor_db import ACTIVITY_FIELDS
+
+# Screening modes
+SCREENING_REJECT = "reject"  # invalid rows fail the request, outliers are flagged
+SCREENING_FLAG = "flag"      # everything is flagged, nothing is rejected (the default)
+SCREENING_OFF = "off"
+
+# Flag reasons, in priority order (a value gets the first that applies)
+REASON_NON_FINITE = "non_finite"
+REASON_NEGATIVE = "negative"
+REASON_IMPLAUSIBLE = "implausible"
+REASON_OUTLIER_HIGH = "outlier_high"
+REASON_OUTLIER_LOW = "outlier_low"
+REASONS = [None, REASON_NON_FINITE, REASON_NEGATIVE, REASON_IMPLAUSIBLE, REASON_OUTLIER_HIGH, REASON_OUTLIER_LOW]
+INVALID_REASONS = {REASON_NON_FINITE, REASON_NEGATIVE, REASON_IMPLAUSIBLE}
+INVALID_CODES = sorted(REASONS.index(reason) for reason in INVALID_REASONS)
+
+# Rows per block when comparing against per-column bounds (see _outside)
+BLOCK_ROWS = 256
+
+# Rough upper bounds for one department and period (orders of magnitude, not sourced
+# limits); only enforced when CARBON_SCREENING_MAXIMUMS=1
+PLAUSIBLE_MAXIMUMS = {
+    'energy_usage': 1e7,          # MWh, a very large smelter
+    'fuel_consumption': 1e9,      # L
+    'industrial_output': 1e8,     # tons
+    'waste_generated': 1e8,       # tons
+    'transport_distance': 1e10    # km
+}
+
+
+class InputScreeningError(ValueError):
+    """Raised in reject mode when department values are out of range"""
+
+
+class ScreeningResult:
+    """Flagged cells of a department matrix: row, column and reason code (index into REASONS)"""
+
+    def __init__(self, rows: np.ndarray, columns: np.ndarray, codes: np.ndarray):
+        self.rows = rows
+        self.columns = columns
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.rows)
+
+    def reasons(self) -> List[str]:
+        return [REASONS[code] for code in self.codes.tolist()]
+
+
+def _outside(values: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """
+    Cells not in [low, high] per column, where 0 always passes (the
+    activity does not apply) and NaN never does. Bounds are pre-tiled to
+    BLOCK_ROWS rows: broadcasting a 5-wide bound row makes NumPy loop over
+    5 elements at a time, comparing whole row blocks is several times faster.
+    """
+    n_features = values.shape[1]
+    outside = np.empty(values.shape, dtype=bool)
+    split = len(values) // BLOCK_ROWS * BLOCK_ROWS
+    for part, out, lo, hi in (
+        (values[:split].reshape(-1, BLOCK_ROWS * n_features), outside[:split].reshape(-1, BLOCK_ROWS * n_features),
+         np.tile(low, BLOCK_ROWS), np.tile(high, BLOCK_ROWS)),
+        (values[split:], outside[split:], low, high)
+    ):
+        np.less_equal(part, hi, out=out)
+        in_low = part >= lo
+        in_low |= part == 0
+        out &= in_low
+        np.invert(out, out=out)
+    return outside
+
+
+class InputScreener:
+    """
+    Checks every value of a (rows, activities) department matrix against
+    hard limits (finite, non-negative and, optionally, below a plausible
+    maximum) and
+    against IQR fences of a rolling history of previously accepted rows.
+    Activity data is heavy tailed, so the fences are fitted on log1p
+    values and mapped back to raw units; screening a request is then a few
+    comparisons per cell.
+
+    Rows join the history only once their request passed check(). Rows
+    with an invalid value never do; rows that are only outliers do, so
+    that the fences follow a real shift in the submitted data instead of
+    flagging it forever (the quartiles are robust to the odd extreme row).
+    """
+
+    def __init__(self, features: List[str], maximums: Optional[Dict[str, float]] = None, mode: str = SCREENING_FLAG,
+                 history_size: int = 8192, min_history: int = 256, refresh_rows: int = 2048, iqr_k: float = 3.0):
+        if mode not in (SCREENING_REJECT, SCREENING_FLAG, SCREENING_OFF):
+            raise ValueError(f"Unknown screening mode '{mode}'")
+        self.features = features
+        # Without maximums only non-finite and negative values are invalid
+        self.maximums = np.array([maximums[feature] if maximums else np.inf for feature in features], dtype=float)
+        self.maximums_enabled = bool(maximums)
+        self.mode = mode
+        self.history_size = history_size
+        self.min_history = min_history
+        self.refresh_rows = refresh_rows
+        self.iqr_k = iqr_k
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != SCREENING_OFF
+
+    def reset(self):
+        with self._lock:
+            self.history = np.empty((self.history_size, len(self.features)))
+            self.history_filled = 0
+            self.history_next = 0
+            self.rows_since_refresh = 0
+            self.lower = None
+            self.upper = None
+            self.screened = 0
+            self.flagged = np.zeros(len(REASONS), dtype=np.int64)
+
+    def screen(self, values: np.ndarray) -> Optional[ScreeningResult]:
+        """Flag the cells of values; None when screening is off. The history is not updated"""
+        if not self.enabled:
+            return None
+        values = np.ascontiguousarray(values, dtype=float)
+        lower, upper = self.lower, self.upper
+
+        # One pass finds the cells outside every limit; only those few are classified
+        outside = _outside(
+            values,
+            np.zeros(len(self.features)) if lower is None else np.maximum(lower, 0),
+            self.maximums if upper is None else np.minimum(upper, self.maximums)
+        )
+        flat = np.flatnonzero(outside.ravel())
+        rows, columns = np.divmod(flat, len(self.features))
+
+        cells = values[rows, columns]
+        codes = np.full(len(cells), REASONS.index(REASON_OUTLIER_LOW), dtype=np.int8)
+        if upper is not None:
+            codes[cells > upper[columns]] = REASONS.index(REASON_OUTLIER_HIGH)
+        # Later assignments win, so the hard limits override the outlier fences
+        codes[cells > self.maximums[columns]] = REASONS.index(REASON_IMPLAUSIBLE)
+        codes[cells < 0] = REASONS.index(REASON_NEGATIVE)
+        codes[~np.isfinite(cells)] = REASONS.index(REASON_NON_FINITE)
+
+        result = ScreeningResult(rows, columns, codes)
+        with self._lock:
+            self.screened += len(values)
+            self.flagged += np.bincount(codes, minlength=len(REASONS))
+        return result
+
+    def accepted_rows(self, values: np.ndarray, result: ScreeningResult) -> np.ndarray:
+        """The rows of a screened matrix that may join the history: the latest ones without an invalid value"""
+        valid = np.ones(len(values), dtype=bool)
+        valid[result.rows[np.isin(result.codes, INVALID_CODES)]] = False
+        # Only the latest history_size rows can still be in the history
+        tail = slice(max(0, len(values) - self.history_size), len(values))
+        return np.asarray(values, dtype=float)[tail][valid[tail]]
+
+    def check(self, result: Optional[ScreeningResult], names: List[str]):
+        """In reject mode, raise for the invalid cells of a screening result; names label its rows"""
+        if result is None or self.mode != SCREENING_REJECT:
+            return
+        invalid = [i for i, reason in enumerate(result.reasons()) if reason in INVALID_REASONS]
+        if invalid:
+            details = "; ".join(
+                f"department '{names[result.rows[i]]}' has {result.reasons()[i].replace('_', '-')} "
+                f"{self.features[result.columns[i]]}"
+                for i in invalid[:5]
+            )
+            more = f" (and {len(invalid) - 5} more)" if len(invalid) > 5 else ""
+            raise InputScreeningError(f"Invalid department values: {details}{more}")
+
+    def remember(self, rows: np.ndarray):
+        """Add accepted rows to the history, refitting the fences every refresh_rows rows"""
+        if not self.enabled or not len(rows):
+            return
+        with self._lock:
+            tail = rows[-self.history_size:]
+            slots = (self.history_next + np.arange(len(tail))) % self.history_size
+            self.history[slots] = tail
+            self.history_next = (self.history_next + len(tail)) % self.history_size
+            self.history_filled = min(self.history_size, self.history_filled + len(tail))
+            self.rows_since_refresh += len(rows)
+            if self.history_filled >= self.min_history and (
+                    self.lower is None or self.rows_since_refresh >= self.refresh_rows):
+                self._refresh_fences()
+
+    def _refresh_fences(self):
+        logged = np.log1p(self.history[:self.history_filled])
+        q1, q3 = np.quantile(logged, [0.25, 0.75], axis=0)
+        spread = self.iqr_k * (q3 - q1)
+        # Values and fences compare the same in raw units, which saves a log per cell
+        self.lower = np.expm1(q1 - spread)
+        self.upper = np.expm1(q3 + spread)
+        self.rows_since_refresh = 0
+
+    def fences(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Current outlier fences, or None before the first refit"""
+        with self._lock:
+            return None if self.lower is None else (self.lower, self.upper)
+
+    def use_fences(self, fences: Optional[Tuple[np.ndarray, np.ndarray]]):
+        """Screen against fences fitted elsewhere (a job worker has no history of its own)"""
+        with self._lock:
+            self.lower, self.upper = fences if fences is not None else (None, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "screened": self.screened,
+                "flagged": {reason: int(count) for reason, count in zip(REASONS[1:], self.flagged[1:].tolist())},
+                "history_rows": self.history_filled,
+                "fences": None if self.lower is None else {
+                    feature: [float(low), float(high)]
+                    for feature, low, high in zip(self.features, self.lower, self.upper)
+                },
+                "plausible_maximums": dict(zip(self.features, self.maximums.tolist())) if self.maximums_enabled else None
+            }
+
+
+# Create singleton instance
+input_screener = InputScreener(
+    ACTIVITY_FIELDS,
+    PLAUSIBLE_MAXIMUMS if os.environ.get("CARBON_SCREENING_MAXIMUMS", "0") == "1" else None,
+    mode=os.environ.get("CARBON_SCREENING_MODE", SCREENING_FLAG),
+    history_size=int(os.environ.get("CARBON_SCREENING_HISTORY", "8192"))
+)
@@ -0,0 +1,190 @@
+"""
+Model Artifacts
+Versioned storage for the trained carbon quantification model and scaler
+"""
+
+import os
+import json
+import joblib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .forest_compiler import CompiledForest
+from .model_distillation import LinearSurrogate
+
+# Artifacts live in <ARTIFACT_DIR>/<version>/ and LATEST names the default version
+ARTIFACT_DIR = os.environ.get(
+    "CARBON_MODEL_DIR",
+    os.path.join(os.path.dirname(__file__), "artifacts")
+)
+MODEL_FILENAME = "carbon_model.joblib"
+SCALER_FILENAME = "carbon_scaler.joblib"
+METADATA_FILENAME = "metadata.json"
+COMPILED_DIRNAME = "compiled_forest"
+COMPACT_FILENAME = "compact_model.json"
+LATEST_FILENAME = "LATEST"
+
+# Unversioned files from before the build pipeline existed
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), MODEL_FILENAME)
+LEGACY_SCALER_PATH = os.path.join(os.path.dirname(__file__), SCALER_FILENAME)
+LEGACY_VERSION = "legacy"
+
+
+class ArtifactNotFoundError(Exception):
+    """Raised when no trained model artifact is available to load"""
+
+
+def new_version() -> str:
+    """Version identifier for a freshly built artifact"""
+    return datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+
+
+def _write_atomic(path: str, text: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_artifacts(model, scaler, metadata: Dict[str, Any],
+                   artifact_dir: str = ARTIFACT_DIR, version: Optional[str] = None,
+                   make_latest: bool = True, compiled=None, compact=None) -> str:
+    """
+    Write model, scaler and metadata as a new version and return the version.
+    Files are stored uncompressed; a compiled forest is saved alongside as
+    raw arrays for memory-mapped loading, and a compact surrogate as JSON.
+    """
+    version = version or new_version()
+    version_dir = os.path.join(artifact_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    joblib.dump(model, os.path.join(version_dir, MODEL_FILENAME))
+    joblib.dump(scaler, os.path.join(version_dir, SCALER_FILENAME))
+    if compiled is not None:
+        compiled.save(os.path.join(version_dir, COMPILED_DIRNAME))
+    if compact is not None:
+        _write_atomic(os.path.join(version_dir, COMPACT_FILENAME), json.dumps(compact.to_dict()))
+    _write_atomic(
+        os.path.join(version_dir, METADATA_FILENAME),
+        json.dumps({**metadata, "version": version}, indent=2)
+    )
+
+    # Only point LATEST at the version once all of its files are in place
+    if make_latest:
+        set_latest_version(version, artifact_dir)
+    return version
+
+
+def set_latest_version(version: str, artifact_dir: str = ARTIFACT_DIR):
+    """Point LATEST at an existing version"""
+    if not os.path.isdir(os.path.join(artifact_dir, version)):
+        raise ArtifactNotFoundError(f"Model artifact version '{version}' not found in {artifact_dir}")
+    _write_atomic(os.path.join(artifact_dir, LATEST_FILENAME), version)
+
+
+def list_versions(artifact_dir: str = ARTIFACT_DIR) -> List[str]:
+    """Built artifact versions, oldest first"""
+    if not os.path.isdir(artifact_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(artifact_dir)
+        if os.path.isfile(os.path.join(artifact_dir, name, METADATA_FILENAME))
+    )
+
+
+def resolve_version(artifact_dir: str = ARTIFACT_DIR, version: Optional[str] = None) -> Optional[str]:
+    """Pick the requested version, the CARBON_MODEL_VERSION pin, or LATEST"""
+    version = version or os.environ.get("CARBON_MODEL_VERSION")
+    if version:
+        return version
+
+    latest_path = os.path.join(artifact_dir, LATEST_FILENAME)
+    if os.path.exists(latest_path):
+        with open(latest_path, 'r') as f:
+            return f.read().strip() or None
+    return None
+
+
+def load_artifacts(version: Optional[str] = None,
+                   artifact_dir: str = ARTIFACT_DIR) -> Tuple[Any, Any, Dict[str, Any]]:
+    """
+    Load (model, scaler, metadata) for a version. Falls back to the legacy
+    unversioned files when no versioned artifact has been built.
+    """
+    resolved = resolve_version(artifact_dir, version)
+
+    if resolved:
+        version_dir = os.path.join(artifact_dir, resolved)
+        model_path = os.path.join(version_dir, MODEL_FILENAME)
+        scaler_path = os.path.join(version_dir, SCALER_FILENAME)
+        if not (os.path.exists(model_path) and os.path.exists(scaler_path)):
+            raise ArtifactNotFoundError(f"Model artifact version '{resolved}' not found in {artifact_dir}")
+        return joblib.load(model_path), joblib.load(scaler_path), _read_metadata(version_dir, resolved)
+
+    if os.path.exists(LEGACY_MODEL_PATH) and os.path.exists(LEGACY_SCALER_PATH):
+        return joblib.load(LEGACY_MODEL_PATH), joblib.load(LEGACY_SCALER_PATH), {"version": LEGACY_VERSION}
+
+    raise ArtifactNotFoundError(
+        "No carbon model artifact found. Build one with: python -m simulation.build_carbon_model"
+    )
+
+
+def load_shared_artifacts(version: Optional[str] = None,
+                          artifact_dir: str = ARTIFACT_DIR) -> Tuple[Any, Any, Dict[str, Any]]:
+    """
+    Load (compiled forest, scaler, metadata) with the forest arrays
+    memory-mapped read-only, so worker processes share the same pages
+    instead of each holding a private copy of the sklearn trees.
+    """
+    resolved = resolve_version(artifact_dir, version)
+    if not resolved:
+        raise ArtifactNotFoundError(
+            "Shared model loading needs a versioned artifact. Build one with: python -m simulation.build_carbon_model"
+        )
+
+    version_dir = os.path.join(artifact_dir, resolved)
+    compiled_dir = os.path.join(version_dir, COMPILED_DIRNAME)
+    scaler_path = os.path.join(version_dir, SCALER_FILENAME)
+    if not (os.path.isdir(compiled_dir) and os.path.exists(scaler_path)):
+        raise ArtifactNotFoundError(
+            f"Model artifact version '{resolved}' has no compiled forest; rebuild it with python -m simulation.build_carbon_model"
+        )
+    return CompiledForest.load(compiled_dir, mmap_mode="r"), joblib.load(scaler_path), _read_metadata(version_dir, resolved)
+
+
+def load_compact_artifacts(version: Optional[str] = None,
+                           artifact_dir: str = ARTIFACT_DIR) -> Tuple[Any, Any, Dict[str, Any]]:
+    """Load (compact surrogate, scaler, metadata) without touching the forest"""
+    resolved = resolve_version(artifact_dir, version)
+    if not resolved:
+        raise ArtifactNotFoundError(
+            "The compact model needs a versioned artifact. Build one with: python -m simulation.build_carbon_model"
+        )
+
+    version_dir = os.path.join(artifact_dir, resolved)
+    compact_path = os.path.join(version_dir, COMPACT_FILENAME)
+    scaler_path = os.path.join(version_dir, SCALER_FILENAME)
+    if not (os.path.exists(compact_path) and os.path.exists(scaler_path)):
+        raise ArtifactNotFoundError(
+            f"Model artifact version '{resolved}' has no compact model; rebuild it with python -m simulation.build_carbon_model"
+        )
+    with open(compact_path, 'r') as f:
+        compact = LinearSurrogate.from_dict(json.load(f))
+    return compact, joblib.load(scaler_path), _read_metadata(version_dir, resolved)
+
+
+def load_metadata(version: Optional[str] = None, artifact_dir: str = ARTIFACT_DIR) -> Dict[str, Any]:
+    """Metadata of a version, without loading any model files"""
+    resolved = resolve_version(artifact_dir, version)
+    if not resolved:
+        return {}
+    return _read_metadata(os.path.join(artifact_dir, resolved), resolved)
+
+
+def _read_metadata(version_dir: str, version: str) -> Dict[str, Any]:
+    metadata = {"version": version}
+    metadata_path = os.path.join(version_dir, METADATA_FILENAME)
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as f:
+            metadata.update(json.load(f))
+    return metadata
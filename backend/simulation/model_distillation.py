@@ -0,0 +1,116 @@
+"""
+Model Distillation
+Compact linear surrogate of the carbon forest, with an accuracy/latency/size report
+"""
+
+import io
+import time
+import pickle
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Batch sizes timed by the distillation report
+REPORT_BATCH_SIZES = [1, 256]
+
+
+class LinearSurrogate:
+    """
+    Multi-output linear model on the scaled features. The synthetic targets
+    are a linear emission factor sum plus multiplicative noise, so a linear
+    fit to the forest's own predictions keeps almost all of its accuracy in
+    a few dozen bytes and one matrix product.
+    """
+
+    kind = "linear"
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, features: Optional[List[str]] = None):
+        self.coef = np.asarray(coef, dtype=float)            # (outputs, features)
+        self.intercept = np.asarray(intercept, dtype=float)  # (outputs,)
+        self.features = features
+
+    @classmethod
+    def fit(cls, X_scaled: np.ndarray, y: np.ndarray, features: Optional[List[str]] = None) -> "LinearSurrogate":
+        design = np.hstack([X_scaled, np.ones((len(X_scaled), 1))])
+        solution, _, _, _ = np.linalg.lstsq(design, y, rcond=None)
+        return cls(solution[:-1].T, solution[-1], features)
+
+    def predict(self, X_scaled: np.ndarray) -> np.ndarray:
+        return np.asarray(X_scaled, dtype=float) @ self.coef.T + self.intercept
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "features": self.features,
+            "coef": self.coef.tolist(),
+            "intercept": self.intercept.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LinearSurrogate":
+        if data.get("kind") != cls.kind:
+            raise ValueError(f"Unsupported compact model kind '{data.get('kind')}'")
+        return cls(data["coef"], data["intercept"], data.get("features"))
+
+
+def distill(teacher, scaler, X: np.ndarray, features: Optional[List[str]] = None) -> LinearSurrogate:
+    """Fit the surrogate to the teacher's predictions on X (unscaled feature rows)"""
+    X_scaled = scaler.transform(X)
+    return LinearSurrogate.fit(X_scaled, teacher.predict(X_scaled), features)
+
+
+def _serialized_bytes(obj) -> int:
+    buffer = io.BytesIO()
+    pickle.dump(obj, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    return buffer.tell()
+
+
+def _median_latency_ms(predict, X: np.ndarray, repeats: int) -> float:
+    predict(X)  # warm up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - started) * 1000)
+    return float(np.median(timings))
+
+
+def _accuracy(predicted: np.ndarray, expected: np.ndarray) -> Dict[str, float]:
+    residual = predicted - expected
+    total = ((expected - expected.mean(axis=0)) ** 2).sum(axis=0)
+    return {
+        "mae": float(np.abs(residual).mean()),
+        "mape_percent": float((np.abs(residual) / np.maximum(np.abs(expected), 1e-9)).mean() * 100),
+        "r2": float(np.mean(1 - (residual ** 2).sum(axis=0) / total))
+    }
+
+
+def distillation_report(teacher, surrogate: LinearSurrogate, scaler,
+                        X_holdout: np.ndarray, y_holdout: np.ndarray, repeats: int = 50) -> Dict[str, Any]:
+    """
+    Compare teacher and surrogate on a holdout set: accuracy against the
+    ground truth, agreement with the teacher, median predict latency and
+    serialized size
+    """
+    X_scaled = scaler.transform(X_holdout)
+    y_holdout = np.asarray(y_holdout, dtype=float)
+    teacher_predictions = teacher.predict(X_scaled)
+    surrogate_predictions = surrogate.predict(X_scaled)
+
+    latency = {}
+    for batch_size in REPORT_BATCH_SIZES:
+        batch = X_scaled[:batch_size]
+        latency[str(batch_size)] = {
+            "teacher_ms": _median_latency_ms(teacher.predict, batch, repeats),
+            "compact_ms": _median_latency_ms(surrogate.predict, batch, repeats)
+        }
+
+    return {
+        "compact_kind": surrogate.kind,
+        "holdout_rows": len(X_holdout),
+        "teacher_accuracy": _accuracy(teacher_predictions, y_holdout),
+        "compact_accuracy": _accuracy(surrogate_predictions, y_holdout),
+        "compact_vs_teacher": _accuracy(surrogate_predictions, teacher_predictions),
+        "latency_by_batch_size": latency,
+        "teacher_bytes": _serialized_bytes(teacher),
+        "compact_bytes": _serialized_bytes(surrogate)
+    }
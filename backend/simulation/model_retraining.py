@@ -0,0 +1,204 @@
+"""
+Model Retraining
+Background retraining on submitted organization totals, with holdout validation and a hot-swap
+"""
+
+import os
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from .carbon_quantification_model import carbon_model, factor_sets, ModelNotReadyError
+from .build_carbon_model import generate_synthetic_data, train_model, save_build, feature_ranges, HOLDOUT_SEED
+from .model_artifacts import set_latest_version
+
+logger = logging.getLogger(__name__)
+
+# Retraining job states
+RETRAIN_IDLE = "idle"
+RETRAIN_RUNNING = "running"
+RETRAIN_PROMOTED = "promoted"
+RETRAIN_REJECTED = "rejected"
+RETRAIN_FAILED = "failed"
+
+TARGET_COLUMNS = ['Total Emissions (kg CO₂)', 'Carbon Credits Required']
+
+
+class RetrainInProgressError(Exception):
+    """Raised when a retraining job is started while another one runs"""
+
+
+class TrainingSampleStore:
+    """
+    Bounded uniform sample of submitted organization totals and their direct
+    (emission factor) emissions. Reservoir sampling keeps every submission
+    equally likely to be in the sample however many have been seen.
+    """
+
+    def __init__(self, n_features: int, capacity: int = 50000, enabled: bool = True, seed: int = 0):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.totals = np.empty((capacity, n_features))
+        self.direct = np.empty(capacity)
+        self.size = 0
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def record(self, batch):
+        """Add the organizations of a PreparedBatch"""
+        if self.enabled and len(batch.totals):
+            self.add(batch.totals, batch.activity_emissions.sum(axis=1))
+
+    def add(self, totals: np.ndarray, direct: np.ndarray):
+        with self._lock:
+            n = len(totals)
+            fill = min(self.capacity - self.size, n)
+            self.totals[self.size:self.size + fill] = totals[:fill]
+            self.direct[self.size:self.size + fill] = direct[:fill]
+            self.size += fill
+
+            # Row i of the stream replaces a random slot with probability capacity / (i + 1)
+            if fill < n:
+                positions = self.seen + np.arange(fill, n)
+                slots = self._rng.integers(0, positions + 1)
+                keep = slots < self.capacity
+                self.totals[slots[keep]] = totals[fill:][keep]
+                self.direct[slots[keep]] = direct[fill:][keep]
+            self.seen += n
+
+    def snapshot(self):
+        """Copies of the sampled (totals, direct emissions)"""
+        with self._lock:
+            return self.totals[:self.size].copy(), self.direct[:self.size].copy()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": self.enabled, "size": self.size, "capacity": self.capacity, "seen": self.seen}
+
+
+def _mae(predicted: np.ndarray, expected: np.ndarray) -> float:
+    return float(np.abs(np.asarray(predicted) - np.asarray(expected)).mean())
+
+
+class ModelRetrainer:
+    """
+    Trains a candidate on the synthetic set plus the submitted sample and
+    validates it against a holdout of submitted rows and the synthetic
+    holdout. A candidate that is no worse than the serving model on both is
+    saved as a new version and swapped in; the replaced model stays
+    available for rollback.
+    """
+
+    def __init__(self, samples: TrainingSampleStore, min_samples: int = 200,
+                 holdout_fraction: float = 0.2, tolerance: float = 0.05,
+                 synthetic_samples: int = 1000, holdout_samples: int = 2000, n_estimators: int = 100):
+        self.samples = samples
+        self.min_samples = min_samples
+        self.holdout_fraction = holdout_fraction
+        self.tolerance = tolerance
+        self.synthetic_samples = synthetic_samples
+        self.holdout_samples = holdout_samples
+        self.n_estimators = n_estimators
+        self.job = {"state": RETRAIN_IDLE}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> Dict[str, Any]:
+        """Run a retraining job in a daemon thread"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise RetrainInProgressError("A retraining job is already running")
+            self.job = {"state": RETRAIN_RUNNING, "started_at": datetime.now(timezone.utc).isoformat()}
+            self._thread = threading.Thread(target=self._run, name="carbon-model-retrain", daemon=True)
+            self._thread.start()
+            return dict(self.job)
+
+    def _run(self):
+        try:
+            result = self.retrain()
+        except Exception as e:
+            logger.error(f"Carbon model retraining failed: {e}")
+            result = {"state": RETRAIN_FAILED, "error": str(e)}
+        self.job = {**self.job, **result, "finished_at": datetime.now(timezone.utc).isoformat()}
+
+    def retrain(self) -> Dict[str, Any]:
+        """Train, validate and, when the candidate holds up, promote it. Returns the job result."""
+        totals, direct = self.samples.snapshot()
+        if len(totals) < self.min_samples:
+            return {
+                "state": RETRAIN_REJECTED,
+                "error": f"Need at least {self.min_samples} submitted organizations, have {len(totals)}"
+            }
+
+        features = carbon_model.features
+        targets = np.column_stack([direct, direct / 1000])
+        order = np.random.default_rng(0).permutation(len(totals))
+        n_holdout = max(1, int(len(totals) * self.holdout_fraction))
+        holdout, train = order[:n_holdout], order[n_holdout:]
+
+        factor_set = factor_sets.current
+        X_synthetic, y_synthetic = generate_synthetic_data(self.synthetic_samples, factor_set.factors)
+        X = pd.concat([X_synthetic, pd.DataFrame(totals[train], columns=features)], ignore_index=True)
+        y = pd.concat([y_synthetic, pd.DataFrame(targets[train], columns=TARGET_COLUMNS)], ignore_index=True)
+        model, scaler = train_model(X, y, self.n_estimators)
+
+        X_check, y_check = generate_synthetic_data(self.holdout_samples, factor_set.factors, seed=HOLDOUT_SEED)
+
+        def candidate_predict(rows):
+            return model.predict(scaler.transform(pd.DataFrame(rows, columns=features)))
+
+        validation = {
+            "serving_version": carbon_model.version,
+            "holdout_rows": int(n_holdout),
+            "candidate_submitted_mae": _mae(candidate_predict(totals[holdout]), targets[holdout]),
+            "candidate_synthetic_mae": _mae(candidate_predict(X_check.values), y_check.values)
+        }
+        try:
+            validation["serving_submitted_mae"] = _mae(carbon_model.predict_totals(totals[holdout]), targets[holdout])
+            validation["serving_synthetic_mae"] = _mae(carbon_model.predict_totals(X_check.values), y_check.values)
+            accepted = (
+                validation["candidate_submitted_mae"] <= validation["serving_submitted_mae"]
+                and validation["candidate_synthetic_mae"] <= validation["serving_synthetic_mae"] * (1 + self.tolerance)
+            )
+        except ModelNotReadyError as e:
+            # Nothing is serving, so there is nothing to compare against
+            logger.warning(f"No serving model to validate against: {e}")
+            accepted = True
+
+        if not accepted:
+            return {"state": RETRAIN_REJECTED, "validation": validation,
+                    "error": "Candidate is worse than the serving model on the holdout"}
+
+        version = save_build(
+            model, scaler, factor_set,
+            {
+                "n_samples": len(X),
+                "n_submitted": int(len(train)),
+                "n_estimators": self.n_estimators,
+                "trained_on": "synthetic+submitted",
+                "feature_ranges": feature_ranges(X),
+                "validation": validation
+            },
+            make_latest=False
+        )
+        carbon_model.swap(carbon_model.load_version(version))
+        set_latest_version(version)
+        return {"state": RETRAIN_PROMOTED, "candidate_version": version, "validation": validation}
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.job)
+
+
+# Create singleton instances
+training_samples = TrainingSampleStore(
+    len(carbon_model.features),
+    capacity=int(os.environ.get("CARBON_TRAINING_SAMPLES_MAX", "50000")),
+    enabled=os.environ.get("CARBON_TRAINING_SAMPLES_ENABLED", "1") != "0"
+)
+model_retrainer = ModelRetrainer(
+    training_samples,
+    min_samples=int(os.environ.get("CARBON_RETRAIN_MIN_SAMPLES", "200"))
+)
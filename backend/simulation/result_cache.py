@@ -0,0 +1,141 @@
+"""
+Result Cache
+LRU cache of quantification results keyed by request content
+"""
+
+import os
+import json
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .carbon_quantification_model import DepartmentInput
+
+# Rough per-entry footprint used for the memory bound
+ENTRY_OVERHEAD_BYTES = 1024
+ROW_BYTES = 400
+
+
+def canonical_key(departments: List[DepartmentInput], model_version: Optional[str],
+                  factors_version: Optional[str]) -> str:
+    """
+    Hash of the department inputs plus the model and emission factor versions.
+    Departments are hashed in the order sent: totals are summed in that order,
+    so a reordered payload could differ in the last bits and gets its own entry.
+    """
+    rows = [
+        (dept.name, dept.energy_usage, dept.fuel_consumption, dept.industrial_output,
+         dept.waste_generated, dept.transport_distance,
+         dept.region or "", -1 if dept.year is None else dept.year)
+        for dept in departments
+    ]
+    payload = json.dumps([model_version, factors_version, rows], separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache with a TTL, an entry count bound and an approximate memory
+    bound. Every entry belongs to a (model version, factors version)
+    generation; when either changes the whole cache is dropped. Entries
+    are stored without input_flags, which follow the screener's current
+    outlier fences and are recomputed for every hit.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_seconds: float = 300, enabled: bool = True):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._generation = None
+
+    def _check_generation(self, generation: Tuple[Optional[str], Optional[str]]):
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._generation = generation
+
+    def get(self, key: str, generation: Tuple[Optional[str], Optional[str]]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        self._check_generation(generation)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, size, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any, generation: Tuple[Optional[str], Optional[str]], rows: int = 0):
+        if not self.enabled:
+            return
+        self._check_generation(generation)
+
+        size = ENTRY_OVERHEAD_BYTES + rows * ROW_BYTES
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "approx_bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "model_version": self._generation[0] if self._generation else None,
+            "factors_version": self._generation[1] if self._generation else None
+        }
+
+
+# Create singleton instance
+result_cache = ResultCache(
+    max_entries=int(os.environ.get("CARBON_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("CARBON_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get("CARBON_CACHE_TTL_SECONDS", "300")),
+    enabled=os.environ.get("CARBON_CACHE_ENABLED", "1") != "0"
+)
@@ -0,0 +1,164 @@
+"""
+Result Export
+Streamed CSV / Parquet export of department and activity breakdowns
+"""
+
+import io
+import csv
+import numpy as np
+from typing import Iterator, List, Optional
+
+from .columnar import EncodingUnavailableError
+
+# Parquet is an optional dependency
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+EXPORT_CSV = "csv"
+EXPORT_PARQUET = "parquet"
+
+EXPORT_MEDIA_TYPES = {
+    EXPORT_CSV: "text/csv",
+    EXPORT_PARQUET: "application/vnd.apache.parquet"
+}
+
+# Breakdown kinds in the exported rows
+BREAKDOWN_DEPARTMENT = "department"
+BREAKDOWN_ACTIVITY = "activity"
+BREAKDOWN_TOTAL = "total"
+
+EXPORT_COLUMNS = ["organization_id", "breakdown", "name", "emission", "percentage"]
+
+# Department rows per streamed chunk (and Parquet row group)
+EXPORT_CHUNK_ROWS = 10000
+
+
+def _rounded(values: np.ndarray) -> List[float]:
+    # Python round, as in finalize_batch, so exported values match the JSON responses
+    return [round(value, 2) for value in values.tolist()]
+
+
+def export_chunks(batch, predictions: np.ndarray, organization_ids: List[Optional[str]],
+                  activities: List[str], chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[dict]:
+    """
+    Export rows as column dicts, one window of at most chunk_rows department
+    rows at a time. An organization's activity and total rows follow the
+    window holding its last department, so even one organization with
+    many departments is split across chunks.
+
+    Only the serialized output is windowed: the prepared batch and the
+    predictions it reads from are already held in memory in full.
+    """
+    slot_offsets = np.asarray(batch.slot_offsets, dtype=np.intp)
+    org_ends = slot_offsets[1:]
+    n_slots = int(slot_offsets[-1])
+
+    for start in range(0, n_slots, chunk_rows):
+        end = min(n_slots, start + chunk_rows)
+        slot_orgs = np.searchsorted(org_ends, np.arange(start, end), side="right")
+        # Organizations whose last department falls in this window
+        finished = np.arange(np.searchsorted(org_ends, start, side="right"),
+                             np.searchsorted(org_ends, end, side="right"))
+
+        n_activities = len(activities)
+        activity_orgs = np.repeat(finished, n_activities)
+        yield {
+            "organization_id": [organization_ids[i] for i in slot_orgs.tolist()]
+                               + [organization_ids[i] for i in activity_orgs.tolist()]
+                               + [organization_ids[i] for i in np.repeat(finished, 2).tolist()],
+            "breakdown": [BREAKDOWN_DEPARTMENT] * (end - start)
+                         + [BREAKDOWN_ACTIVITY] * len(activity_orgs)
+                         + [BREAKDOWN_TOTAL] * (2 * len(finished)),
+            "name": batch.slot_names[start:end]
+                    + activities * len(finished)
+                    + ["total_emissions", "carbon_credits_required"] * len(finished),
+            "emission": _rounded(batch.slot_emissions[start:end])
+                        + _rounded(batch.activity_emissions[finished].ravel())
+                        # round() on NumPy scalars, like the totals in finalize_batch
+                        + np.round(predictions[finished, :2], 2).ravel().tolist(),
+            "percentage": _rounded(batch.slot_percentages[start:end])
+                          + _rounded(batch.activity_percentages[finished].ravel())
+                          + [None] * (2 * len(finished))
+        }
+
+
+def stream_csv(chunks: Iterator[dict]) -> Iterator[bytes]:
+    """Header line, then one CSV block per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for chunk in chunks:
+        writer.writerows(zip(*(chunk[column] for column in EXPORT_COLUMNS)))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink:
+    """
+    Write-only file for ParquetWriter that hands out what was written since
+    the last drain. tell() keeps counting across drains, so the footer's
+    row group offsets stay correct.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.closed = False
+        self._pending = []
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._pending.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data, self._pending = b"".join(self._pending), []
+        return data
+
+
+def stream_parquet(chunks: Iterator[dict], metadata: Optional[dict] = None) -> Iterator[bytes]:
+    """One Parquet row group per chunk, yielded as soon as it is written"""
+    schema = pyarrow.schema([
+        ("organization_id", pyarrow.string()),
+        ("breakdown", pyarrow.string()),
+        ("name", pyarrow.string()),
+        ("emission", pyarrow.float64()),
+        ("percentage", pyarrow.float64())
+    ], metadata=metadata)
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        for chunk in chunks:
+            writer.write_table(pyarrow.table(chunk, schema=schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_stream(export_format: str, batch, predictions: np.ndarray, organization_ids: List[Optional[str]],
+                  activities: List[str]) -> Iterator[bytes]:
+    """Byte chunks of the export in the requested format"""
+    chunks = export_chunks(batch, predictions, organization_ids, activities)
+    if export_format == EXPORT_CSV:
+        return stream_csv(chunks)
+    if export_format == EXPORT_PARQUET:
+        if pyarrow is None:
+            raise EncodingUnavailableError("Parquet export needs the 'pyarrow' package")
+        return stream_parquet(chunks, {"emission_factors_version": batch.factor_set_version or ""})
+    raise ValueError(f"Unknown export format '{export_format}'")
@@ -0,0 +1,145 @@
+"""
+Sensitivity Analysis
+What-if sweeps over per-feature perturbations, evaluated as one stacked model predict
+"""
+
+import numpy as np
+from typing import List, Optional
+from pydantic import BaseModel
+
+from .carbon_quantification_model import DepartmentInput, factor_sets
+from .emission_factor_db import ACTIVITY_FIELDS
+
+# Upper bound on scenarios per request (features x (departments + 1) x changes)
+MAX_SCENARIOS = 20000
+
+
+# API models
+class SensitivityRequest(BaseModel):
+    departments: List[DepartmentInput]
+    changes: List[float]  # relative changes, e.g. -0.1 for a 10% drop
+    features: Optional[List[str]] = None  # DepartmentInput fields to perturb; all activities by default
+    per_department: bool = True  # also perturb each department on its own, not just the whole organization
+
+class SensitivityPoint(BaseModel):
+    change: float
+    total_emissions: float
+    carbon_credits_required: float
+    total_emissions_delta: float  # vs the unperturbed prediction
+    direct_emissions_delta: float  # emission factor change, kg CO₂
+
+class SensitivityRow(BaseModel):
+    feature: str
+    department: Optional[str]  # None when every department is perturbed together
+    points: List[SensitivityPoint]
+
+class SensitivityResponse(BaseModel):
+    base_total_emissions: float
+    base_carbon_credits_required: float
+    scenarios: int
+    emission_factors_version: Optional[str] = None
+    table: List[SensitivityRow]
+
+
+class SensitivityError(ValueError):
+    """Raised for unknown features or oversized sweeps"""
+
+
+class SensitivityGrid:
+    """
+    Every perturbed organization total of a sweep, built in one broadcast.
+    A scenario scales one feature of one scope (a department or the whole
+    organization), so its totals differ from the base totals in one column
+    by change * that scope's contribution.
+    """
+
+    def __init__(self, request: SensitivityRequest):
+        features = request.features or list(ACTIVITY_FIELDS)
+        unknown = [feature for feature in features if feature not in ACTIVITY_FIELDS]
+        if unknown:
+            raise SensitivityError(f"Unknown features {unknown}; expected some of {ACTIVITY_FIELDS}")
+        if any(change < -1 for change in request.changes):
+            raise SensitivityError("Changes below -1 (a 100% drop) would make inputs negative")
+
+        self.factor_set = factor_sets.current
+        self.features = features
+        self.changes = np.array(request.changes, dtype=float)
+
+        names = [dept.name for dept in request.departments]
+        self.departments = list(dict.fromkeys(names))
+        self.scopes = [None] + (self.departments if request.per_department else [])
+        self.size = len(self.scopes) * len(features) * len(self.changes)
+        if self.size > MAX_SCENARIOS:
+            raise SensitivityError(f"Sweep has {self.size} scenarios; the limit is {MAX_SCENARIOS}")
+
+        values = np.array([[getattr(dept, field) for field in ACTIVITY_FIELDS] for dept in request.departments],
+                          dtype=float).reshape(len(request.departments), len(ACTIVITY_FIELDS))
+        regions = [dept.region for dept in request.departments]
+        years = [dept.year for dept in request.departments]
+        if any(region is not None for region in regions) or any(year is not None for year in years):
+            factors = self.factor_set.database.gather(regions, years)
+        else:
+            factors = np.broadcast_to(self.factor_set.vector, values.shape)
+
+        # Per-scope feature sums and direct emissions; scope 0 is the whole organization
+        department_index = {name: i for i, name in enumerate(self.departments)}
+        membership = np.zeros((len(self.scopes), len(values)))
+        membership[0] = 1
+        if request.per_department:
+            membership[1 + np.array([department_index[name] for name in names]), np.arange(len(values))] = 1
+        columns = [ACTIVITY_FIELDS.index(feature) for feature in features]
+        self.value_contributions = (membership @ values)[:, columns]               # (scopes, features)
+        self.emission_contributions = (membership @ (values * factors))[:, columns]
+        self.columns = np.array(columns, dtype=np.intp)
+        # Summed row by row like prepare_batch, so the base prediction matches /quantify exactly
+        self.base_totals = np.cumsum(values, axis=0)[-1]
+
+    def totals(self) -> np.ndarray:
+        """Base totals followed by every scenario, shape (1 + scopes * features * changes, activities)"""
+        n_scopes, n_features, n_changes = len(self.scopes), len(self.features), len(self.changes)
+        scenario_totals = np.broadcast_to(
+            self.base_totals, (n_scopes, n_features, n_changes, len(self.base_totals))
+        ).copy()
+        feature_axis = np.arange(n_features)
+        # Advanced indexes split by a slice move to the front: (features, scopes, changes)
+        scenario_totals[:, feature_axis, :, self.columns] += (
+            self.value_contributions.T[:, :, None] * self.changes[None, None, :]
+        )
+        np.maximum(scenario_totals, 0, out=scenario_totals)
+        return np.vstack([self.base_totals, scenario_totals.reshape(-1, len(self.base_totals))])
+
+    def response(self, predictions: np.ndarray) -> SensitivityResponse:
+        base, scenarios = predictions[0], predictions[1:]
+        shape = (len(self.scopes), len(self.features), len(self.changes))
+        totals = scenarios[:, 0].reshape(shape)
+        credits = scenarios[:, 1].reshape(shape)
+        direct_deltas = self.emission_contributions[:, :, None] * self.changes[None, None, :]
+
+        table = []
+        for s, scope in enumerate(self.scopes):
+            for f, feature in enumerate(self.features):
+                table.append(SensitivityRow(
+                    feature=feature,
+                    department=scope,
+                    points=[
+                        SensitivityPoint(
+                            change=change,
+                            total_emissions=round(total, 2),
+                            carbon_credits_required=round(credit, 2),
+                            total_emissions_delta=round(total - base[0], 2),
+                            direct_emissions_delta=round(direct, 2)
+                        )
+                        for change, total, credit, direct in zip(
+                            self.changes.tolist(), totals[s, f].tolist(),
+                            credits[s, f].tolist(), direct_deltas[s, f].tolist()
+                        )
+                    ]
+                ))
+
+        return SensitivityResponse(
+            base_total_emissions=round(float(base[0]), 2),
+            base_carbon_credits_required=round(float(base[1]), 2),
+            scenarios=self.size,
+            emission_factors_version=self.factor_set.version,
+            table=table
+        )
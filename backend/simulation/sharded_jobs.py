@@ -0,0 +1,539 @@
+"""
+Sharded Jobs
+Very large multi-organization quantification jobs sharded across a process pool
+"""
+
+import os
+import csv
+import json
+import uuid
+import logging
+import tempfile
+import multiprocessing
+import threading
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .carbon_quantification_model import (
+    carbon_model, factor_sets, OrganizationQuantification, PreparedBatch,
+    _weighted_row_sums, _percentages
+)
+from .input_screening import input_screener
+from .streaming_ingest import STREAM_FORMAT_CSV, DEPARTMENT_FIELDS, VALUE_FIELDS, IngestError
+from .model_retraining import training_samples
+from .drift_monitor import drift_monitor
+
+logger = logging.getLogger(__name__)
+
+ORGANIZATION_FIELD = "organization_id"
+OPTIONAL_FIELDS = ["region", "year"]
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Job phases reported in progress
+PHASE_AGGREGATING = "aggregating"
+PHASE_PREDICTING = "predicting"
+
+# Work units per pool process, so faster processes pick up the slack
+SHARDS_PER_WORKER = 4
+
+# Pool processes are not forked from the serving process, whose executor, batcher and
+# watcher threads could hold locks at fork time; forkserver forks from a clean server process
+JOB_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class JobNotFoundError(KeyError):
+    """Raised for unknown or expired job ids"""
+
+
+def _init_job_worker(version: Optional[str]):
+    # Runs once per pool process, which loads the version the parent served when the pool started
+    carbon_model.ensure_version(version)
+
+
+def _csv_columns(header_line: bytes) -> Dict[str, int]:
+    header = [column.strip().lower() for column in next(csv.reader([header_line.decode("utf-8")]))]
+    missing = [field for field in [ORGANIZATION_FIELD] + DEPARTMENT_FIELDS if field not in header]
+    if missing:
+        raise IngestError(f"CSV header is missing columns: {', '.join(missing)}")
+    return {field: header.index(field) for field in [ORGANIZATION_FIELD] + DEPARTMENT_FIELDS + OPTIONAL_FIELDS
+            if field in header}
+
+
+def _organization_of(line: bytes, stream_format: str, columns: Optional[Dict[str, int]]) -> Optional[str]:
+    text = line.decode("utf-8").strip()
+    if not text:
+        return None
+    try:
+        if stream_format == STREAM_FORMAT_CSV:
+            return next(csv.reader([text]))[columns[ORGANIZATION_FIELD]]
+        return str(json.loads(text)[ORGANIZATION_FIELD])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _last_line(f, start: int, end: int) -> bytes:
+    """The line of f that ends at end, without reading before start"""
+    window = 4096
+    while True:
+        begin = max(start, end - 1 - window)
+        f.seek(begin)
+        cut = f.read(end - 1 - begin).rfind(b"\n")
+        if cut >= 0 or begin == start:
+            f.seek(begin + cut + 1)
+            return f.read(end - begin - cut - 1)
+        window *= 2
+
+
+def split_shards(path: str, stream_format: str, n_shards: int) -> Tuple[Optional[Dict[str, int]], List[Tuple[int, int]]]:
+    """
+    Cut an uploaded file into about n_shards byte ranges on line boundaries.
+    A cut is moved past lines of the organization it falls in, so an
+    organization whose rows are contiguous never spans two shards. Only the
+    lines around each cut are read. Returns the CSV column layout (None for
+    NDJSON) and the (start, end) offsets of the shards.
+    """
+    size = os.path.getsize(path)
+    columns = None
+    start = 0
+    shards = []
+    with open(path, "rb") as f:
+        if stream_format == STREAM_FORMAT_CSV:
+            header = f.readline()
+            columns = _csv_columns(header.rstrip(b"\r\n"))
+            start = f.tell()
+
+        target = max(1, (size - start) // max(1, n_shards))
+        while start < size:
+            f.seek(min(size, start + target))
+            f.readline()
+            end = f.tell()
+            organization = _organization_of(_last_line(f, start, end), stream_format, columns)
+            f.seek(end)
+            while end < size:
+                line = f.readline()
+                if organization is None or _organization_of(line, stream_format, columns) != organization:
+                    break
+                end += len(line)
+            shards.append((start, end))
+            start = end
+    return columns, shards
+
+
+def _read_shard(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _parse_rows(data: bytes, stream_format: str, columns: Optional[Dict[str, int]]):
+    organizations, names, rows, regions, years = [], [], [], [], []
+    for line_number, raw in enumerate(data.split(b"\n"), 1):
+        line = raw.decode("utf-8").strip()
+        if not line:
+            continue
+        try:
+            if stream_format == STREAM_FORMAT_CSV:
+                record = next(csv.reader([line]))
+                organizations.append(record[columns[ORGANIZATION_FIELD]])
+                names.append(record[columns['name']])
+                rows.append([float(record[columns[field]]) for field in VALUE_FIELDS])
+                region = record[columns['region']] if 'region' in columns else ""
+                year = record[columns['year']] if 'year' in columns else ""
+                regions.append(region or None)
+                years.append(int(year) if year else None)
+            else:
+                record = json.loads(line)
+                organizations.append(str(record[ORGANIZATION_FIELD]))
+                names.append(str(record['name']))
+                rows.append([float(record[field]) for field in VALUE_FIELDS])
+                regions.append(record.get('region'))
+                years.append(int(record['year']) if record.get('year') is not None else None)
+        except (IndexError, KeyError, TypeError, ValueError) as e:
+            raise IngestError(f"Invalid row {line_number} of a job shard: {str(e)}")
+    return organizations, names, np.array(rows, dtype=float).reshape(len(rows), len(VALUE_FIELDS)), regions, years
+
+
+def _aggregate_shard(path: str, start: int, end: int, stream_format: str, columns: Optional[Dict[str, int]],
+                     factor_set, fences) -> Dict[str, Any]:
+    """
+    Worker side of the first phase: read one shard of the uploaded file
+    and reduce it to per-organization partial totals and activity
+    emissions plus the department breakdown slots (a repeated name keeps
+    its first position and its last row, as in prepare_batch)
+    """
+    organizations, names, values, regions, years = _parse_rows(_read_shard(path, start, end), stream_format, columns)
+
+    org_index, slot_index = {}, {}
+    row_org = np.empty(len(names), dtype=np.intp)
+    slot_org, slot_names, slot_row = [], [], []
+    for i, (organization, name) in enumerate(zip(organizations, names)):
+        local = org_index.setdefault(organization, len(org_index))
+        row_org[i] = local
+        slot = slot_index.get((local, name))
+        if slot is None:
+            slot_index[(local, name)] = len(slot_names)
+            slot_org.append(local)
+            slot_names.append(name)
+            slot_row.append(i)
+        else:
+            slot_row[slot] = i
+
+    # Screened against the serving process's fences as of job start; only
+    # in-process requests feed the screening history
+    input_screener.use_fences(fences)
+    input_flags = carbon_model.screen_inputs(values, row_org, names, update_history=False)
+
+    factor_matrix = None
+    if any(region is not None for region in regions) or any(year is not None for year in years):
+        factor_matrix = factor_set.database.gather(regions, years)
+
+    n_orgs = len(org_index)
+    totals = np.column_stack([
+        np.bincount(row_org, weights=values[:, i], minlength=n_orgs) for i in range(len(VALUE_FIELDS))
+    ]) if n_orgs else np.zeros((0, len(VALUE_FIELDS)))
+    if factor_matrix is None:
+        activity = totals * factor_set.vector
+    else:
+        row_activity = values * factor_matrix
+        activity = np.column_stack([
+            np.bincount(row_org, weights=row_activity[:, i], minlength=n_orgs) for i in range(len(VALUE_FIELDS))
+        ]) if n_orgs else np.zeros((0, len(VALUE_FIELDS)))
+
+    return {
+        "organizations": list(org_index),
+        "totals": totals,
+        "activity": activity,
+        "slot_org": np.array(slot_org, dtype=np.intp),
+        "slot_names": slot_names,
+        "slot_emissions": _weighted_row_sums(values, factor_set.vector, factor_matrix)[np.array(slot_row, dtype=np.intp)],
+        "input_flags": input_flags or {},
+        "rows": len(names)
+    }
+
+
+def _predict_and_render(organizations: List[str], totals: np.ndarray, activity: np.ndarray,
+                        slot_offsets: np.ndarray, slot_names: List[str], slot_emissions: np.ndarray,
+                        factor_set_version: Optional[str], input_flags=None) -> Tuple[np.ndarray, bytes]:
+    """
+    Worker side of the second phase: predict a chunk of organizations and
+    render their results as comma-separated OrganizationQuantification JSON
+    """
+    slot_org = np.repeat(np.arange(len(organizations)), np.diff(slot_offsets))
+    direct = np.bincount(slot_org, weights=slot_emissions, minlength=len(organizations))
+    batch = PreparedBatch(
+        totals=totals,
+        slot_names=slot_names,
+        slot_offsets=slot_offsets.tolist(),
+        slot_emissions=slot_emissions,
+        slot_percentages=_percentages(slot_emissions, direct[slot_org]),
+        activity_emissions=activity,
+        activity_percentages=_percentages(activity, direct[:, None]),
+        factor_set_version=factor_set_version,
+        input_flags=input_flags
+    )
+    predictions = carbon_model.predict_totals(totals)
+    results = carbon_model.finalize_batch(batch, predictions)
+    rendered = ",".join(
+        OrganizationQuantification(organization_id=organization, result=result).model_dump_json()
+        for organization, result in zip(organizations, results)
+    )
+    return predictions, rendered.encode("utf-8")
+
+
+def merge_shards(aggregates: List[Dict[str, Any]]):
+    """
+    Combine shard aggregates in upload order. Organizations found in
+    several shards (rows that were not contiguous) have their partial sums
+    added and their department slots merged by name.
+    Returns (organizations, totals, activity, slot_offsets, slot_names,
+    slot_emissions, input_flags by organization index).
+    """
+    org_index = {}
+    shard_orgs = []
+    for aggregate in aggregates:
+        shard_orgs.append(np.array(
+            [org_index.setdefault(organization, len(org_index)) for organization in aggregate["organizations"]],
+            dtype=np.intp
+        ))
+    n_orgs = len(org_index)
+    n_features = len(VALUE_FIELDS)
+
+    totals = np.zeros((n_orgs, n_features))
+    activity = np.zeros((n_orgs, n_features))
+    for aggregate, global_orgs in zip(aggregates, shard_orgs):
+        np.add.at(totals, global_orgs, aggregate["totals"])
+        np.add.at(activity, global_orgs, aggregate["activity"])
+
+    slot_org = np.concatenate([global_orgs[a["slot_org"]] for a, global_orgs in zip(aggregates, shard_orgs)]) \
+        if aggregates else np.zeros(0, dtype=np.intp)
+    slot_names = [name for aggregate in aggregates for name in aggregate["slot_names"]]
+    slot_emissions = np.concatenate([a["slot_emissions"] for a in aggregates]) if aggregates else np.zeros(0)
+
+    # Group slots by organization, keeping upload order inside each one
+    order = np.argsort(slot_org, kind="stable")
+    slot_org = slot_org[order]
+    slot_names = [slot_names[i] for i in order]
+    slot_emissions = slot_emissions[order]
+
+    split_orgs = np.flatnonzero(np.bincount(np.concatenate(shard_orgs), minlength=n_orgs) > 1) \
+        if aggregates else np.zeros(0, dtype=np.intp)
+    if len(split_orgs):
+        keep = np.ones(len(slot_names), dtype=bool)
+        first_slot = {}
+        for i in np.flatnonzero(np.isin(slot_org, split_orgs)):
+            key = (slot_org[i], slot_names[i])
+            if key in first_slot:
+                slot_emissions[first_slot[key]] = slot_emissions[i]
+                keep[i] = False
+            else:
+                first_slot[key] = i
+        slot_org = slot_org[keep]
+        slot_names = [name for name, kept in zip(slot_names, keep) if kept]
+        slot_emissions = slot_emissions[keep]
+
+    slot_offsets = np.concatenate([[0], np.cumsum(np.bincount(slot_org, minlength=n_orgs))]).astype(np.intp)
+
+    input_flags = {}
+    for aggregate, global_orgs in zip(aggregates, shard_orgs):
+        for local, flags in aggregate["input_flags"].items():
+            input_flags.setdefault(int(global_orgs[local]), []).extend(flags)
+    return list(org_index), totals, activity, slot_offsets, slot_names, slot_emissions, input_flags
+
+
+class JobsBusyError(Exception):
+    """Raised when the runner already has max_pending jobs queued or running"""
+
+
+class ShardedJob:
+    """One submitted job: its progress, and once finished its rendered result"""
+
+    def __init__(self, job_id: str, stream_format: str, size_bytes: int, path: Optional[str] = None):
+        self.id = job_id
+        self.stream_format = stream_format
+        self.size_bytes = size_bytes
+        self.path = path  # the uploaded file, until the job ends
+        self.state = JOB_QUEUED
+        self.phase = None
+        self.completed = 0
+        self.total = 0
+        self.organizations = None
+        self.departments = None
+        self.error = None
+        self.result = None
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.finished_at = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "phase": self.phase,
+            "completed": self.completed,
+            "total": self.total,
+            "percent": round(100 * self.completed / self.total, 1) if self.total else 0,
+            "organizations": self.organizations,
+            "departments": self.departments,
+            "size_bytes": self.size_bytes,
+            "result_bytes": len(self.result) if self.result is not None else None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error
+        }
+
+
+class ShardedJobRunner:
+    """
+    Runs jobs in two pool phases: shards are parsed and reduced to partial
+    aggregates, the parent merges them, then organization chunks are
+    predicted and rendered. Only file offsets, bytes and NumPy arrays cross the
+    process boundary, so the parent's share of the work stays small.
+
+    At most max_running jobs run at once, on their own threads; further
+    jobs queue behind them, and submissions beyond max_pending are
+    rejected. A job's upload is a file that is removed once the job ends.
+
+    A job runs on the pool of the model version serving when it started.
+    After a swap or rollback the next job starts a pool on the new version;
+    the old pool is shut down once its last job finishes.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_jobs: int = 16, max_running: int = 2,
+                 max_pending: int = 8, spool_dir: Optional[str] = None, start_method: str = JOB_START_METHOD):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_jobs = max_jobs
+        self.max_running = max_running
+        self.max_pending = max_pending
+        self.spool_dir = spool_dir
+        self.start_method = start_method
+        self._pending = 0
+        self._threads = None
+        self._jobs = OrderedDict()
+        self._pool = None
+        self._pool_version = None
+        self._pool_jobs = {}  # pool -> jobs running on it
+        self._lock = threading.Lock()
+
+    def _acquire_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            version = carbon_model.version
+            if self._pool is not None and self._pool_version != version:
+                self._retire(self._pool)
+                self._pool = None
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_job_worker, initargs=(version,)
+                )
+                self._pool_version = version
+            self._pool_jobs[self._pool] = self._pool_jobs.get(self._pool, 0) + 1
+            return self._pool
+
+    def _release_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            self._pool_jobs[pool] -= 1
+            if pool is not self._pool:
+                self._retire(pool)
+
+    def _retire(self, pool: ProcessPoolExecutor):
+        # Called with the lock held; a replaced pool is shut down when no job uses it
+        if not self._pool_jobs.get(pool):
+            self._pool_jobs.pop(pool, None)
+            pool.shutdown(wait=False)
+
+    @property
+    def busy(self) -> bool:
+        return self._pending >= self.max_pending
+
+    def spool(self):
+        """A new file to write an upload to; submit() takes it over"""
+        return tempfile.NamedTemporaryFile(prefix="carbon-job-", dir=self.spool_dir, delete=False)
+
+    def submit(self, path: str, stream_format: str) -> ShardedJob:
+        """Queue a job on an uploaded file; the file is removed when the job ends"""
+        job = ShardedJob(uuid.uuid4().hex, stream_format, os.path.getsize(path), path)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobsBusyError(f"Job queue is full ({self.max_pending} pending jobs)")
+            self._pending += 1
+            self._jobs[job.id] = job
+            # Only the latest jobs are kept, results included
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(max_workers=self.max_running, thread_name_prefix="carbon-job")
+            self._threads.submit(self._run_job, job)
+        return job
+
+    def get(self, job_id: str) -> ShardedJob:
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundError(job_id)
+        return job
+
+    def _run_job(self, job: ShardedJob):
+        try:
+            job.result = self.run(job, job.path)
+            job.state = JOB_SUCCEEDED
+        except Exception as e:
+            logger.error(f"Quantification job {job.id} failed: {e}")
+            job.error = str(e)
+            job.state = JOB_FAILED
+        finally:
+            with self._lock:
+                if job.path is not None:
+                    os.remove(job.path)
+                    job.path = None
+                self._pending -= 1
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+
+    def run(self, job: ShardedJob, path: str) -> bytes:
+        """Run a job on an uploaded file to completion in the calling thread and return the result JSON"""
+        job.state = JOB_RUNNING
+        pool = self._acquire_pool()
+        try:
+            return self._run_on(pool, job, path)
+        finally:
+            self._release_pool(pool)
+
+    def _run_on(self, pool: ProcessPoolExecutor, job: ShardedJob, path: str) -> bytes:
+        factor_set = factor_sets.current
+        fences = input_screener.fences()
+
+        columns, shards = split_shards(path, job.stream_format, self.max_workers * SHARDS_PER_WORKER)
+        job.phase, job.completed, job.total = PHASE_AGGREGATING, 0, len(shards)
+        futures = {
+            pool.submit(_aggregate_shard, path, start, end, job.stream_format, columns, factor_set, fences): i
+            for i, (start, end) in enumerate(shards)
+        }
+        aggregates = [None] * len(shards)
+        for future in as_completed(futures):
+            aggregates[futures[future]] = future.result()
+            job.completed += 1
+
+        organizations, totals, activity, slot_offsets, slot_names, slot_emissions, input_flags = merge_shards(aggregates)
+        job.organizations = len(organizations)
+        job.departments = sum(aggregate["rows"] for aggregate in aggregates)
+        direct = activity.sum(axis=1)
+        if training_samples.enabled and len(totals):
+            training_samples.add(totals, direct)
+
+        n_chunks = min(len(organizations), self.max_workers * SHARDS_PER_WORKER) or 1
+        bounds = np.linspace(0, len(organizations), n_chunks + 1).astype(int)
+        job.phase, job.completed, job.total = PHASE_PREDICTING, 0, n_chunks
+        futures = {}
+        for i in range(n_chunks):
+            start, end = bounds[i], bounds[i + 1]
+            slot_start, slot_end = slot_offsets[start], slot_offsets[end]
+            futures[pool.submit(
+                _predict_and_render, organizations[start:end], totals[start:end], activity[start:end],
+                slot_offsets[start:end + 1] - slot_start, slot_names[slot_start:slot_end],
+                slot_emissions[slot_start:slot_end], factor_set.version,
+                {org - start: flags for org, flags in input_flags.items() if start <= org < end}
+            )] = i
+        predictions = [None] * n_chunks
+        rendered = [None] * n_chunks
+        for future in as_completed(futures):
+            predictions[futures[future]], rendered[futures[future]] = future.result()
+            job.completed += 1
+
+        if len(totals):
+            drift_monitor.observe(totals, np.concatenate(predictions)[:, 0], direct,
+                                  carbon_model.metadata.get("feature_ranges"))
+
+        return b'{"results":[' + b",".join(chunk for chunk in rendered if chunk) + b']}'
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+        with self._lock:
+            # Uploads of jobs that never started
+            for job in self._jobs.values():
+                if job.state == JOB_QUEUED and job.path is not None:
+                    os.remove(job.path)
+                    job.path = None
+            # Queued shards are dropped; waiting for running ones lets the pool close its
+            # forkserver pipes before the interpreter's exit hook writes to them
+            for pool in set(self._pool_jobs) | ({self._pool} if self._pool is not None else set()):
+                pool.shutdown(wait=True, cancel_futures=True)
+            self._pool_jobs.clear()
+            self._pool = None
+
+
+# Create singleton instance
+sharded_job_runner = ShardedJobRunner(
+    max_workers=int(os.environ.get("CARBON_JOB_WORKERS", "0")) or None,
+    max_jobs=int(os.environ.get("CARBON_JOB_HISTORY", "16")),
+    max_running=int(os.environ.get("CARBON_JOB_MAX_RUNNING", "2")),
+    max_pending=int(os.environ.get("CARBON_JOB_MAX_PENDING", "8")),
+    spool_dir=os.environ.get("CARBON_JOB_SPOOL_DIR") or None,
+    start_method=os.environ.get("CARBON_JOB_START_METHOD", JOB_START_METHOD)
+)
@@ -0,0 +1,193 @@
+"""
+Streaming Ingest
+Incremental aggregation of CSV / NDJSON department uploads in bounded memory
+"""
+
+import csv
+import json
+import numpy as np
+from typing import List, Optional, Tuple
+
+from .carbon_quantification_model import carbon_model, DepartmentInput, InputFlag
+from .input_screening import input_screener
+
+STREAM_FORMAT_CSV = "csv"
+STREAM_FORMAT_NDJSON = "ndjson"
+
+# Same layout as DepartmentInput
+DEPARTMENT_FIELDS = [
+    'name',
+    'energy_usage',
+    'fuel_consumption',
+    'industrial_output',
+    'waste_generated',
+    'transport_distance'
+]
+VALUE_FIELDS = DEPARTMENT_FIELDS[1:]
+
+# Column names a CSV header row may use
+HEADER_FIELDS = set(DepartmentInput.model_fields)
+
+# Rows are summed per department before emission factors are applied, so
+# per-row factor regions and years cannot be honoured; rows setting them are rejected
+UNSUPPORTED_FIELDS = ["region", "year"]
+
+# Screening flags kept per upload; a long upload in flag mode could flag every row
+MAX_STREAM_FLAGS = 1000
+
+CONTENT_TYPE_FORMATS = {
+    "text/csv": STREAM_FORMAT_CSV,
+    "application/csv": STREAM_FORMAT_CSV,
+    "application/x-ndjson": STREAM_FORMAT_NDJSON,
+    "application/ndjson": STREAM_FORMAT_NDJSON,
+    "application/jsonl": STREAM_FORMAT_NDJSON,
+    "application/json-lines": STREAM_FORMAT_NDJSON
+}
+
+
+class IngestError(ValueError):
+    """Raised when an uploaded row cannot be parsed"""
+
+
+def _unsupported_field(field: str, stream_format: str, line_number: int) -> IngestError:
+    return IngestError(
+        f"Invalid {stream_format} row on line {line_number}: '{field}' is not supported for streamed "
+        f"uploads, whose rows are summed per department; use /quantify or /jobs for per-row emission factors"
+    )
+
+
+def format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Map a request Content-Type header to a stream format"""
+    if not content_type:
+        return None
+    return CONTENT_TYPE_FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+class DepartmentStreamAggregator:
+    """
+    Accumulates department-period rows into per-department totals. Memory
+    grows with the number of distinct departments, not with the number of
+    uploaded rows: rows for the same department are summed as they arrive.
+    Each parsed block is screened row by row before it is summed, so limits
+    and outlier fences apply to what was uploaded rather than to the totals.
+    """
+
+    def __init__(self, stream_format: str, initial_capacity: int = 1024):
+        if stream_format not in (STREAM_FORMAT_CSV, STREAM_FORMAT_NDJSON):
+            raise ValueError(f"Unsupported stream format '{stream_format}'")
+        self.stream_format = stream_format
+        self.names = []
+        self.rows = 0
+        self._index = {}
+        self._sums = np.zeros((initial_capacity, len(VALUE_FIELDS)))
+        self._buffer = b""
+        self._csv_columns = None
+        self._csv_unsupported = []
+        self._line_number = 0
+        self.input_flags: List[InputFlag] = []
+        self.accepted_rows = np.zeros((0, len(VALUE_FIELDS)))  # latest screened rows, for the history
+
+    @property
+    def sums(self) -> np.ndarray:
+        """(departments, features) totals in first-seen department order"""
+        return self._sums[:len(self.names)]
+
+    def split_lines(self, chunk: bytes, final: bool = False) -> List[bytes]:
+        """Return the complete lines in chunk, keeping a trailing partial line buffered"""
+        lines = (self._buffer + chunk).split(b"\n")
+        self._buffer = b"" if final else lines.pop()
+        return lines
+
+    def add_lines(self, lines: List[bytes]):
+        """Parse a block of raw lines and add them to the department totals"""
+        if self.stream_format == STREAM_FORMAT_CSV:
+            names, values = self._parse_csv(lines)
+        else:
+            names, values = self._parse_ndjson(lines)
+        if names:
+            self._screen(names, values)
+            self._accumulate(names, values)
+
+    def _decoded(self, lines: List[bytes]):
+        for raw in lines:
+            self._line_number += 1
+            line = raw.decode("utf-8").strip()
+            if line:
+                yield self._line_number, line
+
+    def _parse_csv(self, lines: List[bytes]) -> Tuple[List[str], np.ndarray]:
+        names = []
+        rows = []
+        numbered = list(self._decoded(lines))
+        for (line_number, _), record in zip(numbered, csv.reader(line for _, line in numbered)):
+            if self._csv_columns is None:
+                # A header row (every cell a DepartmentInput field, in any order) sets the
+                # column order; without one the DepartmentInput order is assumed
+                header = [column.strip().lower() for column in record]
+                if header and all(column in HEADER_FIELDS for column in header):
+                    missing = [field for field in DEPARTMENT_FIELDS if field not in header]
+                    if missing:
+                        raise IngestError(f"CSV header is missing columns: {', '.join(missing)}")
+                    self._csv_columns = [header.index(field) for field in DEPARTMENT_FIELDS]
+                    self._csv_unsupported = [(field, header.index(field)) for field in UNSUPPORTED_FIELDS
+                                             if field in header]
+                    continue
+                self._csv_columns = list(range(len(DEPARTMENT_FIELDS)))
+
+            for field, column in self._csv_unsupported:
+                if column < len(record) and record[column].strip():
+                    raise _unsupported_field(field, "CSV", line_number)
+            try:
+                names.append(record[self._csv_columns[0]])
+                rows.append([float(record[i]) for i in self._csv_columns[1:]])
+            except (IndexError, ValueError) as e:
+                raise IngestError(f"Invalid CSV row on line {line_number}: {str(e)}")
+        return names, np.array(rows, dtype=float).reshape(len(rows), len(VALUE_FIELDS))
+
+    def _parse_ndjson(self, lines: List[bytes]) -> Tuple[List[str], np.ndarray]:
+        names = []
+        rows = []
+        for line_number, line in self._decoded(lines):
+            try:
+                record = json.loads(line)
+                names.append(str(record['name']))
+                rows.append([float(record[field]) for field in VALUE_FIELDS])
+            except (KeyError, TypeError, ValueError) as e:
+                raise IngestError(f"Invalid NDJSON row on line {line_number}: {str(e)}")
+            for field in UNSUPPORTED_FIELDS:
+                if record.get(field) is not None:
+                    raise _unsupported_field(field, "NDJSON", line_number)
+        return names, np.array(rows, dtype=float).reshape(len(rows), len(VALUE_FIELDS))
+
+    def _screen(self, names: List[str], values: np.ndarray):
+        """Raises InputScreeningError in reject mode; otherwise keeps the first MAX_STREAM_FLAGS flags"""
+        result = input_screener.screen(values)
+        if result is None:
+            return
+        input_screener.check(result, names)
+        # The upload only joins the screening history once all of it is accepted
+        self.accepted_rows = np.concatenate([
+            self.accepted_rows, input_screener.accepted_rows(values, result)
+        ])[-input_screener.history_size:]
+        flags = carbon_model.screening_flags(result, values, np.zeros(len(names), dtype=np.intp), names)
+        if flags:
+            self.input_flags.extend(flags[0][:MAX_STREAM_FLAGS - len(self.input_flags)])
+
+    def _accumulate(self, names: List[str], values: np.ndarray):
+        slots = np.empty(len(names), dtype=np.intp)
+        for i, name in enumerate(names):
+            slot = self._index.get(name)
+            if slot is None:
+                slot = self._index[name] = len(self.names)
+                self.names.append(name)
+            slots[i] = slot
+
+        if len(self.names) > len(self._sums):
+            grown = np.zeros((max(len(self.names), 2 * len(self._sums)), len(VALUE_FIELDS)))
+            grown[:len(self._sums)] = self._sums
+            self._sums = grown
+
+        n_depts = len(self.names)
+        for i in range(len(VALUE_FIELDS)):
+            self._sums[:n_depts, i] += np.bincount(slots, weights=values[:, i], minlength=n_depts)
+        self.rows += len(names)
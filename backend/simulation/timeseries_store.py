@@ -0,0 +1,214 @@
+"""
+Time-Series Store
+Monthly department records with incrementally maintained YTD and rolling 12-month rollups
+"""
+
+import re
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+from .carbon_quantification_model import (
+    carbon_model, DepartmentInput, DepartmentEmission, ActivityEmission
+)
+
+ROLLING_MONTHS = 12
+PERIOD_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+
+ROLLUP_LATEST = "latest_month"
+ROLLUP_YTD = "year_to_date"
+ROLLUP_ROLLING = "rolling_12_months"
+ROLLUP_ALL_TIME = "all_time"
+
+
+# API models
+class PeriodRecordRequest(BaseModel):
+    period: str  # YYYY-MM
+    departments: List[DepartmentInput]
+
+class RollupEmissions(BaseModel):
+    rollup: str
+    start_period: str
+    end_period: str
+    total_emissions: float  # kg CO₂, direct emission factor sum
+    department_emissions: List[DepartmentEmission]
+    activity_emissions: List[ActivityEmission]
+
+class TimeSeriesResponse(BaseModel):
+    organization_id: str
+    periods_recorded: int
+    latest_period: str
+    rollups: List[RollupEmissions]
+
+
+class PeriodError(ValueError):
+    """Raised for malformed periods"""
+
+
+def parse_period(period: str) -> int:
+    """YYYY-MM to a month index (year * 12 + month - 1)"""
+    match = PERIOD_PATTERN.match(period)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise PeriodError(f"Period must be formatted YYYY-MM, got '{period}'")
+    return int(match.group(1)) * 12 + int(match.group(2)) - 1
+
+
+def format_period(month_index: int) -> str:
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+
+def department_rows(departments: List[DepartmentInput]) -> np.ndarray:
+    """(rows, features) activity values, one row per submitted department"""
+    return np.array([
+        (dept.energy_usage, dept.fuel_consumption, dept.industrial_output,
+         dept.waste_generated, dept.transport_distance)
+        for dept in departments
+    ], dtype=float).reshape(len(departments), len(carbon_model.features))
+
+
+class OrganizationSeries:
+    """
+    Per-department feature sums for one organization. Every month is kept
+    so it can be subtracted when it leaves the rolling window or is
+    corrected. Each append or correction touches O(departments) values
+    and never walks the history.
+    """
+
+    def __init__(self, n_features: int):
+        self.n_features = n_features
+        self.department_names = []
+        self.department_index = {}
+        self.months = {}                  # month index -> (departments, features) values
+        self.latest = None
+        self.earliest = None
+        self.all_time = np.zeros((0, n_features))
+        self.ytd = np.zeros((0, n_features))
+        self.rolling = np.zeros((0, n_features))
+
+    def _month_matrix(self, departments: List[DepartmentInput]) -> np.ndarray:
+        for dept in departments:
+            if dept.name not in self.department_index:
+                self.department_index[dept.name] = len(self.department_names)
+                self.department_names.append(dept.name)
+
+        n_depts = len(self.department_names)
+        for name in ("all_time", "ytd", "rolling"):
+            current = getattr(self, name)
+            if len(current) < n_depts:
+                setattr(self, name, np.vstack([current, np.zeros((n_depts - len(current), self.n_features))]))
+
+        # Several rows for one department in the same month are summed
+        values = np.zeros((n_depts, self.n_features))
+        slots = np.array([self.department_index[dept.name] for dept in departments], dtype=np.intp)
+        np.add.at(values, slots, department_rows(departments))
+        return values
+
+    def _padded(self, values: np.ndarray) -> np.ndarray:
+        if len(values) == len(self.department_names):
+            return values
+        return np.vstack([values, np.zeros((len(self.department_names) - len(values), self.n_features))])
+
+    def record(self, month: int, departments: List[DepartmentInput]):
+        """Add a month, or replace one that was already recorded"""
+        values = self._month_matrix(departments)
+        previous = self.months.get(month)
+
+        if self.latest is not None and month > self.latest:
+            self._advance(month)
+
+        delta = values - self._padded(previous) if previous is not None else values
+        latest = self.latest if self.latest is not None else month
+        self.all_time += delta
+        if month // 12 == latest // 12 and month <= latest:
+            self.ytd += delta
+        if latest - ROLLING_MONTHS < month <= latest:
+            self.rolling += delta
+
+        self.months[month] = values
+        self.latest = latest
+        self.earliest = month if self.earliest is None else min(self.earliest, month)
+
+    def _advance(self, month: int):
+        """Move the windows forward to a later latest month"""
+        if month // 12 != self.latest // 12:
+            self.ytd[:] = 0
+        # Months leaving the rolling window; moving 12 or more months ahead clears it
+        if month - self.latest >= ROLLING_MONTHS:
+            self.rolling[:] = 0
+        else:
+            for leaving in range(self.latest - ROLLING_MONTHS + 1, month - ROLLING_MONTHS + 1):
+                if leaving in self.months:
+                    self.rolling -= self._padded(self.months[leaving])
+        self.latest = month
+
+    def rollups(self) -> Dict[str, tuple]:
+        """Rollup name -> (start month, end month, department values)"""
+        year_start = self.latest - self.latest % 12
+        latest_values = self.months.get(self.latest)
+        return {
+            ROLLUP_LATEST: (self.latest, self.latest, self._padded(latest_values)),
+            ROLLUP_YTD: (year_start, self.latest, self.ytd),
+            ROLLUP_ROLLING: (self.latest - ROLLING_MONTHS + 1, self.latest, self.rolling),
+            ROLLUP_ALL_TIME: (self.earliest, self.latest, self.all_time)
+        }
+
+
+class TimeSeriesStore:
+    """In-memory time-series store; in production this would be backed by a database"""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def record(self, organization_id: str, period: str, departments: List[DepartmentInput]) -> TimeSeriesResponse:
+        month = parse_period(period)
+        # Screen the submitted rows before the series changes; in reject mode an
+        # invalid month raises InputScreeningError and is never stored
+        carbon_model.screen_departments(departments)
+        with self._lock:
+            series = self._series.get(organization_id)
+            if series is None:
+                series = self._series[organization_id] = OrganizationSeries(len(carbon_model.features))
+            series.record(month, departments)
+            return self._response(organization_id, series)
+
+    def get(self, organization_id: str) -> Optional[TimeSeriesResponse]:
+        with self._lock:
+            series = self._series.get(organization_id)
+            return self._response(organization_id, series) if series is not None else None
+
+    def _response(self, organization_id: str, series: OrganizationSeries) -> TimeSeriesResponse:
+        rollups = []
+        for name, (start, end, values) in series.rollups().items():
+            # Rollups are sums of screened months, not inputs
+            batch = carbon_model.prepare_departments(series.department_names, values, screen=False)
+            rollups.append(RollupEmissions(
+                rollup=name,
+                start_period=format_period(start),
+                end_period=format_period(end),
+                total_emissions=round(float(batch.slot_emissions.sum()), 2),
+                department_emissions=[
+                    DepartmentEmission(department=dept, emission=round(emission, 2), percentage=round(percent, 2))
+                    for dept, emission, percent in zip(
+                        series.department_names, batch.slot_emissions.tolist(), batch.slot_percentages.tolist()
+                    )
+                ],
+                activity_emissions=[
+                    ActivityEmission(activity=activity, emission=round(emission, 2), percentage=round(percent, 2))
+                    for activity, emission, percent in zip(
+                        carbon_model.features, batch.activity_emissions[0].tolist(), batch.activity_percentages[0].tolist()
+                    )
+                ]
+            ))
+
+        return TimeSeriesResponse(
+            organization_id=organization_id,
+            periods_recorded=len(series.months),
+            latest_period=format_period(series.latest),
+            rollups=rollups
+        )
+
+
+# Create singleton instance
+timeseries_store = TimeSeriesStore()
@@ -0,0 +1,22 @@
+import os
+import sys
+import atexit
+import shutil
+import tempfile
+
+# Tests import the backend packages (simulation, services, routers) the way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Model artifacts are not checked in: build a small model into a throwaway directory
+# before anything imports the model singleton (CARBON_MODEL_DIR is read on import)
+ARTIFACT_DIR = tempfile.mkdtemp(prefix="carbon-test-artifacts-")
+atexit.register(shutil.rmtree, ARTIFACT_DIR, ignore_errors=True)
+os.environ["CARBON_MODEL_DIR"] = ARTIFACT_DIR
+
+from simulation.carbon_quantification_model import factor_sets  # noqa: E402
+from simulation.build_carbon_model import generate_synthetic_data, train_model, save_build  # noqa: E402
+
+X, y = generate_synthetic_data(1000, seed=42)
+model, scaler = train_model(X, y, n_estimators=20)
+save_build(model, scaler, factor_sets.current, {"n_samples": len(X), "n_estimators": 20},
+           artifact_dir=ARTIFACT_DIR, distill_samples=2000, holdout_samples=500)
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from services.emission_trajectory import EmissionTrajectory, TRAJECTORY_ARRAYS
+
+
+def per_month_trajectory(technologies, timeline, baseline_emissions, time_horizon):
+    """The original month-by-month loop of /simulate, kept as the reference"""
+    trajectory = []
+    for month in range(time_horizon):
+        month_reduction = 0
+        active_techs = []
+        for tech in technologies:
+            if month >= timeline[tech["id"]]["end_month"]:
+                month_reduction += baseline_emissions * tech["reduction_factor"] / 12
+                active_techs.append(tech["name"])
+        month_emissions = baseline_emissions / 12 - month_reduction
+        if month_emissions < 0:
+            month_emissions = 0
+        trajectory.append({"month": month, "emissions": month_emissions, "active_technologies": active_techs})
+    return trajectory
+
+
+def random_plan(seed: int):
+    rng = random.Random(seed)
+    technologies, timeline = [], {}
+    current_month = 0
+    for i in range(rng.randint(0, 12)):
+        tech = {"id": f"tech-{i}", "name": f"Technology {i}", "reduction_factor": rng.uniform(0.01, 0.4),
+                "implementation_time": rng.randint(0, 18)}
+        end_month = current_month + tech["implementation_time"]
+        timeline[tech["id"]] = {"start_month": current_month, "end_month": end_month}
+        current_month = max(current_month + 2, end_month - 4)
+        technologies.append(tech)
+    return technologies, timeline
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_records_match_the_per_month_loop(seed):
+    technologies, timeline = random_plan(seed)
+    baseline = random.Random(seed).uniform(100, 1e6)
+    horizon = random.Random(seed + 1).randint(0, 120)
+    trajectory = EmissionTrajectory(technologies, timeline, baseline, horizon)
+    assert trajectory.records() == per_month_trajectory(technologies, timeline, baseline, horizon)
+
+
+def test_arrays_carry_the_same_emissions():
+    technologies, timeline = random_plan(7)
+    trajectory = EmissionTrajectory(technologies, timeline, 5000.0, 60)
+    arrays = trajectory.output(TRAJECTORY_ARRAYS)
+    assert arrays["emissions"] == [month["emissions"] for month in trajectory.records()]
+    assert arrays["activation_months"] == [timeline[tech["id"]]["end_month"] for tech in technologies]
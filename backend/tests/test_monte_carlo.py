@@ -0,0 +1,57 @@
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from routers.simulation import catalog
+from services.monte_carlo import MonteCarloSimulator, UncertaintyRanges
+
+SIMULATION = {
+    "baseline_emissions": 10000,
+    "target_reduction": 60,
+    "budget_constraint": 400000,
+    "time_horizon": 36,
+    "industry_type": "Manufacturing"
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    return MonteCarloSimulator(UncertaintyRanges())
+
+
+@pytest.mark.parametrize("baseline", [0, -100])
+@pytest.mark.parametrize("runs", [0, 500])
+def test_non_positive_baseline_is_rejected(client, baseline, runs):
+    response = client.post("/simulation/simulate",
+                           json=dict(SIMULATION, baseline_emissions=baseline, monte_carlo_runs=runs))
+    assert response.status_code == 400
+
+
+def test_simulator_rejects_zero_baseline(simulator):
+    with pytest.raises(ValueError):
+        simulator.simulate(catalog.technologies[:3], 0.0, 12, 100, 50.0, seed=1)
+
+
+def test_seeded_runs_are_reproducible_and_finite(simulator):
+    technologies = catalog.technologies[:4]
+    first = simulator.simulate(technologies, 10000.0, 24, 5000, 50.0, seed=7)
+    second = simulator.simulate(technologies, 10000.0, 24, 5000, 50.0, seed=7)
+    assert first == second
+    for key in ("achieved_reduction", "total_cost", "roi"):
+        assert all(math.isfinite(value) for value in first[key].values())
+        assert first[key]["p10"] <= first[key]["p50"] <= first[key]["p90"]
+    assert all(math.isfinite(value) for row in first["emission_trajectory"].values() for value in row)
+
+
+def test_monte_carlo_response_serializes(client):
+    response = client.post("/simulation/simulate", json=dict(SIMULATION, monte_carlo_runs=2000, monte_carlo_seed=3))
+    assert response.status_code == 200
+    assert response.json()["uncertainty"]["runs"] == 2000
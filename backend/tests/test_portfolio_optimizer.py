@@ -0,0 +1,20 @@
+from services.portfolio_optimizer import PortfolioOptimizer
+from benchmarks.portfolio_optimizer import synthetic_catalog, objective, check_exact, CORRELATIONS
+
+
+def test_optimizer_matches_brute_force():
+    # Up to 12 technologies per instance, every correlation, fixed seeds
+    assert check_exact(PortfolioOptimizer(), trials=60)
+
+
+def test_optimizer_is_never_worse_than_greedy():
+    optimizer = PortfolioOptimizer(time_limit_ms=200)
+    for correlation in CORRELATIONS:
+        technologies = synthetic_catalog(60, correlation, seed=5)
+        budget = 0.1 * sum(tech["cost"] for tech in technologies)
+        for target in (0.5, 1.0):
+            greedy_value, greedy_cost = objective(technologies, optimizer.greedy(technologies, target, budget), target)
+            solution = optimizer.optimize(technologies, target, budget)
+            value, cost = objective(technologies, solution.positions, target)
+            assert cost <= budget
+            assert value > greedy_value + 1e-9 or (value >= greedy_value - 1e-9 and cost <= greedy_cost + 1e-6)
@@ -0,0 +1,141 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from simulation.carbon_quantification_model import (
+    carbon_model, factor_sets, DepartmentInput, QuantificationResponse, DepartmentEmission, ActivityEmission
+)
+from simulation.forest_compiler import CompiledForest
+from main import app
+from benchmarks.forest_parity import sample_totals
+from benchmarks.prediction_intervals import naive_intervals, compiled_intervals
+
+# Fields the scalar implementation did not have
+NEW_FIELDS = {"emission_factors_version", "total_emissions_interval", "carbon_credits_interval", "input_flags"}
+
+
+def scalar_quantify(department_inputs, factors, model, scaler):
+    """The original per-department loop of CarbonQuantificationModel.predict, kept as the reference"""
+    features = list(factors)
+    total_inputs = {feature: 0 for feature in features}
+    department_data = {}
+    for dept in department_inputs:
+        dept_dict = dict(zip(features, (dept.energy_usage, dept.fuel_consumption, dept.industrial_output,
+                                        dept.waste_generated, dept.transport_distance)))
+        department_data[dept.name] = dept_dict
+        for feature in features:
+            total_inputs[feature] += dept_dict[feature]
+
+    department_emissions = {}
+    total_direct_emission = 0
+    for dept_name, data in department_data.items():
+        dept_emission = 0
+        for feature, value in data.items():
+            dept_emission += value * factors[feature]
+        department_emissions[dept_name] = dept_emission
+        total_direct_emission += dept_emission
+
+    activity_emissions = {feature: total_inputs[feature] * factors[feature] for feature in features}
+    prediction = model.predict(scaler.transform(pd.DataFrame([total_inputs])))
+
+    def percent(emission):
+        return (emission / total_direct_emission) * 100 if total_direct_emission != 0 else 0
+
+    return QuantificationResponse(
+        total_emissions=round(prediction[0][0], 2),
+        carbon_credits_required=round(prediction[0][1], 2),
+        department_emissions=[
+            DepartmentEmission(department=dept, emission=round(emission, 2), percentage=round(percent(emission), 2))
+            for dept, emission in department_emissions.items()
+        ],
+        activity_emissions=[
+            ActivityEmission(activity=activity, emission=round(emission, 2), percentage=round(percent(emission), 2))
+            for activity, emission in activity_emissions.items()
+        ]
+    )
+
+
+def random_organizations(n_organizations: int, seed: int):
+    rng = random.Random(seed)
+    organizations = []
+    for _ in range(n_organizations):
+        # Repeated names exercise the "last row wins, first position kept" rule
+        organizations.append([
+            DepartmentInput(
+                name=f"dept-{rng.randint(0, 6)}",
+                energy_usage=rng.uniform(0, 3000),
+                fuel_consumption=rng.uniform(0, 30000),
+                industrial_output=rng.choice([0.0, rng.uniform(0, 3000)]),
+                waste_generated=rng.uniform(0, 15000),
+                transport_distance=rng.uniform(0, 30000)
+            )
+            for _ in range(rng.randint(1, 8))
+        ])
+    return organizations
+
+
+@pytest.fixture(scope="module")
+def loaded():
+    carbon_model.ensure_loaded()
+    return carbon_model.loaded
+
+
+def dumped(responses):
+    return [response.model_dump(exclude=NEW_FIELDS) for response in responses]
+
+
+def test_batch_and_single_match_the_scalar_loop(loaded):
+    organizations = random_organizations(200, seed=1)
+    expected = dumped(scalar_quantify(departments, factor_sets.current.factors, loaded.model, loaded.scaler)
+                      for departments in organizations)
+    assert dumped(carbon_model.predict_batch(organizations)) == expected
+    assert dumped(carbon_model.predict(departments) for departments in organizations) == expected
+
+
+def test_compiled_forest_matches_sklearn(loaded):
+    X = (sample_totals(2000, seed=0) - loaded.scaler.mean_) / loaded.scaler.scale_
+    compiled = CompiledForest.from_multioutput(loaded.model)
+    assert np.array_equal(compiled.predict(X), loaded.model.predict(X))
+    # Small batches go through the compiled engine in predict_totals
+    assert np.array_equal(compiled.predict(X[:1]), loaded.model.predict(X[:1]))
+
+
+def test_intervals_match_per_tree_percentiles(loaded):
+    X = (sample_totals(500, seed=3) - loaded.scaler.mean_) / loaded.scaler.scale_
+    compiled = CompiledForest.from_multioutput(loaded.model)
+    percentiles = [5, 95]
+    for expected, actual in zip(naive_intervals(loaded.model, X, percentiles),
+                                compiled_intervals(compiled, X, percentiles)):
+        assert np.array_equal(expected, actual)
+
+    totals = sample_totals(50, seed=4)
+    predictions, bounds = carbon_model.predict_totals_with_intervals(totals, 90)
+    assert np.array_equal(predictions, carbon_model.predict_totals(totals))
+    assert np.all(bounds[:, :, 0] <= bounds[:, :, 1])
+
+
+def test_cached_quantify_matches_the_batch_for_every_order(loaded):
+    rng = random.Random(5)
+    organizations = [list({dept.name: dept for dept in departments}.values())
+                     for departments in random_organizations(30, seed=2)]
+    # 1e16 + 1 + 1 sums to a different float depending on where the large row comes
+    organizations.append([
+        DepartmentInput(name=name, energy_usage=energy, fuel_consumption=1, industrial_output=1,
+                        waste_generated=1, transport_distance=1)
+        for name, energy in [("a", 1e16), ("b", 1.0), ("c", 1.0)]
+    ])
+    with TestClient(app) as client:
+        for departments in organizations:
+            # Unique names, so every order is a valid payload of the same departments
+            for _ in range(3):
+                body = [dept.model_dump() for dept in departments]
+                expected = client.post("/api/carbon/quantify/batch", json={
+                    "organizations": [{"organization_id": "o", "departments": body}]
+                }).json()["results"][0]["result"]
+                # The second call is served from the result cache
+                for _ in range(2):
+                    assert client.post("/api/carbon/quantify", json={"departments": body}).json() == expected
+                departments = rng.sample(departments, len(departments))
@@ -0,0 +1,66 @@
+import os
+import json
+
+import pytest
+
+from simulation.sharded_jobs import ShardedJobRunner, split_shards, _organization_of
+from simulation.streaming_ingest import STREAM_FORMAT_CSV, STREAM_FORMAT_NDJSON, VALUE_FIELDS
+from benchmarks.sharded_jobs import job_upload, serial_quantify, comparable, timed_job
+
+
+@pytest.fixture(scope="module")
+def runner():
+    runner = ShardedJobRunner(max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+def write_upload(tmp_path, data: bytes) -> str:
+    path = os.path.join(tmp_path, "upload")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def as_csv(data: bytes) -> bytes:
+    fields = ["organization_id", "name"] + VALUE_FIELDS
+    rows = [json.loads(line) for line in data.split(b"\n")]
+    return "\n".join([",".join(fields)] + [",".join(str(row[field]) for field in fields) for row in rows]).encode()
+
+
+def test_sharded_job_matches_the_batch_path(runner):
+    # Shards cut organizations apart from each other only; the merged result is the /quantify/batch one
+    data = job_upload(300, 7, seed=2)
+    _, result = timed_job(runner, data)
+    assert comparable(result) == comparable(serial_quantify(data))
+
+
+@pytest.mark.parametrize("stream_format", [STREAM_FORMAT_CSV, STREAM_FORMAT_NDJSON])
+@pytest.mark.parametrize("n_shards", [1, 3, 8, 50])
+def test_shards_cover_the_upload_without_splitting_organizations(tmp_path, stream_format, n_shards):
+    data = job_upload(40, 5, seed=3)
+    if stream_format == STREAM_FORMAT_CSV:
+        data = as_csv(data)
+    path = write_upload(tmp_path, data)
+    columns, shards = split_shards(path, stream_format, n_shards)
+
+    header_end = data.find(b"\n") + 1 if stream_format == STREAM_FORMAT_CSV else 0
+    assert shards[0][0] == header_end and shards[-1][1] == len(data)
+    assert all(previous[1] == current[0] for previous, current in zip(shards, shards[1:]))
+    owners = {}
+    for i, (start, end) in enumerate(shards):
+        for line in data[start:end].split(b"\n"):
+            organization = _organization_of(line, stream_format, columns)
+            if organization is not None:
+                assert owners.setdefault(organization, i) == i
+
+
+def test_first_row_after_the_header(tmp_path):
+    header = (b"organization_id,name,energy_usage,fuel_consumption,industrial_output,waste_generated,"
+              b"transport_distance\n")
+    rows = [b"o1,a,1000,200,50,10,100\n", b"o1,b,5,5,5,5,5\n", b"o2,a,7,7,7,7,7\n"]
+    _, shards = split_shards(write_upload(tmp_path, header + b"".join(rows)), STREAM_FORMAT_CSV, 8)
+    assert [(end - start) for start, end in shards] == [len(rows[0]) + len(rows[1]), len(rows[2])]
+
+    _, shards = split_shards(write_upload(tmp_path, header + rows[0]), STREAM_FORMAT_CSV, 8)
+    assert [(end - start) for start, end in shards] == [len(rows[0])]